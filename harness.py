@@ -0,0 +1,326 @@
+"""End-to-end fidelity and latency harness for the replay engine.
+
+Replays text corpora into a local stand-in target (a Tk text window, started
+under Xvfb when no display is available), reads the final text back for an
+exact-match check and times every keystroke from injection to arrival.
+
+    python harness.py corpus.txt --wpm 60 --wpm 150 --burst xtest --json results.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+# Key events the stand-in target doesn't count as arrivals
+MODIFIER_KEYSYMS = {
+    'Shift_L', 'Shift_R', 'Control_L', 'Control_R', 'Alt_L', 'Alt_R',
+    'Meta_L', 'Meta_R', 'Super_L', 'Super_R', 'ISO_Level3_Shift', 'Caps_Lock',
+}
+
+
+def run_target(conn):
+    """Stand-in target window; answers commands from the harness over conn"""
+    import tkinter as tk
+
+    root = tk.Tk()
+    root.title("Keystroke Replayer Target")
+    root.geometry("800x600+0+0")
+    text = tk.Text(root, wrap=tk.NONE, undo=False)
+    text.pack(fill='both', expand=True)
+    arrivals = []
+
+    def on_key(event):
+        if event.keysym not in MODIFIER_KEYSYMS:
+            arrivals.append(time.perf_counter())
+
+    # Widget bindings run before the Text class bindings insert the character
+    text.bind('<KeyPress>', on_key)
+
+    def poll():
+        while conn.poll():
+            command = conn.recv()
+            if command == 'clear':
+                text.delete('1.0', 'end')
+                arrivals.clear()
+                text.focus_force()
+                conn.send(True)
+            elif command == 'text':
+                conn.send(text.get('1.0', 'end-1c'))
+            elif command == 'dump':
+                conn.send((text.get('1.0', 'end-1c'), list(arrivals)))
+            elif command == 'quit':
+                root.destroy()
+                return
+        root.after(2, poll)
+
+    def ready():
+        text.focus_force()
+        conn.send('ready')
+        poll()
+
+    root.after(200, ready)
+    root.mainloop()
+
+
+class TargetWindow:
+    """Harness-side handle on the stand-in target process"""
+
+    def __init__(self):
+        context = multiprocessing.get_context('spawn')
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=run_target, args=(child_conn,), daemon=True)
+        self.process.start()
+        if not self.conn.poll(15) or self.conn.recv() != 'ready':
+            raise RuntimeError("Target window did not start")
+
+    def request(self, command):
+        self.conn.send(command)
+        return self.conn.recv()
+
+    def clear(self):
+        self.request('clear')
+
+    def text(self):
+        return self.request('text')
+
+    def wait_settled(self, quiet=0.3, timeout=10.0):
+        """Wait until no new keys arrive for quiet seconds, then dump the target"""
+        deadline = time.perf_counter() + timeout
+        last_count = -1
+        while True:
+            text, arrivals = self.request('dump')
+            if len(arrivals) == last_count or time.perf_counter() > deadline:
+                return text, arrivals
+            last_count = len(arrivals)
+            time.sleep(quiet)
+
+    def close(self):
+        try:
+            self.conn.send('quit')
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(2)
+
+
+class RecordingBackend:
+    """Wraps a backend and records the injection time of every key it sends.
+
+    Keys of a multi-key call are timed from the call start plus their share of
+    the per-key interval; modifier key downs and ups are not recorded.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = backend.name
+        self.types_keys = backend.types_keys
+        self.blocks_loop = backend.blocks_loop
+        self.sent = []
+
+    def write(self, text, interval=0.0):
+        started = time.perf_counter()
+        self.backend.write(text, interval=interval)
+        self.sent.extend(started + i * interval for i in range(len(text)))
+
+    def press(self, keys, interval=0.0):
+        started = time.perf_counter()
+        self.backend.press(keys, interval=interval)
+        count = 1 if isinstance(keys, str) else len(keys)
+        self.sent.extend(started + i * interval for i in range(count))
+
+    def key_down(self, key):
+        self.backend.key_down(key)
+
+    def key_up(self, key):
+        self.backend.key_up(key)
+
+    def burst(self, text):
+        started = time.perf_counter()
+        self.backend.burst(text)
+        # A paste arrives as a single key press
+        self.sent.extend([started] * (len(text) if self.types_keys else 1))
+
+    def paste(self, text):
+        started = time.perf_counter()
+        self.backend.paste(text)
+        self.sent.append(started)
+
+    def restore_clipboard(self):
+        self.backend.restore_clipboard()
+
+    def close(self):
+        self.backend.close()
+
+
+def start_xvfb():
+    """Start Xvfb on a free display number and point DISPLAY at it"""
+    if not shutil.which('Xvfb'):
+        raise RuntimeError("No display available and Xvfb is not installed")
+    for number in range(90, 200):
+        if not os.path.exists(f"/tmp/.X{number}-lock"):
+            break
+    process = subprocess.Popen(
+        ['Xvfb', f':{number}', '-screen', '0', '1280x800x24', '-nolisten', 'tcp'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    socket_path = f"/tmp/.X11-unix/X{number}"
+    for _ in range(100):
+        if os.path.exists(socket_path):
+            break
+        time.sleep(0.05)
+    else:
+        process.terminate()
+        raise RuntimeError("Xvfb did not start")
+    os.environ['DISPLAY'] = f':{number}'
+    return process
+
+
+def summarize_latency(sent, arrivals):
+    """Latency stats in ms, pairing the i-th injected key with the i-th arrival"""
+    latencies = [(arrived - injected) * 1000 for injected, arrived in zip(sent, arrivals)]
+    if not latencies:
+        return {}
+    ordered = sorted(latencies)
+
+    def percentile(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    return {
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'p50_ms': round(percentile(0.50), 3),
+        'p95_ms': round(percentile(0.95), 3),
+        'p99_ms': round(percentile(0.99), 3),
+        'max_ms': round(ordered[-1], 3),
+    }
+
+
+def first_difference(expected, received):
+    """Index of the first differing character, or None for an exact match"""
+    for index, (a, b) in enumerate(zip(expected, received)):
+        if a != b:
+            return index
+    if len(expected) != len(received):
+        return min(len(expected), len(received))
+    return None
+
+
+def replay_once(main, target, text, settings, seed, adaptive):
+    """Replay text into the target and measure fidelity and latency.
+
+    The text goes through the same preflight as in the app, and the target
+    is expected to receive the normalized text.
+    """
+    report = main.preflight_text(text, settings['normalize_text'])
+    text = report.text
+    target.clear()
+    backend = RecordingBackend(main.create_backend(settings))
+    flow = main.FlowController(readback=target.text) if adaptive else None
+    executor = main.KeystrokeExecutor(backend, flow)
+    planner = main.TypingPlanner(settings, random.Random(seed))
+    if settings['burst_mode']:
+        events = planner.iter_burst_events(text, keystrokes=backend.types_keys)
+    else:
+        events = planner.iter_events(text)
+
+    started = time.perf_counter()
+    try:
+        executor.run(events)
+    finally:
+        backend.close()
+    elapsed = time.perf_counter() - started
+    received, arrivals = target.wait_settled()
+
+    result = {
+        'backend': backend.name,
+        'wpm': settings['base_speed'],
+        'chars': len(text),
+        'normalized_chars': sum(report.normalized.values()),
+        'pasted_chars': sum(len(offsets) for offsets in report.untypeable.values()),
+        'received_chars': len(received),
+        'exact_match': received == text,
+        'first_difference': first_difference(text, received),
+        'seconds': round(elapsed, 3),
+        'chars_per_second': round(len(text) / elapsed, 1) if elapsed else None,
+        'keys_sent': len(backend.sent),
+        'keys_arrived': len(arrivals),
+        'latency': summarize_latency(backend.sent, arrivals),
+    }
+    if flow:
+        result['final_rate'] = round(flow.rate, 3)
+        result['readback_mismatches'] = flow.dropped
+    return result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay corpora into a local target window and verify what arrives")
+    parser.add_argument('corpora', nargs='+', help="text files to replay")
+    parser.add_argument('--wpm', type=int, action='append', help="typing speed, repeat to compare speeds (default 60)")
+    parser.add_argument('--burst', action='append', choices=['auto', 'xtest', 'clipboard', 'pyautogui'],
+                        help="use burst mode with this method, repeat to compare backends")
+    parser.add_argument('--chunk-size', type=int, default=200, help="burst chunk size in characters")
+    parser.add_argument('--chunk-delay', type=int, default=20, help="delay after each burst chunk in ms")
+    parser.add_argument('--typos', action='store_true', help="enable typos and corrections")
+    parser.add_argument('--rewrites', action='store_true', help="enable word rewriting")
+    parser.add_argument('--adaptive', action='store_true', help="enable flow control with read-back from the target")
+    parser.add_argument('--seed', type=int, default=0, help="planner seed")
+    parser.add_argument('--xvfb', action='store_true', help="always run under a private Xvfb display")
+    parser.add_argument('--json', help="write results to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    xvfb = start_xvfb() if args.xvfb or not os.environ.get('DISPLAY') else None
+
+    # pyautogui connects to the display on import, so only import it now
+    import main as replayer
+    import pyautogui
+    pyautogui.PAUSE = 0.01
+    pyautogui.FAILSAFE = False
+
+    target = TargetWindow()
+    results = []
+    try:
+        for path in args.corpora:
+            with open(path, encoding='utf-8') as corpus:
+                text = corpus.read().replace('\r\n', '\n').lstrip('\r\n').rstrip()
+            for wpm in args.wpm or [60]:
+                for method in args.burst or [None]:
+                    settings = dict(replayer.DEFAULT_SETTINGS)
+                    settings.update({
+                        'base_speed': wpm,
+                        'use_pauses': False,
+                        'use_typos': args.typos,
+                        'use_rewrite': args.rewrites,
+                        'burst_mode': method is not None,
+                        'burst_method': method or 'auto',
+                        'burst_chunk_size': args.chunk_size,
+                        'burst_chunk_delay': args.chunk_delay,
+                    })
+                    result = replay_once(replayer, target, text, settings, args.seed, args.adaptive)
+                    result['corpus'] = path
+                    results.append(result)
+                    latency = result['latency']
+                    print(f"{path} {result['backend']:<10} {wpm:>4} wpm  "
+                          f"{'OK  ' if result['exact_match'] else 'DIFF'} "
+                          f"{result['chars_per_second']:>8} chars/s  "
+                          f"p50 {latency.get('p50_ms', '-')} ms  p99 {latency.get('p99_ms', '-')} ms")
+    finally:
+        target.close()
+        if xvfb:
+            xvfb.terminate()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump(results, output, indent=2)
+    return 0 if all(result['exact_match'] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,662 @@
 import tkinter as tk
-from tkinter import scrolledtext, messagebox, ttk, font
+from tkinter import scrolledtext, messagebox, filedialog, ttk, font
 import pyautogui
 import time
 import threading
+import argparse
+import codecs
+import asyncio
+import collections
+import zlib
+import functools
+import contextlib
+import cProfile
+import pstats
+import hashlib
+import hmac
+import io
+import heapq
+import http.server
+import json
+import bisect
+import itertools
 import math
+import multiprocessing
+import os
+import queue
 import random
+import re
+import secrets
+import socketserver
+import string
+import struct
+import sys
+
+# Editor behaviours the token stream is rewritten for before typing starts.
+# indent_after: line endings after which the editor adds an indent level of indent_unit spaces
+# tab_stops: backspace in leading spaces deletes back to the previous multiple of indent_unit
+# pair_quotes: quotes are auto-paired like brackets
+# word_delete: the target deletes the word before the cursor on WORD_DELETE_MODIFIER+backspace
+TARGET_PROFILE_DEFAULTS = {
+    'auto_indent': False, 'indent_after': '', 'indent_unit': 4, 'tab_stops': False,
+    'auto_pair': False, 'pair_quotes': False, 'word_delete': False,
+}
+
+TARGET_PROFILES = {
+    name: dict(TARGET_PROFILE_DEFAULTS, **options) for name, options in {
+        'plain': {'label': "Plain text"},
+        'auto_indent': {'label': "Auto-indent editor", 'auto_indent': True, 'word_delete': True},
+        'auto_pair': {
+            'label': "Auto-pairing editor", 'auto_indent': True, 'auto_pair': True,
+            'pair_quotes': True, 'word_delete': True,
+        },
+        'code_editor': {
+            'label': "Code editor (smart indent)", 'auto_indent': True, 'indent_after': ':{[(',
+            'tab_stops': True, 'auto_pair': True, 'pair_quotes': True, 'word_delete': True,
+        },
+    }.items()
+}
+
+# Quotes auto-pairing editors close, unless typed right after a word character
+QUOTE_CHARS = '"\'`'
+
+# Option+backspace deletes a word on macOS, Ctrl+backspace elsewhere
+WORD_DELETE_MODIFIER = 'alt' if sys.platform == 'darwin' else 'ctrl'
+
+# Replay settings used when a caller doesn't provide its own (GUI defaults)
+DEFAULT_SETTINGS = {
+    'base_speed': 60,
+    'use_typos': False,
+    'typo_chance': 5,
+    'use_pauses': True,
+    'pause_chance': 15,
+    'pause_duration': 2.0,
+    'use_variation': True,
+    'variation_amount': 30,
+    'use_rewrite': False,
+    'rewrite_chance': 8,
+    'word_delete_chords': False,  # Delete rewritten words with one chord where the target supports it
+    'target_profile': 'plain',
+    'keyboard_layout': 'qwerty',
+    'adaptive_flow': False,
+    'burst_mode': False,
+    'burst_method': 'auto',
+    'burst_chunk_size': 200,
+    'burst_chunk_delay': 20,
+    'paste_hotkey': None,  # Platform default
+    'normalize_text': True,
+    'seed': None,  # Random plan each run
+    'profile': False,  # Profile the replay and planner threads
+    'precise_timing': False,  # Hybrid sleep/spin timer for keystroke delays
+    'cpu_affinity': None,  # CPUs to pin the replay thread to (Linux)
+    'nice': None,  # Niceness of the replay thread (Linux)
+    'isolated_executor': False,  # Dispatch keys from a separate process
+    'markup': False,  # Interpret {enter}, {ctrl+s}, {wait 500ms} and similar
+    'planning_workers': None,  # Processes planning large texts; None picks by size and CPUs
+}
+
+
+def merge_settings(overrides=None, seed=None):
+    """DEFAULT_SETTINGS with overrides applied; unknown names raise ValueError"""
+    overrides = overrides or {}
+    unknown = set(overrides) - set(DEFAULT_SETTINGS)
+    if unknown:
+        raise ValueError(f"unknown settings: {', '.join(sorted(unknown))}")
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update(overrides)
+    if seed is not None:
+        settings['seed'] = seed
+    if settings['seed'] is not None:
+        settings['seed'] = int(settings['seed'])
+    return settings
+
+BRACKET_PAIRS = {'(': ')', '[': ']', '{': '}'}
+
+# Physical keyboard layouts as (unshifted, shifted) rows, number row first.
+# ISO layouts have an extra key left of the bottom row.
+KEYBOARD_LAYOUTS = {
+    'qwerty': {
+        'label': "QWERTY (US)",
+        'iso': False,
+        'rows': [
+            ("`1234567890-=", "~!@#$%^&*()_+"),
+            ("qwertyuiop[]\\", "QWERTYUIOP{}|"),
+            ("asdfghjkl;'", 'ASDFGHJKL:"'),
+            ("zxcvbnm,./", "ZXCVBNM<>?"),
+        ],
+    },
+    'azerty': {
+        'label': "AZERTY (French)",
+        'iso': True,
+        'rows': [
+            ("²&é\"'(-è_çà)=", "²1234567890°+"),
+            ("azertyuiop^$", "AZERTYUIOP¨£"),
+            ("qsdfghjklmù*", "QSDFGHJKLM%µ"),
+            ("<wxcvbn,;:!", ">WXCVBN?./§"),
+        ],
+    },
+    'qwertz': {
+        'label': "QWERTZ (German)",
+        'iso': True,
+        'rows': [
+            ("^1234567890ß´", "°!\"§$%&/()=?`"),
+            ("qwertzuiopü+", "QWERTZUIOPÜ*"),
+            ("asdfghjklöä#", "ASDFGHJKLÖÄ'"),
+            ("<yxcvbnm,.-", ">YXCVBNM;:_"),
+        ],
+    },
+    'dvorak': {
+        'label': "Dvorak",
+        'iso': False,
+        'rows': [
+            ("`1234567890[]", "~!@#$%^&*(){}"),
+            ("',.pyfgcrl/=\\", '"<>PYFGCRL?+|'),
+            ("aoeuidhtns-", "AOEUIDHTNS_"),
+            (";qjkxbmwvz", ":QJKXBMWVZ"),
+        ],
+    },
+    'colemak': {
+        'label': "Colemak",
+        'iso': False,
+        'rows': [
+            ("`1234567890-=", "~!@#$%^&*()_+"),
+            ("qwfpgjluy;[]\\", "QWFPGJLUY:{}|"),
+            ("arstdhneio'", 'ARSTDHNEIO"'),
+            ("zxcvbkm,./", "ZXCVBKM<>?"),
+        ],
+    },
+}
+
+# Horizontal offset of each row's first key, in key widths
+ROW_OFFSETS = (0.0, 1.5, 1.75, 2.25)
+ISO_BOTTOM_OFFSET = 1.25
+
+# Keys whose centres are at most this far apart count as adjacent
+ADJACENT_DISTANCE = 1.3
+
+
+def build_layout_index(layout):
+    """Precompute adjacency for one layout.
+    
+    adjacent maps every character on the layout to the typeable characters on
+    neighbouring keys in the same shift layer.
+    """
+    keys = []  # (x, y, unshifted, shifted)
+    for row_number, (unshifted, shifted) in enumerate(layout['rows']):
+        offset = ROW_OFFSETS[row_number]
+        if row_number == 3 and layout['iso']:
+            offset = ISO_BOTTOM_OFFSET
+        for column, (base, upper) in enumerate(zip(unshifted, shifted)):
+            keys.append((offset + column, row_number, base, upper))
+    
+    adjacent = {}
+    for x, y, base, upper in keys:
+        neighbours = [key for key in keys
+                      if key[:2] != (x, y) and math.hypot(key[0] - x, key[1] - y) <= ADJACENT_DISTANCE]
+        for layer, char in ((2, base), (3, upper)):
+            chars = tuple(dict.fromkeys(
+                key[layer] for key in neighbours if 0x20 < ord(key[layer]) < 0x7f and key[layer] != char))
+            if chars:
+                adjacent[char] = chars
+    return {'adjacent': adjacent}
+
+
+LAYOUT_INDEX = {name: build_layout_index(layout) for name, layout in KEYBOARD_LAYOUTS.items()}
+
+# Shifted characters and the key that types them under shift. Letters only:
+# keyboard_layout is the layout typos are drawn from, not the host's, and the
+# key under a shifted symbol differs between host layouts
+SHIFTED_KEYS = {char.upper(): char for char in string.ascii_lowercase}
+UNSHIFTED_KEYS = {key: char for char, key in SHIFTED_KEYS.items()}
+
+
+# The most frequent English word forms, most frequent first, ranked by their
+# counts in the Brown corpus (Kučera and Francis, 1967)
+COMMON_WORDS = """
+the of and to a in that is was he for it with as his on be at by i this had not are but from
+or have an they which one you were her all she there would their we him been has when who
+will more no if out so said what up its about into than them can only other new some could
+time these two may then do first any my now such like our over man me even most made after
+also did many before must through back years where much your way well down should because
+each just those people mr how too little state good very make world still own see men work
+long get here between both life being under never day same another know while last might us
+great old year off come since against go came right used take three states himself few house
+use during without again place american around however home small found mrs thought went say
+part once general high upon school every don't does got united left number course war until
+always away something fact though water less public put thing almost hand enough far took
+head yet government system better set told nothing night end why called didn't eyes find
+going look asked later knew
+""".split()
+
+# Punctuation stripped from a word before looking it up
+WORD_PUNCTUATION = '.,;:!?"\'()[]{}<>-_*'
+
+
+def build_word_speed_factors(words, fastest=0.7, slowest=0.95):
+    """Speed factor per word from its frequency rank, log-scaled from fastest to slowest"""
+    scale = math.log1p(len(words))
+    return {word: round(fastest + (slowest - fastest) * math.log1p(rank) / scale, 3)
+            for rank, word in enumerate(words)}
+
+
+# Built once at import; planning looks words up in O(1)
+WORD_SPEED_FACTORS = build_word_speed_factors(COMMON_WORDS)
+
+
+def word_speed_factor(word):
+    """Relative time per character of a word from its length, lowered for common words"""
+    word_length = len(word)
+    if word_length <= 3:
+        factor = 1.1  # Short words typed slightly slower (10% slower)
+    elif word_length <= 5:
+        factor = 1.0  # Medium words at base speed
+    elif word_length <= 8:
+        factor = 0.9  # Long words typed slightly faster (10% faster)
+    else:
+        factor = 0.8  # Very long words typed faster (20% faster)
+    # Frequent words are practiced, so typed faster whatever their length
+    return min(factor, WORD_SPEED_FACTORS.get(word.lower().strip(WORD_PUNCTUATION), factor))
+
+
+# Ordinary prose the word speed factors are calibrated against
+SPEED_REFERENCE_TEXT = """
+When the weather turned cold last winter, most of the people in our town stayed at home and
+waited for spring. The roads were covered with snow for weeks, and the school was closed more
+than once. My neighbour, who has lived here for nearly forty years, told me that she could not
+remember a season quite like it. Still, there was something pleasant about the quiet. We read
+books, cooked long dinners and talked about the places we would visit once the trains were
+running again. By the time the first flowers appeared in the garden, everyone seemed ready to
+go back to work, although a few of us admitted that we would miss those slow afternoons by the
+fire. Planning a journey is often more enjoyable than the journey itself, because every detail
+still feels possible and nothing has gone wrong yet.
+"""
+
+
+def word_speed_normalization(text):
+    """Mean word speed factor per typed character over text"""
+    words = text.split()
+    return sum(len(word) * word_speed_factor(word) for word in words) / sum(len(word) for word in words)
+
+
+# Dividing by this keeps the average speed over typical text at the set WPM;
+# common words are still faster and rare ones slower than the average
+WORD_SPEED_NORMALIZATION = word_speed_normalization(SPEED_REFERENCE_TEXT)
+
+TOKEN_PATTERN = re.compile(r'\r\n|[\r\n]|[^\S\r\n]+|\S+')
+
+
+def tokenize_text(text, line_start=True):
+    """Lazily split text into word, space, indent and newline tokens, keeping all whitespace"""
+    for match in TOKEN_PATTERN.finditer(text):
+        value = match.group()
+        if value in ('\r\n', '\r', '\n'):
+            yield ('newline', '\n')
+            line_start = True
+        elif value.isspace():
+            yield ('indent' if line_start else 'space', value)
+            line_start = False
+        else:
+            yield ('word', value)
+            line_start = False
+
+
+# Key names markup may press, besides single characters
+MARKUP_KEYS = {
+    'enter', 'return', 'tab', 'space', 'backspace', 'delete', 'del', 'esc', 'escape', 'insert',
+    'up', 'down', 'left', 'right', 'home', 'end', 'pageup', 'pagedown', 'pgup', 'pgdn',
+    'ctrl', 'alt', 'shift', 'win', 'command', 'option', 'fn', 'capslock', 'numlock', 'scrolllock',
+    'printscreen', 'pause', 'apps', 'volumeup', 'volumedown', 'volumemute', 'playpause',
+    'nexttrack', 'prevtrack',
+} | {f'f{number}' for number in range(1, 25)}
+
+# Keys that start a new line in the target, like a newline in the text
+NEWLINE_KEYS = ('enter', 'return')
+
+MARKUP_ALIASES = {'cmd': 'command', 'super': 'win', 'control': 'ctrl', 'pgup': 'pageup', 'pgdn': 'pagedown'}
+
+# {{ is a literal brace, {...} a tag, and any other { an error
+MARKUP_PATTERN = re.compile(r'\{\{|\{([^{}\n]*)\}|\{')
+
+MARKUP_WAIT_PATTERN = re.compile(r'(\d+(?:\.\d+)?)(ms|s)?$')
+
+
+def ends_line(kind, value):
+    """Whether a token starts a new line in the target"""
+    return kind == 'newline' or (kind == 'key' and value in NEWLINE_KEYS)
+
+
+def parse_markup_tag(body):
+    """Tokens for one markup tag body, e.g. 'tab 3', 'ctrl+s' or 'wait 500ms'"""
+    parts = body.lower().split()
+    if not parts or len(parts) > 2:
+        raise ValueError(f"invalid markup {{{body}}}")
+    if parts[0] == 'wait':
+        match = MARKUP_WAIT_PATTERN.match(parts[1]) if len(parts) == 2 else None
+        if not match:
+            raise ValueError(f"invalid wait {{{body}}}, use e.g. {{wait 500ms}} or {{wait 2s}}")
+        seconds = float(match.group(1)) / (1000 if match.group(2) == 'ms' else 1)
+        return [('wait', seconds)]
+    
+    count = parts[1] if len(parts) == 2 else '1'
+    if not count.isdigit() or not 1 <= int(count) <= 1000:
+        raise ValueError(f"invalid repeat count in {{{body}}}")
+    keys = tuple(MARKUP_ALIASES.get(key, key) for key in parts[0].split('+'))
+    for key in keys:
+        if key not in MARKUP_KEYS and len(key) != 1:
+            raise ValueError(f"unknown key {key!r} in {{{body}}}")
+    token = ('key', keys[0]) if len(keys) == 1 else ('chord', keys)
+    return [token] * int(count)
+
+
+def tokenize_markup(text):
+    """Tokenize text with markup for special keys, chords and waits.
+    
+    {enter} or {tab 3} press keys, {ctrl+s} presses a chord, {wait 500ms}
+    pauses and {{ types a literal brace. Keys become 'key' tokens, chords
+    'chord' tokens of key names and waits 'wait' tokens of seconds.
+    """
+    pending = ''  # Text since the last tag, with {{ already unescaped
+    line_start = True
+    position = 0
+    for match in MARKUP_PATTERN.finditer(text):
+        pending += text[position:match.start()]
+        position = match.end()
+        if match.group() == '{{':
+            pending += '{'
+            continue
+        if match.group(1) is None:
+            line = text.count('\n', 0, match.start()) + 1
+            column = match.start() - (text.rfind('\n', 0, match.start()) + 1) + 1
+            raise ValueError(f"unclosed {{ at {line}:{column}, write {{{{ for a literal brace")
+        if pending:
+            yield from tokenize_text(pending, line_start)
+            line_start = pending[-1] in '\r\n'
+            pending = ''
+        tokens = parse_markup_tag(match.group(1))
+        yield from tokens
+        # Text after {enter} is at the start of a line, so leading spaces are indentation
+        line_start = ends_line(*tokens[-1])
+    pending += text[position:]
+    if pending:
+        yield from tokenize_text(pending, line_start)
+
+
+def check_markup(text):
+    """Raise ValueError for the first markup error in text"""
+    for _ in tokenize_markup(text):
+        pass
+
+
+def apply_target_profile(tokens, profile):
+    """Rewrite tokens so the target editor's own insertions are not typed twice"""
+    options = TARGET_PROFILES.get(profile, TARGET_PROFILES['plain'])
+    if options['auto_pair']:
+        tokens = remove_auto_pairs(tokens, options['pair_quotes'])
+    if options['auto_indent']:
+        tokens = remove_auto_indent(tokens, options['indent_after'], options['indent_unit'], options['tab_stops'])
+    return tokens
+
+
+def remove_auto_indent(tokens, indent_after='', indent_unit=4, tab_stops=False):
+    """Only type the indentation difference to what the editor carries over after Enter.
+    
+    The editor carries the previous non-blank line's indentation, plus a level
+    when that line ends in one of indent_after. Dedent tokens count backspaces;
+    with tab_stops one backspace in leading spaces removes up to a whole level.
+    """
+    carried = ''  # Indentation the editor inserts on the current line
+    indent = ''  # Indentation of the current line
+    last_char = None  # Last character typed on the current line
+    line_start = True
+    for kind, value in tokens:
+        if ends_line(kind, value):
+            # Blank lines keep the carried indentation
+            if not line_start:
+                carried = indent
+                if last_char and last_char in indent_after:
+                    carried += '\t' if '\t' in indent else ' ' * indent_unit
+            line_start = True
+            last_char = None
+            yield (kind, value)
+            continue
+        if line_start:
+            line_start = False
+            indent = value if kind == 'indent' else ''
+            common = len(os.path.commonprefix([carried, indent]))
+            column = len(carried)
+            if column > common:
+                if tab_stops and carried.strip(' ') == '':
+                    presses = 0
+                    while column > common:
+                        column = (column - 1) // indent_unit * indent_unit
+                        presses += 1
+                else:
+                    presses, column = column - common, common
+                yield ('dedent', presses)
+            if indent[column:]:
+                yield ('indent', indent[column:])
+            if kind == 'indent':
+                continue
+        if kind in ('word', 'paste') and value:
+            last_char = value[-1]
+        yield (kind, value)
+
+
+def remove_auto_pairs(tokens, pair_quotes=False):
+    """Delete the closer an auto-pairing editor inserts for brackets left open at line end.
+
+    Brackets closed on the same line need no help: typing the closer steps over
+    the one the editor inserted. With pair_quotes quotes pair the same way,
+    except after a word character or backslash, and brackets inside a quoted
+    string are not paired.
+    """
+    line = []
+    for token in itertools.chain(tokens, [('newline', None)]):
+        if not ends_line(*token):
+            line.append(token)
+            continue
+        # Find openers without a matching closer on this line
+        stack = []
+        previous = ''
+        for index, (kind, value) in enumerate(line):
+            if kind != 'word':
+                previous = ''
+                continue
+            for offset, char in enumerate(value):
+                quoted = stack and stack[-1][2] in QUOTE_CHARS
+                if pair_quotes and char in QUOTE_CHARS:
+                    if quoted and stack[-1][2] == char:
+                        if previous != '\\':
+                            stack.pop()
+                    elif not quoted and not (previous.isalnum() or previous in ('_', '\\')):
+                        stack.append((index, offset, char))
+                elif quoted:
+                    pass
+                elif char in BRACKET_PAIRS:
+                    stack.append((index, offset, char))
+                elif stack and char == BRACKET_PAIRS.get(stack[-1][2]):
+                    stack.pop()
+                previous = char
+        split_points = {}
+        for index, offset, _ in stack:
+            split_points.setdefault(index, []).append(offset + 1)
+        # Split words after each unmatched opener and delete the inserted closer
+        for index, (kind, value) in enumerate(line):
+            if index not in split_points:
+                yield (kind, value)
+                continue
+            start = 0
+            for end in split_points[index]:
+                yield ('word', value[start:end])
+                yield ('key', 'delete')
+                start = end
+            if value[start:]:
+                yield ('word', value[start:])
+        if token[1] is not None:
+            yield token
+        line = []
+
+
+# Characters pyautogui can't type, mapped to plain equivalents before replay
+TEXT_NORMALIZATIONS = {
+    '\u2018': "'", '\u2019': "'", '\u201a': "'", '\u2032': "'",
+    '\u201c': '"', '\u201d': '"', '\u201e': '"', '\u2033': '"',
+    '\u00ab': '"', '\u00bb': '"',
+    '\u2010': '-', '\u2011': '-', '\u2012': '-', '\u2013': '-', '\u2212': '-',
+    '\u2014': '--', '\u2015': '--',
+    '\u2026': '...', '\u2022': '*', '\u00b7': '*',
+    '\u00a0': ' ', '\u2002': ' ', '\u2003': ' ', '\u2009': ' ', '\u202f': ' ',
+    '\u200b': '', '\u200c': '', '\u200d': '', '\ufeff': '',
+}
+NORMALIZATION_TABLE = str.maketrans(TEXT_NORMALIZATIONS)
+
+# Anything besides printable ASCII, tab and newline has no reliable key
+UNTYPEABLE_PATTERN = re.compile(r'[^\x20-\x7e\t\n]+')
+
+
+class PreflightReport:
+    """Typeability of a text, checked before a replay starts.
+    
+    untypeable maps each character without a reliable key to its offsets in
+    the normalized text; those characters are pasted instead of typed.
+    Latin-1 characters are layout-dependent: some host layouts have a key
+    for them, but pyautogui can't rely on it.
+    """
+    
+    def __init__(self, text, normalized, untypeable):
+        self.text = text
+        self.normalized = normalized  # original char -> count replaced
+        self.untypeable = untypeable
+        
+    @property
+    def layout_dependent(self):
+        return {char: positions for char, positions in self.untypeable.items() if ord(char) < 0x100}
+        
+    def position_label(self, offset):
+        """1-based line:column for an offset in the normalized text"""
+        line = self.text.count('\n', 0, offset) + 1
+        column = offset - (self.text.rfind('\n', 0, offset) + 1) + 1
+        return f"{line}:{column}"
+        
+    def summary(self, limit=5):
+        """Short human-readable description for the status line and dialogs"""
+        lines = []
+        if self.normalized:
+            replaced = ", ".join(f"{char} ×{count}" for char, count in list(self.normalized.items())[:limit])
+            lines.append(f"Normalized {sum(self.normalized.values())} characters ({replaced})")
+        if self.untypeable:
+            details = ", ".join(
+                f"{char} at {self.position_label(positions[0])}" + (f" (+{len(positions) - 1})" if len(positions) > 1 else "")
+                for char, positions in list(self.untypeable.items())[:limit]
+            )
+            count = sum(len(positions) for positions in self.untypeable.values())
+            layout_count = sum(len(positions) for positions in self.layout_dependent.values())
+            layout_note = f" ({layout_count} layout-dependent)" if layout_count else ""
+            lines.append(f"{count} characters will be pasted{layout_note}: {details}")
+        return "\n".join(lines)
+
+
+def preflight_text(text, normalize=True):
+    """Normalize text through the translation table and index what can't be typed"""
+    normalized = {}
+    if normalize:
+        for char in set(text).intersection(TEXT_NORMALIZATIONS):
+            normalized[char] = text.count(char)
+        text = text.translate(NORMALIZATION_TABLE)
+    
+    untypeable = {}
+    for match in UNTYPEABLE_PATTERN.finditer(text):
+        for offset, char in enumerate(match.group(), match.start()):
+            untypeable.setdefault(char, []).append(offset)
+    return PreflightReport(text, normalized, untypeable)
+
+
+def route_untypeable(tokens):
+    """Split runs of untypeable characters out of tokens so they are pasted"""
+    for kind, value in tokens:
+        if not isinstance(value, str) or kind in ('newline', 'key', 'chord') or not UNTYPEABLE_PATTERN.search(value):
+            yield (kind, value)
+            continue
+        start = 0
+        for match in UNTYPEABLE_PATTERN.finditer(value):
+            if match.start() > start:
+                yield (kind, value[start:match.start()])
+            yield ('paste', match.group())
+            start = match.end()
+        if value[start:]:
+            yield (kind, value[start:])
+
+
+# Real words commonly typed in place of each other, used by word rewriting
+CONFUSIONS = {
+    'their': ('there', "they're"), 'there': ('their', "they're"), "they're": ('their', 'there'),
+    'your': ("you're",), "you're": ('your',), 'its': ("it's",), "it's": ('its',),
+    'then': ('than',), 'than': ('then',), 'to': ('too',), 'too': ('to',),
+    'affect': ('effect',), 'effect': ('affect',), 'accept': ('except',), 'except': ('accept',),
+    'lose': ('loose',), 'loose': ('lose',), 'were': ('where', "we're"), 'where': ('were',),
+    'weather': ('whether',), 'whether': ('weather',), 'quiet': ('quite',), 'quite': ('quiet',),
+    'form': ('from',), 'from': ('form',), 'though': ('through', 'thought'),
+    'through': ('though', 'threw'), 'which': ('witch',), 'whose': ("who's",),
+}
+
+
+def load_confusions(path):
+    """Merge a JSON file of {word: [confused words]} into CONFUSIONS, once at startup"""
+    with open(path, encoding='utf-8') as confusion_file:
+        entries = json.load(confusion_file)
+    if not isinstance(entries, dict):
+        raise ValueError("confusions file must hold an object of word: [words]")
+    for word, alternatives in entries.items():
+        if not isinstance(alternatives, list) or not all(isinstance(item, str) for item in alternatives):
+            raise ValueError(f"confusions for {word!r} must be a list of words")
+    for word, alternatives in entries.items():
+        CONFUSIONS[word.lower()] = tuple(alternatives)
+    wrong_word_candidates.cache_clear()
+
+
+@functools.lru_cache(maxsize=4096)
+def wrong_word_candidates(word, layout_name='qwerty'):
+    """Plausible wrong versions of word, grouped by kind of mistake.
+    
+    Deterministic for a given word and layout, so it is cached; the random
+    pick happens in the caller.
+    """
+    length = len(word)
+    middle = length // 2
+    groups = [
+        # Missing last letter(s)
+        (word[:-1] if length > 2 else word + 'x',),
+        (word[:-2] if length > 3 else word[:-1],),
+        # Wrong common endings
+        (word[:-3] + 'ing' if length > 4 else word + 'ing',),
+        (word[:-2] + 'ed' if length > 3 else word + 'ed',),
+        (word + 's' if not word.endswith('s') else word[:-1],),
+        # Doubled letter in middle
+        (word[:middle] + word[middle] + word[middle:] if length > 3 else word + 'x',),
+        # Common misspellings
+        (word.replace('ei', 'ie') if 'ei' in word else word.replace('ie', 'ei'),),
+        # Extra vowel at the end
+        tuple(word + vowel for vowel in 'aeiou'),
+        # Wrong first letter from a neighbouring letter key of the same case
+        tuple(char + word[1:] for char in LAYOUT_INDEX[layout_name]['adjacent'].get(word[:1], ())
+              if char.isalpha() and char.isupper() == word[:1].isupper())
+        if length > 2 else (word + 'x',),
+    ]
+    
+    # Real-word confusions, keeping the capitalisation of the first letter
+    confused = CONFUSIONS.get(word.lower(), ())
+    if word[:1].isupper():
+        confused = tuple(alternative[:1].upper() + alternative[1:] for alternative in confused)
+    groups.append(confused)
+    
+    # Filter out variants that are the same as original and ensure minimum difference
+    valid_groups = []
+    for group in groups:
+        valid = tuple(dict.fromkeys(v for v in group if v != word and len(v) > 0 and abs(len(v) - length) <= 3))
+        if valid:
+            valid_groups.append(valid)
+    return tuple(valid_groups)
+
 
 class UI:
     """Modern UI styling configuration"""
@@ -254,13 +906,74 @@ class SplashScreen:
         fade_out_step()
 
 
+class DocumentLoader:
+    """Reads a text file a chunk at a time for incremental loading into the text area.
+    
+    Bytes are decoded incrementally as UTF-8 (invalid bytes replaced) and
+    line endings are normalized. Characters and lines are counted per
+    chunk, so counts are available without asking Tk to measure the text.
+    """
+    
+    def __init__(self, path, chunk_size=256 * 1024):
+        self.name = os.path.basename(path)
+        self.file = open(path, 'rb')
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.read_bytes = 0
+        self.pending_cr = False  # A chunk ended in \r, it may start a \r\n
+        self.chars = 0
+        self.lines = 1
+        self.done = False
+        
+    def read_chunk(self):
+        """The next chunk of text, '' once the file is exhausted"""
+        data = self.file.read(self.chunk_size)
+        self.read_bytes += len(data)
+        text = self.decoder.decode(data, final=not data)
+        if self.pending_cr:
+            text = '\r' + text
+        self.pending_cr = bool(data) and text.endswith('\r')
+        if self.pending_cr:
+            text = text[:-1]
+        if not data:
+            self.done = True
+            self.close()
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+        self.chars += len(text)
+        self.lines += text.count('\n')
+        return text
+        
+    def progress(self):
+        """Fraction of the file read"""
+        return self.read_bytes / self.size if self.size else 1.0
+        
+    def close(self):
+        self.file.close()
+
+
 class KeystrokeReplayer:
-    def __init__(self, root):
+    def __init__(self, root, speed_hotkeys=False, snippets=()):
         self.root = root
+        self.speed_hotkeys = speed_hotkeys  # F7/F8 change the replay speed
         self.is_closing = False
-        self.is_paused = False
-        self.resume_requested = False
-        self.current_replay_thread = None
+        self.executor = KeystrokeExecutor()
+        self.executor.on_progress = self.report_progress
+        self.plan_cache = PlanCache()
+        
+        # Replays run one at a time from a job queue fed by the GUI and the control API
+        self.jobs = {}
+        self.job_ids = itertools.count(1)
+        self.job_queue = queue.Queue()
+        self.job_worker = None
+        self.replay_lock = threading.Lock()  # Held by whichever job is replaying
+        self.engine = None  # ReplayEngine, started by the first replay
+        self.active_job = None
+        self.listeners = []  # Called with every published event dict
+        self.control_server = None
+        self.metrics_exporter = None
+        # Profile every replay into this directory (--profile or KEYSTROKE_PROFILE)
+        self.profile_dir = None
         self.setup_window()
         
         # Configure pyautogui settings
@@ -269,56 +982,290 @@ class KeystrokeReplayer:
         
         self.setup_modern_ui()
         self.setup_window_effects()
+        
+        # Snippets fired by global hotkeys, planned and warmed up front; snippets
+        # with the same backend settings share one backend (and X connection)
+        self.snippets = {}
+        backends = {}
+        for hotkey, text, settings in snippets:
+            try:
+                key = (settings.get('burst_mode'), settings.get('burst_method'), settings.get('paste_hotkey'))
+                if key not in backends:
+                    backends[key] = create_backend(settings, self.set_clipboard, self.get_clipboard)
+                self.snippets[hotkey] = ArmedSnippet(hotkey, text, settings, backends[key], self.plan_cache)
+            except Exception as e:
+                self.update_status(f"Could not arm snippet {hotkey}: {e}", UI.ERROR, "⚠")
+        self.hotkey_grab = None
         self.setup_global_hotkeys()
     def setup_global_hotkeys(self):
-        """Setup global hotkeys that work system-wide"""
+        """Setup global hotkeys that work system-wide.
+        
+        Our own injected keys must not cost a Python callback each, so on X11
+        only the hotkeys themselves are grabbed, and on Windows injected keys
+        are dropped by the hook filter before pynput processes them.
+        """
+        names = ['f9', 'f10'] + (['f7', 'f8'] if self.speed_hotkeys else []) + list(self.snippets)
+        if sys.platform.startswith('linux') and os.environ.get('DISPLAY'):
+            try:
+                self.hotkey_grab = X11HotkeyGrab(names, self.on_hotkey).start()
+                return
+            except Exception:
+                pass  # No python-xlib or the keys are grabbed elsewhere, try pynput
         try:
             from pynput import keyboard
             
+            def pynput_hotkey(name):
+                modifiers, key = parse_hotkey(name)
+                key = f'<{key}>' if len(key) > 1 else key
+                return keyboard.HotKey.parse('+'.join([f'<{modifier}>' for modifier in modifiers] + [key]))
+            
+            hotkeys = [keyboard.HotKey(pynput_hotkey(name), lambda name=name: self.on_hotkey(name))
+                       for name in names]
+            
             def on_press(key):
-                try:
-                    if key == keyboard.Key.f9:
-                        self.toggle_pause_resume()
-                except AttributeError:
-                    pass
+                key = self.listener.canonical(key)
+                for hotkey in hotkeys:
+                    hotkey.press(key)
+                    
+            def on_release(key):
+                key = self.listener.canonical(key)
+                for hotkey in hotkeys:
+                    hotkey.release(key)
+            
+            options = {}
+            if sys.platform == 'win32':
+                def win32_event_filter(msg, data):
+                    # LLKHF_INJECTED: sent with SendInput, by us or another program
+                    return not data.flags & 0x10
+                options['win32_event_filter'] = win32_event_filter
             
             # Start global listener in a separate thread
-            self.listener = keyboard.Listener(on_press=on_press)
+            self.listener = keyboard.Listener(on_press=on_press, on_release=on_release, **options)
             self.listener.daemon = True
             self.listener.start()
         except ImportError:
             # Fallback to window-focused hotkeys if pynput not available
-            self.setup_local_hotkeys()
+            self.setup_local_hotkeys(names)
             
-    def setup_local_hotkeys(self):
+    def setup_local_hotkeys(self, names=('f9', 'f10')):
         """Fallback local hotkeys (only work when window has focus)"""
-        self.root.bind('<F9>', self.toggle_pause_resume)
+        tk_modifiers = {'ctrl': 'Control', 'alt': 'Alt', 'shift': 'Shift', 'super': 'Mod4'}
+        for name in names:
+            modifiers, key = parse_hotkey(name)
+            key = key.upper() if len(key) > 1 else f'Key-{key}'
+            sequence = '<' + '-'.join([tk_modifiers[modifier] for modifier in modifiers] + [key]) + '>'
+            self.root.bind(sequence, lambda event, name=name: self.on_hotkey(name) or 'break')
         self.root.focus_set()
         
+    def on_hotkey(self, name):
+        """Handle a hotkey from whichever listener is active"""
+        if name == 'f9':
+            self.toggle_pause_resume()
+        elif name == 'f10':
+            if self.stop_replay():
+                self.update_status("Stopping replay...", UI.ERROR, "⏹")
+        elif name in ('f7', 'f8') and self.active_job is not None:
+            self.change_speed(0.8 if name == 'f7' else 1.25)
+        elif name in self.snippets:
+            self.fire_snippet(self.snippets[name])
+            
+    def fire_snippet(self, snippet):
+        """Replay an armed snippet right away, in whatever window has focus.
+        
+        The snippet skips the job queue and starts on its own thread, so the
+        hotkey listener returns at once; holding the replay lock keeps queued
+        jobs from starting until it is done.
+        """
+        if not self.job_queue.empty() or not self.replay_lock.acquire(blocking=False):
+            self.update_status(f"Snippet {snippet.hotkey} ignored, a replay is running", UI.WARNING, "⚠")
+            return
+        try:
+            plan = snippet.take()
+        except Exception as e:
+            self.replay_lock.release()
+            self.update_status(f"Snippet {snippet.hotkey} could not be planned: {e}; planning again", UI.ERROR, "⚠")
+            return
+        if plan is None:
+            self.replay_lock.release()
+            self.update_status(f"Snippet {snippet.hotkey} is still being planned", UI.WARNING, "⏱")
+            return
+        job = self.new_job(snippet.text, 0, 'snippet')
+        
+        def run():
+            try:
+                self.run_job(job, snippet.text, 0, snippet.settings, plan, None)
+            finally:
+                self.replay_lock.release()
+        threading.Thread(target=run, daemon=True).start()
+            
+    def change_speed(self, factor):
+        """Scale the running replay's keystroke delays"""
+        executor = self.executor
+        executor.speed = min(4.0, max(0.25, executor.speed * factor))
+        self.update_status(f"Speed ×{executor.speed:.2f} (F7 slower, F8 faster)", UI.ACCENT, "●")
+        self.publish('speed', job=self.active_job and self.active_job['id'], speed=round(executor.speed, 3))
+        
     def toggle_pause_resume(self, event=None):
         """Toggle pause/resume of the current replay"""
-        if self.current_replay_thread and self.current_replay_thread.is_alive():
-            if self.is_paused:
-                # Resume
-                self.is_paused = False
-                self.resume_requested = True
-                self.update_status("Resumed (F9 to pause)", UI.SUCCESS, "▶")
-                self.replay_button.config(text="⏸ Replaying...")
-            else:
-                # Pause
-                self.is_paused = True
-                self.update_status("Paused (F9 to resume)", UI.WARNING, "⏸")
-                self.replay_button.config(text="⏸ Paused - F9 to Resume")
+        if self.executor.is_paused:
+            self.resume_replay()
+        else:
+            self.pause_replay()
         
         return 'break'  # Prevent event from bubbling up
         
+    def pause_replay(self):
+        """Pause the running replay; False if nothing is running"""
+        if self.active_job is None or self.executor.is_paused:
+            return False
+        self.executor.pause()
+        if self.active_job.get('streams'):
+            self.engine.pause()
+        self.update_status("Paused (F9 to resume)", UI.WARNING, "⏸")
+        self.root.after(0, lambda: self.replay_button.config(text="⏸ Paused - F9 to Resume"))
+        self.publish('paused', job=self.active_job['id'])
+        return True
+        
+    def resume_replay(self):
+        """Resume a paused replay; False if nothing is paused"""
+        if self.active_job is None or not self.executor.is_paused:
+            return False
+        self.executor.resume()
+        if self.active_job.get('streams'):
+            self.engine.resume()
+        self.update_status("Resumed (F9 to pause)", UI.SUCCESS, "▶")
+        self.root.after(0, lambda: self.replay_button.config(text="⏸ Replaying..."))
+        self.publish('resumed', job=self.active_job['id'])
+        return True
+        
+    def stop_replay(self):
+        """Stop the running replay; False if nothing is running"""
+        if self.active_job is None:
+            return False
+        self.executor.stop()
+        if self.engine:
+            self.engine.stop()
+        return True
+        
+    def enable_metrics(self, port=None, textfile=None):
+        """Start exporting replay metrics on a local port and/or a textfile"""
+        metrics = ReplayMetrics()
+        self.metrics_exporter = MetricsExporter(metrics, port, textfile).start()
+        self.executor.metrics = metrics
+        self.listeners.append(metrics.on_event)
+        self.update_status(f"Metrics at {self.metrics_exporter.address}", UI.SUCCESS, "●")
+        
+    def create_profiler(self, settings):
+        """A started ReplayProfiler when profiling is on for this replay, else None"""
+        if not (settings.get('profile') or self.profile_dir):
+            return None
+        return ReplayProfiler(self.profile_dir).start()
+        
+    def publish(self, kind, **data):
+        """Send an event to every listener (control API streams, metrics)"""
+        event = {'type': kind, 'time': round(time.time(), 3)}
+        event.update(data)
+        for listener in list(self.listeners):
+            try:
+                listener(event)
+            except Exception:
+                pass
+                
+    def report_progress(self, keys_sent, elapsed):
+        """Executor progress callback, runs on the replay thread"""
+        if self.active_job is None:
+            return
+        flow = self.executor.flow
+        self.publish(
+            'progress',
+            job=self.active_job['id'],
+            keys_sent=keys_sent,
+            elapsed=round(elapsed, 3),
+            keys_per_second=round(keys_sent / elapsed, 1) if elapsed else 0.0,
+            rate=round(flow.rate, 3) if flow else 1.0,
+            paused=self.executor.is_paused
+        )
+        
+    def submit_job(self, text, delay, settings, source='gui', preflight=None, prepared=None, streams=None):
+        """Queue a replay job; jobs run one at a time in submission order.
+        
+        prepared is a PreparedPlan to run instead of planning the text.
+        streams is a list of (text, settings, display) to replay concurrently
+        on the ReplayEngine instead of text.
+        """
+        job = self.new_job(text, delay, source, preflight, streams)
+        self.job_queue.put((job, text, delay, settings, prepared, streams))
+        if self.job_worker is None:
+            self.job_worker = threading.Thread(target=self.process_jobs, daemon=True)
+            self.job_worker.start()
+        return job
+        
+    def new_job(self, text, delay, source, preflight=None, streams=None):
+        """Register and publish a job record in the queued state"""
+        job = {
+            'id': next(self.job_ids),
+            'state': 'queued',
+            'source': source,
+            'chars': len(text),
+            'delay': delay,
+            'submitted': round(time.time(), 3),
+            'preflight': preflight,
+            'error': None,
+        }
+        if streams:
+            job['streams'] = [{'chars': len(stream[0]), 'display': stream[2], 'keys_sent': 0} for stream in streams]
+        self.jobs[job['id']] = job
+        # Keep the job history bounded
+        while len(self.jobs) > 100:
+            del self.jobs[next(iter(self.jobs))]
+        self.publish('job', **job)
+        return job
+        
+    def process_jobs(self):
+        """Job worker thread"""
+        while True:
+            job, text, delay, settings, prepared, streams = self.job_queue.get()
+            with self.replay_lock:
+                self.run_job(job, text, delay, settings, prepared, streams)
+                
+    def run_job(self, job, text, delay, settings, prepared, streams):
+        """Replay one job, with the replay lock held, and publish its outcome"""
+        self.active_job = job
+        self.executor.reset()
+        job['state'] = 'running'
+        job['started'] = round(time.time(), 3)
+        self.publish('job', **job)
+        
+        # Update UI for replay state
+        self.root.after(0, lambda: self.replay_button.config(state='disabled', text="⏸ Replaying... (F9 to pause)"))
+        
+        if streams:
+            job['state'], job['error'] = self.replay_streams(streams, delay)
+            job['finished'] = round(time.time(), 3)
+            self.active_job = None
+            self.publish('job', **job)
+            return
+        
+        profiler = self.create_profiler(settings)
+        with profiler.thread('replay') if profiler else contextlib.nullcontext():
+            job['state'], job['error'] = self.replay_keystrokes_realistic(text, delay, settings, profiler, prepared)
+        if profiler:
+            try:
+                job['profile'] = profiler.dump(time.strftime('replay-%Y%m%d-%H%M%S') + f"-{job['id']}")
+                self.update_status(f"Profile saved to {job['profile']['folded']}", UI.ACCENT, "●")
+            except OSError as e:
+                self.update_status(f"Could not save profile: {e}", UI.ERROR, "⚠")
+        job['finished'] = round(time.time(), 3)
+        self.active_job = None
+        self.publish('job', **job)
+        
     def setup_window(self):
         """Configure the main window with modern styling"""
         self.root.title("Keystroke Replayer")
         
         # Set minimum size and make resizable - increased height for new settings
-        self.root.minsize(800, 750)  # Increased from 700x600 to accommodate settings
-        self.root.geometry("900x800")  # Increased from 800x700
+        self.root.minsize(800, 820)  # Increased from 800x750 to accommodate burst settings
+        self.root.geometry("900x900")  # Increased from 900x800
         
         # Modern window styling
         self.root.configure(bg=UI.BACKGROUND)
@@ -536,6 +1483,21 @@ class KeystrokeReplayer:
         
         text_container.rowconfigure(0, weight=1)
         
+        # Character and line counts, kept current while files load and after edits
+        self.count_label = tk.Label(
+            text_frame,
+            text="0 characters · 1 line",
+            font=UI.get_font(10),
+            bg=UI.BACKGROUND,
+            fg=UI.TEXT_SECONDARY
+        )
+        self.count_label.grid(row=2, column=0, sticky="e", pady=(4, 0))
+        
+        self.file_loader = None
+        self.load_job = None
+        self.count_job = None
+        self.text_area.bind('<<Modified>>', self.on_text_modified)
+        
     def create_settings_section(self):
         """Create comprehensive settings section with realistic typing options"""
         # Main settings container
@@ -615,7 +1577,7 @@ class KeystrokeReplayer:
         )
         speed_label.grid(row=0, column=2, sticky="w", padx=(0, 10))
         
-        self.speed_var = tk.StringVar(value="60")  # Default 60 WPM
+        self.speed_var = tk.StringVar(value=str(DEFAULT_SETTINGS['base_speed']))  # Default 60 WPM
         speed_spinbox = tk.Spinbox(
             basic_frame,
             from_=10, to=150, width=8,  # 10-150 WPM range
@@ -629,6 +1591,157 @@ class KeystrokeReplayer:
         )
         speed_spinbox.grid(row=0, column=3, sticky="w")
         
+        # Target editor profile
+        profile_label = tk.Label(
+            basic_frame,
+            text="Target editor:",
+            font=UI.get_font(11),
+            bg=UI.SURFACE,
+            fg=UI.TEXT_PRIMARY
+        )
+        profile_label.grid(row=1, column=0, sticky="w", padx=(0, 10), pady=(10, 0))
+        
+        self.profile_names = {options['label']: name for name, options in TARGET_PROFILES.items()}
+        self.profile_var = tk.StringVar(value=TARGET_PROFILES[DEFAULT_SETTINGS['target_profile']]['label'])
+        profile_menu = tk.OptionMenu(basic_frame, self.profile_var, *self.profile_names)
+        profile_menu.config(
+            font=UI.get_font(10),
+            bg=UI.SURFACE_VARIANT,
+            fg=UI.TEXT_PRIMARY,
+            activebackground=UI.PRIMARY,
+            activeforeground=UI.TEXT_PRIMARY,
+            highlightthickness=0,
+            relief='flat',
+            bd=1
+        )
+        profile_menu['menu'].config(bg=UI.SURFACE_VARIANT, fg=UI.TEXT_PRIMARY)
+        profile_menu.grid(row=1, column=1, sticky="w", padx=(0, 30), pady=(10, 0))
+        
+        # Keyboard layout used for realistic typos
+        layout_label = tk.Label(
+            basic_frame,
+            text="Keyboard layout:",
+            font=UI.get_font(11),
+            bg=UI.SURFACE,
+            fg=UI.TEXT_PRIMARY
+        )
+        layout_label.grid(row=1, column=2, sticky="w", padx=(0, 10), pady=(10, 0))
+        
+        self.layout_names = {layout['label']: name for name, layout in KEYBOARD_LAYOUTS.items()}
+        self.layout_var = tk.StringVar(value=KEYBOARD_LAYOUTS[DEFAULT_SETTINGS['keyboard_layout']]['label'])
+        layout_menu = tk.OptionMenu(basic_frame, self.layout_var, *self.layout_names)
+        layout_menu.config(
+            font=UI.get_font(10),
+            bg=UI.SURFACE_VARIANT,
+            fg=UI.TEXT_PRIMARY,
+            activebackground=UI.PRIMARY,
+            activeforeground=UI.TEXT_PRIMARY,
+            highlightthickness=0,
+            relief='flat',
+            bd=1
+        )
+        layout_menu['menu'].config(bg=UI.SURFACE_VARIANT, fg=UI.TEXT_PRIMARY)
+        layout_menu.grid(row=1, column=3, sticky="w", pady=(10, 0))
+        
+        # Back off automatically when the target drops or lags behind keys
+        self.flow_var = tk.BooleanVar(value=DEFAULT_SETTINGS['adaptive_flow'])
+        flow_check = tk.Checkbutton(
+            basic_frame,
+            text="Adaptive Speed (slow down when the target lags)",
+            variable=self.flow_var,
+            font=UI.get_font(11),
+            bg=UI.SURFACE,
+            fg=UI.TEXT_PRIMARY,
+            selectcolor=UI.SURFACE_VARIANT,
+            activebackground=UI.SURFACE,
+            activeforeground=UI.TEXT_PRIMARY
+        )
+        flow_check.grid(row=2, column=0, columnspan=4, sticky="w", pady=(10, 0))
+        
+        # Smart quotes, dashes and similar become plain ASCII before typing
+        self.normalize_var = tk.BooleanVar(value=DEFAULT_SETTINGS['normalize_text'])
+        normalize_check = tk.Checkbutton(
+            basic_frame,
+            text="Normalize smart quotes, dashes and special spaces",
+            variable=self.normalize_var,
+            font=UI.get_font(11),
+            bg=UI.SURFACE,
+            fg=UI.TEXT_PRIMARY,
+            selectcolor=UI.SURFACE_VARIANT,
+            activebackground=UI.SURFACE,
+            activeforeground=UI.TEXT_PRIMARY
+        )
+        normalize_check.grid(row=3, column=0, columnspan=4, sticky="w", pady=(5, 0))
+        
+        # A fixed seed makes replays reproducible and lets their plans be cached
+        seed_label = tk.Label(
+            basic_frame,
+            text="Seed (blank = random):",
+            font=UI.get_font(11),
+            bg=UI.SURFACE,
+            fg=UI.TEXT_PRIMARY
+        )
+        seed_label.grid(row=4, column=0, sticky="w", padx=(0, 10), pady=(10, 0))
+        
+        self.seed_var = tk.StringVar(value="")
+        seed_entry = tk.Entry(
+            basic_frame,
+            textvariable=self.seed_var,
+            width=12,
+            font=UI.get_font(11),
+            bg=UI.SURFACE_VARIANT,
+            fg=UI.TEXT_PRIMARY,
+            insertbackground=UI.PRIMARY,
+            relief='flat',
+            bd=1
+        )
+        seed_entry.grid(row=4, column=1, sticky="w", pady=(10, 0))
+        
+        # Sleep coarsely, then spin to each keystroke deadline
+        self.precise_var = tk.BooleanVar(value=DEFAULT_SETTINGS['precise_timing'])
+        precise_check = tk.Checkbutton(
+            basic_frame,
+            text="Precise timing (steadier rhythm at high speeds, uses more CPU)",
+            variable=self.precise_var,
+            font=UI.get_font(11),
+            bg=UI.SURFACE,
+            fg=UI.TEXT_PRIMARY,
+            selectcolor=UI.SURFACE_VARIANT,
+            activebackground=UI.SURFACE,
+            activeforeground=UI.TEXT_PRIMARY
+        )
+        precise_check.grid(row=5, column=0, columnspan=4, sticky="w", pady=(5, 0))
+        
+        # Keep keystroke timing away from Tk and listener threads
+        self.isolated_var = tk.BooleanVar(value=DEFAULT_SETTINGS['isolated_executor'])
+        isolated_check = tk.Checkbutton(
+            basic_frame,
+            text="Type from a separate process (less jitter from the UI)",
+            variable=self.isolated_var,
+            font=UI.get_font(11),
+            bg=UI.SURFACE,
+            fg=UI.TEXT_PRIMARY,
+            selectcolor=UI.SURFACE_VARIANT,
+            activebackground=UI.SURFACE,
+            activeforeground=UI.TEXT_PRIMARY
+        )
+        isolated_check.grid(row=6, column=0, columnspan=4, sticky="w", pady=(5, 0))
+        
+        # Special keys, chords and waits written inline in the text
+        self.markup_var = tk.BooleanVar(value=DEFAULT_SETTINGS['markup'])
+        markup_check = tk.Checkbutton(
+            basic_frame,
+            text="Markup: {enter}, {tab 3}, {ctrl+s}, {wait 500ms}, {{ for a brace",
+            variable=self.markup_var,
+            font=UI.get_font(11),
+            bg=UI.SURFACE,
+            fg=UI.TEXT_PRIMARY,
+            selectcolor=UI.SURFACE_VARIANT,
+            activebackground=UI.SURFACE,
+            activeforeground=UI.TEXT_PRIMARY
+        )
+        markup_check.grid(row=7, column=0, columnspan=4, sticky="w", pady=(5, 0))
+        
         # Realism section
         realism_frame = tk.LabelFrame(
             self.settings_content,
@@ -648,7 +1761,7 @@ class KeystrokeReplayer:
         typo_frame.columnconfigure(1, weight=1)
         
         # Random backspaces/typos
-        self.typos_var = tk.BooleanVar(value=False)
+        self.typos_var = tk.BooleanVar(value=DEFAULT_SETTINGS['use_typos'])
         typos_check = tk.Checkbutton(
             typo_frame,
             text="Random Typos & Corrections",
@@ -671,7 +1784,7 @@ class KeystrokeReplayer:
         )
         typo_chance_label.grid(row=0, column=1, sticky="w", padx=(0, 5))
         
-        self.typo_chance_var = tk.StringVar(value="5")
+        self.typo_chance_var = tk.StringVar(value=str(DEFAULT_SETTINGS['typo_chance']))
         typo_chance_spinbox = tk.Spinbox(
             typo_frame,
             from_=1, to=25, width=5,
@@ -690,7 +1803,7 @@ class KeystrokeReplayer:
         pause_frame.columnconfigure(1, weight=1)
         
         # Realistic pauses
-        self.pauses_var = tk.BooleanVar(value=True)
+        self.pauses_var = tk.BooleanVar(value=DEFAULT_SETTINGS['use_pauses'])
         pauses_check = tk.Checkbutton(
             pause_frame,
             text="Realistic Pauses",
@@ -713,7 +1826,7 @@ class KeystrokeReplayer:
         )
         pause_chance_label.grid(row=0, column=1, sticky="w", padx=(0, 5))
         
-        self.pause_chance_var = tk.StringVar(value="15")
+        self.pause_chance_var = tk.StringVar(value=str(DEFAULT_SETTINGS['pause_chance']))
         pause_chance_spinbox = tk.Spinbox(
             pause_frame,
             from_=5, to=50, width=5,
@@ -735,7 +1848,7 @@ class KeystrokeReplayer:
         )
         pause_duration_label.grid(row=0, column=3, sticky="w", padx=(0, 5))
         
-        self.pause_duration_var = tk.StringVar(value="2.0")
+        self.pause_duration_var = tk.StringVar(value=str(DEFAULT_SETTINGS['pause_duration']))
         pause_duration_spinbox = tk.Spinbox(
             pause_frame,
             from_=0.5, to=5.0, increment=0.1, width=5,
@@ -754,7 +1867,7 @@ class KeystrokeReplayer:
         variation_frame.columnconfigure(1, weight=1)
         
         # Speed variation
-        self.variation_var = tk.BooleanVar(value=True)
+        self.variation_var = tk.BooleanVar(value=DEFAULT_SETTINGS['use_variation'])
         variation_check = tk.Checkbutton(
             variation_frame,
             text="Speed Variation",
@@ -777,7 +1890,7 @@ class KeystrokeReplayer:
         )
         variation_label.grid(row=0, column=1, sticky="w", padx=(0, 5))
         
-        self.variation_amount_var = tk.StringVar(value="30")
+        self.variation_amount_var = tk.StringVar(value=str(DEFAULT_SETTINGS['variation_amount']))
         variation_spinbox = tk.Spinbox(
             variation_frame,
             from_=10, to=100, width=5,
@@ -796,7 +1909,7 @@ class KeystrokeReplayer:
         rewrite_frame.columnconfigure(1, weight=1)
         
         # Word rewriting
-        self.rewrite_var = tk.BooleanVar(value=False)
+        self.rewrite_var = tk.BooleanVar(value=DEFAULT_SETTINGS['use_rewrite'])
         rewrite_check = tk.Checkbutton(
             rewrite_frame,
             text="Word Rewriting",
@@ -819,7 +1932,7 @@ class KeystrokeReplayer:
         )
         rewrite_chance_label.grid(row=0, column=1, sticky="w", padx=(0, 5))
         
-        self.rewrite_chance_var = tk.StringVar(value="8")  # Higher default for more visible rewriting
+        self.rewrite_chance_var = tk.StringVar(value=str(DEFAULT_SETTINGS['rewrite_chance']))  # Higher default for more visible rewriting
         rewrite_chance_spinbox = tk.Spinbox(
             rewrite_frame,
             from_=1, to=15, width=5,
@@ -832,32 +1945,171 @@ class KeystrokeReplayer:
         )
         rewrite_chance_spinbox.grid(row=0, column=2, sticky="w")
         
-    def create_action_section(self):
-        """Create modern action buttons"""
-        action_frame = ModernFrame(self.main_container, bg_color=UI.BACKGROUND)
-        action_frame.grid(row=3, column=0, sticky="ew", pady=(0, 20))
-        
-        # Center the buttons
-        button_container = tk.Frame(action_frame, bg=UI.BACKGROUND)
-        button_container.pack(anchor='center')
+        # Faster corrections in editors that delete a word per chord
+        self.word_delete_var = tk.BooleanVar(value=DEFAULT_SETTINGS['word_delete_chords'])
+        word_delete_check = tk.Checkbutton(
+            rewrite_frame,
+            text=f"Delete rewritten words with {WORD_DELETE_MODIFIER.capitalize()}+Backspace (faster, editor profiles only)",
+            variable=self.word_delete_var,
+            font=UI.get_font(10),
+            bg=UI.SURFACE,
+            fg=UI.TEXT_SECONDARY,
+            selectcolor=UI.SURFACE_VARIANT,
+            activebackground=UI.SURFACE,
+            activeforeground=UI.TEXT_PRIMARY
+        )
+        word_delete_check.grid(row=1, column=0, columnspan=3, sticky="w", pady=(5, 0))
         
-        # Primary action button
-        self.replay_button = Button(
-            button_container,
-            text="▶ Start Replay",
-            button_type='primary',
-            width=15,
-            height=2,
-            command=self.start_replay
+        # Burst section
+        burst_frame = tk.LabelFrame(
+            self.settings_content,
+            text=" Burst Mode ",
+            font=UI.get_font(12, 'bold'),
+            bg=UI.SURFACE,
+            fg=UI.TEXT_PRIMARY,
+            relief='flat',
+            bd=1
         )
-        self.replay_button.pack(side=tk.LEFT, padx=(0, 15))
+        burst_frame.pack(fill='x', pady=(10, 0))
         
-        # Secondary action button
-        clear_button = Button(
-            button_container,
-            text="🗑 Clear Text",
-            button_type='secondary',
-            width=15,
+        burst_row = tk.Frame(burst_frame, bg=UI.SURFACE)
+        burst_row.pack(fill='x', padx=15, pady=10)
+        
+        # Bulk injection ignores all realism settings
+        self.burst_var = tk.BooleanVar(value=DEFAULT_SETTINGS['burst_mode'])
+        burst_check = tk.Checkbutton(
+            burst_row,
+            text="Burst (no realism)",
+            variable=self.burst_var,
+            font=UI.get_font(11),
+            bg=UI.SURFACE,
+            fg=UI.TEXT_PRIMARY,
+            selectcolor=UI.SURFACE_VARIANT,
+            activebackground=UI.SURFACE,
+            activeforeground=UI.TEXT_PRIMARY
+        )
+        burst_check.grid(row=0, column=0, sticky="w", padx=(0, 20))
+        
+        self.burst_method_names = {label: name for name, label in BURST_METHODS.items()}
+        self.burst_method_var = tk.StringVar(value=BURST_METHODS[DEFAULT_SETTINGS['burst_method']])
+        burst_method_menu = tk.OptionMenu(burst_row, self.burst_method_var, *self.burst_method_names)
+        burst_method_menu.config(
+            font=UI.get_font(10),
+            bg=UI.SURFACE_VARIANT,
+            fg=UI.TEXT_PRIMARY,
+            activebackground=UI.PRIMARY,
+            activeforeground=UI.TEXT_PRIMARY,
+            highlightthickness=0,
+            relief='flat',
+            bd=1
+        )
+        burst_method_menu['menu'].config(bg=UI.SURFACE_VARIANT, fg=UI.TEXT_PRIMARY)
+        burst_method_menu.grid(row=0, column=1, sticky="w", padx=(0, 15))
+        
+        burst_chunk_label = tk.Label(
+            burst_row,
+            text="Chunk (chars):",
+            font=UI.get_font(10),
+            bg=UI.SURFACE,
+            fg=UI.TEXT_SECONDARY
+        )
+        burst_chunk_label.grid(row=0, column=2, sticky="w", padx=(0, 5))
+        
+        self.burst_chunk_var = tk.StringVar(value=str(DEFAULT_SETTINGS['burst_chunk_size']))
+        burst_chunk_spinbox = tk.Spinbox(
+            burst_row,
+            from_=10, to=10000, increment=10, width=6,
+            textvariable=self.burst_chunk_var,
+            font=UI.get_font(10),
+            bg=UI.SURFACE_VARIANT,
+            fg=UI.TEXT_PRIMARY,
+            relief='flat',
+            bd=1
+        )
+        burst_chunk_spinbox.grid(row=0, column=3, sticky="w", padx=(0, 15))
+        
+        burst_delay_label = tk.Label(
+            burst_row,
+            text="Chunk Delay (ms):",
+            font=UI.get_font(10),
+            bg=UI.SURFACE,
+            fg=UI.TEXT_SECONDARY
+        )
+        burst_delay_label.grid(row=0, column=4, sticky="w", padx=(0, 5))
+        
+        self.burst_delay_var = tk.StringVar(value=str(DEFAULT_SETTINGS['burst_chunk_delay']))
+        burst_delay_spinbox = tk.Spinbox(
+            burst_row,
+            from_=0, to=2000, increment=5, width=5,
+            textvariable=self.burst_delay_var,
+            font=UI.get_font(10),
+            bg=UI.SURFACE_VARIANT,
+            fg=UI.TEXT_PRIMARY,
+            relief='flat',
+            bd=1
+        )
+        burst_delay_spinbox.grid(row=0, column=5, sticky="w")
+        
+        paste_label = tk.Label(
+            burst_row,
+            text="Paste Keys:",
+            font=UI.get_font(10),
+            bg=UI.SURFACE,
+            fg=UI.TEXT_SECONDARY
+        )
+        paste_label.grid(row=1, column=2, sticky="w", padx=(0, 5), pady=(8, 0))
+        
+        # Terminals usually want ctrl+shift+v
+        self.paste_hotkey_var = tk.StringVar(value=default_paste_hotkey())
+        paste_entry = tk.Entry(
+            burst_row,
+            textvariable=self.paste_hotkey_var,
+            width=14,
+            font=UI.get_font(10),
+            bg=UI.SURFACE_VARIANT,
+            fg=UI.TEXT_PRIMARY,
+            insertbackground=UI.PRIMARY,
+            relief='flat',
+            bd=1
+        )
+        paste_entry.grid(row=1, column=3, columnspan=3, sticky="w", pady=(8, 0))
+        
+    def create_action_section(self):
+        """Create modern action buttons"""
+        action_frame = ModernFrame(self.main_container, bg_color=UI.BACKGROUND)
+        action_frame.grid(row=3, column=0, sticky="ew", pady=(0, 20))
+        
+        # Center the buttons
+        button_container = tk.Frame(action_frame, bg=UI.BACKGROUND)
+        button_container.pack(anchor='center')
+        
+        # Primary action button
+        self.replay_button = Button(
+            button_container,
+            text="▶ Start Replay",
+            button_type='primary',
+            width=15,
+            height=2,
+            command=self.start_replay
+        )
+        self.replay_button.pack(side=tk.LEFT, padx=(0, 15))
+        
+        self.open_button = Button(
+            button_container,
+            text="📂 Open File",
+            button_type='secondary',
+            width=15,
+            height=2,
+            command=self.open_file
+        )
+        self.open_button.pack(side=tk.LEFT, padx=(0, 15))
+        
+        # Secondary action button
+        clear_button = Button(
+            button_container,
+            text="🗑 Clear Text",
+            button_type='secondary',
+            width=15,
             height=2,
             command=self.clear_text
         )
@@ -897,7 +2149,7 @@ class KeystrokeReplayer:
         
         instructions_text = (
             "Guide: Paste text → Configure settings → Start → Switch to target app\n"
-            "Safety: Move mouse to top-left to stop • F9 to pause/resume • Enable realism features"
+            "Safety: Move mouse to top-left or press F10 to stop • F9 to pause/resume • Enable realism features"
         )
         
         instructions_label = tk.Label(
@@ -912,9 +2164,84 @@ class KeystrokeReplayer:
         instructions_label.pack(padx=20, pady=15)
     def clear_text(self):
         """Clear the text area with visual feedback"""
+        self.cancel_file_load()
         self.text_area.delete(1.0, tk.END)
         self.update_status("Text cleared", UI.ACCENT, "●")
         
+    def open_file(self):
+        """Load a text file into the text area in chunks, keeping the window responsive"""
+        path = filedialog.askopenfilename(
+            title="Open Text File",
+            filetypes=[("Text files", "*.txt *.md *.py *.js *.html *.css *.json"), ("All files", "*")]
+        )
+        if not path:
+            return
+        self.cancel_file_load()
+        try:
+            self.file_loader = DocumentLoader(path)
+        except OSError as e:
+            messagebox.showerror("Open File", f"Could not open {path}:\n{e}")
+            return
+        self.text_area.delete(1.0, tk.END)
+        self.replay_button.config(state='disabled')
+        self.load_job = self.root.after(0, self.load_file_chunk)
+        
+    def load_file_chunk(self):
+        """Insert the next chunk of the file being loaded and reschedule"""
+        loader = self.file_loader
+        try:
+            chunk = loader.read_chunk()
+        except OSError as e:
+            self.cancel_file_load()
+            self.update_status(f"Could not read {loader.name}: {e}", UI.ERROR, "⚠")
+            return
+        if chunk:
+            self.text_area.insert('end-1c', chunk)
+        self.show_counts(loader.chars, loader.lines)
+        
+        if loader.done:
+            self.cancel_file_load()
+            self.text_area.mark_set('insert', '1.0')
+            self.text_area.see('1.0')
+            self.update_status(f"Loaded {loader.name}", UI.SUCCESS, "✓")
+            return
+        self.update_status(f"Loading {loader.name}... {loader.progress():.0%}", UI.ACCENT, "⏱")
+        # A short gap lets Tk handle input and redraw between chunks
+        self.load_job = self.root.after(1, self.load_file_chunk)
+        
+    def cancel_file_load(self):
+        """Stop a file load in progress, keeping what was inserted so far"""
+        if self.load_job is not None:
+            self.root.after_cancel(self.load_job)
+            self.load_job = None
+        if self.file_loader is not None:
+            self.file_loader.close()
+            self.file_loader = None
+            if self.active_job is None:
+                self.replay_button.config(state='normal')
+            
+    def on_text_modified(self, event=None):
+        """Recount characters and lines shortly after the user edits the text"""
+        self.text_area.edit_modified(False)
+        if self.file_loader is not None:
+            return  # The loader counts as it goes
+        if self.count_job is not None:
+            self.root.after_cancel(self.count_job)
+        self.count_job = self.root.after(300, self.recount_text)
+        
+    def recount_text(self):
+        """Count characters and lines of the text area"""
+        self.count_job = None
+        chars = self.text_area.count('1.0', 'end-1c', 'chars')
+        lines = int(self.text_area.index('end-1c').split('.')[0])
+        self.show_counts(chars[0] if chars else 0, lines)
+        
+    def show_counts(self, chars, lines):
+        """Show character and line counts under the text area"""
+        self.count_label.config(
+            text=f"{chars:,} character{'s' if chars != 1 else ''} · {lines:,} line{'s' if lines != 1 else ''}"
+        )
+        
     def update_status(self, message, color=None, icon="●"):
         """Update status with modern styling and icon"""
         if color is None:
@@ -922,10 +2249,15 @@ class KeystrokeReplayer:
             
         self.status_label.config(text=message, fg=color)
         self.status_icon.config(fg=color, text=icon)
+        self.publish('status', message=message)
         
     def start_replay(self):
         """Start the keystroke replay process with modern UI feedback"""
-        text_to_replay = self.text_area.get(1.0, tk.END).strip()
+        # Keep leading indentation, it matters for source code
+        if self.file_loader is not None:
+            messagebox.showwarning("Still Loading", "Wait for the file to finish loading!")
+            return
+        text_to_replay = self.text_area.get(1.0, 'end-1c').lstrip('\r\n').rstrip()
         
         if not text_to_replay:
             messagebox.showwarning("No Text", "Please enter some text to replay!")
@@ -937,6 +2269,13 @@ class KeystrokeReplayer:
         except ValueError:
             messagebox.showerror("Invalid Settings", "Please enter valid numbers for delay and speed!")
             return
+        
+        seed_text = self.seed_var.get().strip()
+        try:
+            seed = int(seed_text) if seed_text else None
+        except ValueError:
+            messagebox.showerror("Invalid Settings", "The seed must be a whole number or left blank!")
+            return
             
         # Get realism settings
         settings = {
@@ -949,51 +2288,284 @@ class KeystrokeReplayer:
             'use_variation': self.variation_var.get(),
             'variation_amount': int(self.variation_amount_var.get()),
             'use_rewrite': self.rewrite_var.get(),
-            'rewrite_chance': int(self.rewrite_chance_var.get())
+            'rewrite_chance': int(self.rewrite_chance_var.get()),
+            'word_delete_chords': self.word_delete_var.get(),
+            'target_profile': self.profile_names[self.profile_var.get()],
+            'keyboard_layout': self.layout_names[self.layout_var.get()],
+            'adaptive_flow': self.flow_var.get(),
+            'precise_timing': self.precise_var.get(),
+            'isolated_executor': self.isolated_var.get(),
+            'markup': self.markup_var.get(),
+            'burst_mode': self.burst_var.get(),
+            'burst_method': self.burst_method_names[self.burst_method_var.get()],
+            'burst_chunk_size': int(self.burst_chunk_var.get()),
+            'burst_chunk_delay': int(self.burst_delay_var.get()),
+            'paste_hotkey': self.paste_hotkey_var.get().strip() or default_paste_hotkey(),
+            'normalize_text': self.normalize_var.get(),
+            'seed': seed
         }
         
-        # Reset pause state
-        self.is_paused = False
-        self.resume_requested = False
-        
-        # Update UI for replay state
-        self.replay_button.config(state='disabled', text="⏸ Replaying... (F9 to pause)")
-        
-        # Start replay in a separate thread
-        self.current_replay_thread = threading.Thread(target=self.replay_keystrokes_realistic, args=(text_to_replay, delay, settings), daemon=True)
-        self.current_replay_thread.start()
-        
-    def replay_keystrokes_realistic(self, text, delay, settings):
-        """Replay keystrokes with realistic typing simulation"""
+        if settings['markup']:
+            try:
+                check_markup(text_to_replay)
+            except ValueError as e:
+                messagebox.showerror("Invalid Markup", str(e))
+                return
+        
+        # Check typeability up front rather than halfway through a long replay
+        report = preflight_text(text_to_replay, settings['normalize_text'])
+        if report.untypeable and not messagebox.askokcancel(
+                "Preflight", report.summary() + "\n\nThe clipboard will be overwritten. Continue?"):
+            return
+        text_to_replay = report.text
+        if report.normalized:
+            self.update_status(report.summary().splitlines()[0], UI.ACCENT, "●")
+        
+        # Replays run on the job worker thread
+        self.submit_job(text_to_replay, delay, settings, preflight=report.summary() or None)
+        
+    def replay_keystrokes_realistic(self, text, delay, settings, profiler=None, prepared=None):
+        """Replay keystrokes with realistic typing simulation; returns (state, error)"""
+        backend = None
+        plan = None
+        outcome = ('completed', None)
+        self.executor.profiler = profiler
         try:
+            if prepared:
+                # Armed snippet: planned already, backend warm, no countdown
+                backend = prepared.backend
+                plan = prepared
+                prepared.release_modifiers()
+            else:
+                backend = create_backend(settings, self.set_clipboard, self.get_clipboard)
+                # Plan in the background during the countdown so typing starts right after it
+                plan = ReplayPlan(text, settings, backend.types_keys, self.plan_cache, profiler)
+            
             # Countdown with modern styling
+            countdown_started = time.perf_counter()
             for i in range(delay, 0, -1):
+                if self.executor.stop_requested:
+                    raise ReplayStopped()
                 self.update_status(f"Starting replay in {i} seconds...", UI.WARNING, "⏱")
                 time.sleep(1)
+            if profiler:
+                profiler.add('countdown', time.perf_counter() - countdown_started)
             
             self.update_status("Replaying keystrokes with realistic simulation...", UI.ERROR, "▶")
             
-            # Reset pyautogui pause
-            pyautogui.PAUSE = 0.01
+            # Reset pyautogui pause; precise timing does all the sleeping itself
+            pyautogui.PAUSE = 0.0 if settings.get('precise_timing') else 0.01
             
             # Realistic typing simulation
-            self.simulate_realistic_typing(text, settings)
+            self.simulate_realistic_typing(text, settings, backend, plan)
             
-            self.update_status("Replay completed successfully!", UI.SUCCESS, "✓")
+            report = self.report_replay(len(text))
+            self.update_status(f"Replay completed: {report.summary()}", UI.SUCCESS, "✓")
             
+        except ReplayStopped:
+            outcome = ('stopped', None)
+            self.report_replay(len(text))
+            self.update_status("Replay stopped", UI.ERROR, "⏹")
         except pyautogui.FailSafeException:
+            outcome = ('stopped', "failsafe")
             self.update_status("Replay stopped by user (failsafe triggered)", UI.ERROR, "⏹")
         except Exception as e:
+            outcome = ('failed', str(e))
             self.update_status(f"Error during replay: {str(e)}", UI.ERROR, "⚠")
         finally:
+            if plan:
+                plan.close()
+            # Armed snippets keep their backend open for the next firing
+            if backend and not prepared:
+                backend.close()
+            self.executor.tally = None
+            self.executor.profiler = None
+            self.executor.timer = None
             # Re-enable the replay button with modern styling
             self.root.after(0, lambda: [
                 self.replay_button.config(state='normal', text="▶ Start Replay")
             ])
+        return outcome
             
-    def simulate_realistic_typing(self, text, settings):
+    def replay_streams(self, streams, delay):
+        """Replay several streams at once on the ReplayEngine; returns (state, error).
+        
+        Each stream has its own executor; F9, F10 and the control API pause,
+        resume and stop them all through the engine.
+        """
+        executor = self.executor
+        job = self.active_job
+        backends = []
+        outcome = ('completed', None)
+        try:
+            check_stream_displays([display for _, _, display in streams])
+            engine_streams = []
+            for index, (text, settings, display) in enumerate(streams):
+                if display:
+                    backend = XTestDisplayBackend(display, self.set_clipboard, settings.get('paste_hotkey'))
+                else:
+                    backend = create_backend(settings, self.set_clipboard, self.get_clipboard)
+                backends.append(backend)
+                planner = TypingPlanner(settings)
+                if settings.get('burst_mode'):
+                    events = planner.iter_burst_events(text, keystrokes=backend.types_keys)
+                else:
+                    events = planner.iter_events(text)
+                engine_streams.append(ReplayStream(display or f"stream-{index}", events, backend))
+                
+            for i in range(delay, 0, -1):
+                if executor.stop_requested:
+                    raise ReplayStopped()
+                self.update_status(f"Starting {len(streams)} streams in {i} seconds...", UI.WARNING, "⏱")
+                time.sleep(1)
+            self.update_status(f"Replaying {len(streams)} streams...", UI.ERROR, "▶")
+            
+            def on_progress(streams):
+                for stream, info in zip(streams, job['streams']):
+                    info['keys_sent'] = stream.keys_sent
+                self.publish('progress', job=job['id'], streams=job['streams'], paused=executor.is_paused)
+                
+            # A stop during the countdown; later ones reach the streams through the engine
+            if executor.stop_requested:
+                raise ReplayStopped()
+            results = self.run_streams(engine_streams, {}, on_progress=on_progress)
+            stopped = (ReplayStopped, asyncio.CancelledError)
+            errors = [f"{stream.name}: {result}" for stream, result in zip(engine_streams, results)
+                      if result is not None and not isinstance(result, stopped)]
+            if errors:
+                outcome = ('failed', "; ".join(errors))
+                self.update_status(f"Error during replay: {errors[0]}", UI.ERROR, "⚠")
+            elif any(isinstance(result, stopped) for result in results):
+                raise ReplayStopped()
+            else:
+                self.update_status(f"Replayed {len(streams)} streams", UI.SUCCESS, "✓")
+        except ReplayStopped:
+            outcome = ('stopped', None)
+            self.update_status("Replay stopped", UI.ERROR, "⏹")
+        except Exception as e:
+            outcome = ('failed', str(e))
+            self.update_status(f"Error during replay: {str(e)}", UI.ERROR, "⚠")
+        finally:
+            for backend in backends:
+                backend.close()
+            self.root.after(0, lambda: [
+                self.replay_button.config(state='normal', text="▶ Start Replay")
+            ])
+        return outcome
+        
+    def report_replay(self, chars):
+        """Summarize the executor tally of the last replay, save it as JSON and publish it"""
+        tally = self.executor.tally or ReplayTally()
+        report = tally.report(chars, self.executor.paused_seconds)
+        data = report.as_dict()
+        if self.executor.timer:
+            data['timer'] = self.executor.timer.stats()
+        job = self.active_job
+        if job:
+            job['report'] = data
+        
+        name = time.strftime('replay-%Y%m%d-%H%M%S') + (f"-{job['id']}" if job else '') + '.json'
+        try:
+            save_report(data, name)
+        except OSError:
+            pass
+        self.publish('report', job=job and job['id'], **data)
+        return report
+        
+    def simulate_realistic_typing(self, text, settings, backend=None, plan=None):
         """Simulate realistic human typing with typos, pauses, speed variation, and word rewriting"""
-        import random
+        backend = backend or create_backend(settings, self.set_clipboard, self.get_clipboard)
+        plan = plan or ReplayPlan(text, settings, backend.types_keys, self.plan_cache)
+        self.executor.backend = backend
+        self.executor.flow = FlowController() if settings.get('adaptive_flow') else None
+        
+        if settings.get('burst_mode'):
+            self.update_status(f"Bursting text via {backend.name}...", UI.ERROR, "▶")
+        
+        self.executor.tally = ReplayTally()
+        if settings.get('isolated_executor'):
+            process = ExecutorProcess(self.executor, settings, backend.name,
+                                      lambda problem: self.update_status(problem, UI.WARNING, "⚠"),
+                                      self.set_clipboard, self.get_clipboard)
+            process.run(plan)
+        else:
+            self.executor.timer = HybridTimer() if settings.get('precise_timing') else None
+            result, = self.run_streams([ReplayStream('replay', plan, executor=self.executor)], settings,
+                                       self.executor.profiler)
+            if isinstance(result, asyncio.CancelledError):
+                raise ReplayStopped()
+            if result is not None:
+                raise result
+        plan.complete()
+        
+    def run_streams(self, streams, settings, profiler=None, on_progress=None):
+        """Run ReplayStreams on the app's ReplayEngine and wait for their results"""
+        if self.engine is None:
+            self.engine = ReplayEngine().start()
+        engine = self.engine
+        engine.on_progress = on_progress
+        engine.on_problem = lambda problem: self.update_status(problem, UI.WARNING, "⚠")
+        finished = threading.Event()
+        future = engine.submit(streams, settings.get('cpu_affinity'), settings.get('nice'), profiler)
+        future.add_done_callback(lambda future: finished.set())
+        finished.wait()
+        return future.result()
+            
+    def set_clipboard(self, text):
+        """Replace the clipboard contents from the replay thread via the Tk main loop"""
+        done = threading.Event()
+        
+        def apply():
+            self.root.clipboard_clear()
+            self.root.clipboard_append(text)
+            self.root.update_idletasks()
+            done.set()
+        
+        self.root.after(0, apply)
+        if not done.wait(2.0):
+            raise RuntimeError("Timed out setting the clipboard")
+            
+    def get_clipboard(self):
+        """Clipboard text read from the replay thread via the Tk main loop; None without text"""
+        done = threading.Event()
+        contents = []
+        
+        def read():
+            try:
+                contents.append(self.root.clipboard_get())
+            except tk.TclError:
+                contents.append(None)
+            done.set()
+        
+        self.root.after(0, read)
+        if not done.wait(2.0):
+            raise RuntimeError("Timed out reading the clipboard")
+        return contents[0]
+
+# Token kinds sent as keys or pauses rather than typed text
+CONTROL_TOKENS = ('key', 'paste', 'chord', 'wait')
+
+
+class TypingPlanner:
+    """Plans realistic typing as a timeline of backend events.
+    
+    Events are (op, arg, delay) tuples. op is 'write' (text), 'press' (key name),
+    'keydown'/'keyup' (held key), 'burst' (chunk sent in bulk), 'paste' (text
+    no key can type) or 'pause' (arg 'typo' or 'rewrite' for the pause before a
+    correction, 'wait' for a markup wait, otherwise None), and delay is the
+    time to wait after each key of the event.
+    """
+    
+    def __init__(self, settings, rng=None):
+        self.settings = settings
+        self.rng = rng or random.Random(settings.get('seed'))
+        self.layout_name = settings.get('keyboard_layout', 'qwerty')
+        if self.layout_name not in LAYOUT_INDEX:
+            self.layout_name = 'qwerty'
+        self.layout = LAYOUT_INDEX[self.layout_name]
+        profile = TARGET_PROFILES.get(settings.get('target_profile', 'plain'), TARGET_PROFILES['plain'])
+        # Rewrites trade per-character backspaces for one word-delete chord
+        self.word_delete = settings.get('word_delete_chords', False) and profile['word_delete']
         
         # Convert WPM to more accurate interval calculation
         wpm = settings['base_speed']
@@ -1005,228 +2577,238 @@ class KeystrokeReplayer:
         base_interval = 1.0 / keystrokes_per_second if keystrokes_per_second > 0 else 0.01
         
         # Ensure minimum speed for very high WPM
-        base_interval = max(0.005, base_interval)  # Never faster than 5ms per keystroke
-        
-        words = text.split()
+        self.base_interval = max(0.005, base_interval)  # Never faster than 5ms per keystroke
+        
+    def plan(self, text):
+        """Plan the whole text at once"""
+        return list(self.iter_events(text))
+        
+    def iter_events(self, text):
+        """Lazily plan events for text, with shifted runs batched under one held shift.
+        
+        Each paragraph is planned with its own random state, seeded from one
+        draw of the planner's, so large texts can be planned on a process pool
+        and still give the same plan as a serial run.
+        """
+        paragraphs = split_paragraphs(self.tokenize(text))
+        seed = self.rng.getrandbits(64)
+        workers = planning_workers(self.settings, len(text))
+        if workers > 1:
+            events = plan_paragraphs_parallel(self.settings, seed, paragraphs, workers)
+        else:
+            events = itertools.chain.from_iterable(
+                TypingPlanner(self.settings, paragraph_rng(seed, index)).iter_token_events(tokens)
+                for index, tokens in enumerate(paragraphs)
+            )
+        return batch_modifiers(events)
+        
+    def tokenize(self, text):
+        """Tokens for text after the editor profile and untypeable routing"""
+        tokens = tokenize_markup(text) if self.settings.get('markup') else tokenize_text(text)
+        tokens = apply_target_profile(tokens, self.settings.get('target_profile', 'plain'))
+        return route_untypeable(tokens)
+        
+    def iter_burst_events(self, text, keystrokes=True):
+        """Plan a burst replay: plain chunks with a flow-control delay after each.
+        
+        When the backend types keystrokes the editor profile still applies, and
+        its backspaces and key presses are sent between chunks.
+        """
+        chunk_size = max(1, self.settings.get('burst_chunk_size', 200))
+        chunk_delay = self.settings.get('burst_chunk_delay', 20) / 1000.0
+        
+        if keystrokes:
+            tokens = self.tokenize(text)
+        elif self.settings.get('markup'):
+            # Pasted as written, only the markup is sent as keys
+            tokens = tokenize_markup(text)
+        else:
+            for start in range(0, len(text), chunk_size):
+                yield ('burst', text[start:start + chunk_size], chunk_delay)
+            return
         
-        for word_index, word in enumerate(words):
-            # Check for pause request
-            if self.is_paused:
-                self.wait_for_resume()
-            
-            # Add space before word (except first word)
-            if word_index > 0:
+        chunk = ''
+        for kind, value in tokens:
+            if kind == 'dedent':
+                if chunk:
+                    yield ('burst', chunk, chunk_delay)
+                    chunk = ''
+                for _ in range(value):
+                    yield ('press', 'backspace', 0)
+                continue
+            if kind in CONTROL_TOKENS:
+                if chunk:
+                    yield ('burst', chunk, chunk_delay)
+                    chunk = ''
+                yield from self.control_events(kind, value, 0)
+                continue
+            chunk += value
+            while len(chunk) >= chunk_size:
+                yield ('burst', chunk[:chunk_size], chunk_delay)
+                chunk = chunk[chunk_size:]
+        if chunk:
+            yield ('burst', chunk, chunk_delay)
+        
+    def iter_token_events(self, tokens):
+        """Yield the events for each token in order"""
+        settings = self.settings
+        base_interval = self.base_interval
+        # Whether the cursor follows whitespace or a line break, so a word-delete
+        # chord can't reach past the word; unknown at the start of the tokens
+        word_start = False
+        
+        for kind, value in tokens:
+            if kind == 'word':
+                yield from self.type_word(value, base_interval, word_start)
+            elif kind in ('space', 'newline'):
                 # Only add pauses if enabled and at a reasonable frequency
-                if settings['use_pauses'] and random.randint(1, 100) <= settings['pause_chance']:
-                    pause_duration = random.uniform(0.1, settings['pause_duration'])
-                    self.pausable_sleep(pause_duration)
-                
-                pyautogui.write(' ')
-                # Don't apply variable delay to spaces for speed
-                time.sleep(base_interval)
-            
-            # Calculate word-specific speed (longer words typed faster) but less extreme
-            word_speed_factor = self.calculate_word_speed_factor(word)
-            word_interval = base_interval * word_speed_factor
-            
-            # Word rewriting (remove excessive debugging)
-            if (settings['use_rewrite'] and 
-                len(word) > 2 and 
-                random.randint(1, 100) <= settings['rewrite_chance']):
-                self.rewrite_word(word, word_interval, settings)
-            # Should we introduce a typo in this word?
-            elif (settings['use_typos'] and 
-                  len(word) > 2 and 
-                  random.randint(1, 100) <= settings['typo_chance']):
-                self.type_word_with_typo(word, word_interval, settings)
-            else:
-                self.type_word_normally(word, word_interval, settings)
+                if settings['use_pauses'] and self.rng.randint(1, 100) <= settings['pause_chance']:
+                    yield ('pause', None, self.rng.uniform(0.1, settings['pause_duration']))
+                # Don't apply variable delay to whitespace for speed
+                yield ('write', value, base_interval)
+            elif kind == 'indent':
+                yield ('write', value, base_interval)
+            elif kind == 'dedent':
+                for _ in range(value):
+                    yield ('press', 'backspace', max(0.005, base_interval * 0.3))
+            elif kind in CONTROL_TOKENS:
+                yield from self.control_events(kind, value, base_interval)
+            word_start = kind in ('space', 'indent', 'dedent') or ends_line(kind, value)
                 
-    def calculate_word_speed_factor(self, word):
-        """Calculate speed factor based on word length - longer words typed faster but less extreme"""
-        word_length = len(word)
-        if word_length <= 3:
-            return 1.1  # Short words typed slightly slower (10% slower)
-        elif word_length <= 5:
-            return 1.0  # Medium words at base speed
-        elif word_length <= 8:
-            return 0.9  # Long words typed slightly faster (10% faster)
-        else:
-            return 0.8  # Very long words typed faster (20% faster)
+    def control_events(self, kind, value, delay):
+        """Events for a key, chord, paste or wait token"""
+        if kind == 'key':
+            yield ('press', value, delay)
+        elif kind == 'paste':
+            yield ('paste', value, delay)
+        elif kind == 'chord':
+            *modifiers, key = value
+            for modifier in modifiers:
+                yield ('keydown', modifier, 0)
+            yield ('press', key, 0)
+            for index, modifier in enumerate(reversed(modifiers)):
+                yield ('keyup', modifier, delay if index == len(modifiers) - 1 else 0)
+        elif kind == 'wait':
+            yield ('pause', 'wait', value)
                 
-    def wait_for_resume(self):
-        """Wait until resume is requested"""
-        while self.is_paused and not self.resume_requested:
-            time.sleep(0.1)
-        self.resume_requested = False
+    def type_word(self, word, base_interval, word_start=False):
+        """Plan a single word, possibly with a rewrite or typo.
         
-    def pausable_sleep(self, duration):
-        """Sleep that can be interrupted by pause requests"""
-        start_time = time.time()
-        while time.time() - start_time < duration:
-            if self.is_paused:
-                self.wait_for_resume()
-                start_time = time.time()  # Reset timer after resume
-            time.sleep(0.05)
+        word_start tells whether only whitespace or a line break precedes it.
+        """
+        settings = self.settings
+        
+        # Common words and long words are typed faster
+        word_interval = base_interval * self.calculate_word_speed_factor(word)
+        
+        # Word rewriting
+        if (settings['use_rewrite'] and 
+            len(word) > 2 and 
+            self.rng.randint(1, 100) <= settings['rewrite_chance']):
+            yield from self.rewrite_word(word, word_interval, word_start)
+        # Should we introduce a typo in this word?
+        elif (settings['use_typos'] and 
+              len(word) > 2 and 
+              self.rng.randint(1, 100) <= settings['typo_chance']):
+            yield from self.type_word_with_typo(word, word_interval)
+        else:
+            yield from self.type_word_normally(word, word_interval)
+            
+    def calculate_word_speed_factor(self, word):
+        """Speed factor of a word from its length and frequency, averaging 1 over typical text"""
+        return word_speed_factor(word) / WORD_SPEED_NORMALIZATION
             
-    def rewrite_word(self, word, base_interval, settings):
+    def rewrite_word(self, word, base_interval, word_start=False):
         """Type a word, then delete it and retype correctly (simulates changing mind)"""
-        import random
-        
         # Type a slightly wrong version of the word first
         wrong_word = self.create_wrong_word(word)
         
-        # Type the wrong word
         for char in wrong_word:
-            if self.is_paused:
-                self.wait_for_resume()
-            pyautogui.write(char)
-            self.variable_delay(base_interval, settings)
+            yield ('write', char, self.variable_delay(base_interval))
         
         # Pause to "think" about it (shorter for fast typing)
-        think_time = 0.3 if base_interval < 0.02 else random.uniform(0.5, 1.0)
-        self.pausable_sleep(think_time)
-        
-        # Delete the wrong word
-        for i in range(len(wrong_word)):
-            if self.is_paused:
-                self.wait_for_resume()
-            # Use faster backspace method
-            pyautogui.press('backspace')
-            time.sleep(max(0.005, base_interval * 0.3))  # Much faster deletion
+        think_time = 0.3 if base_interval < 0.02 else self.rng.uniform(0.5, 1.0)
+        yield ('pause', 'rewrite', think_time)
+        
+        # Delete the wrong word, much faster than typing. The chord deletes back to
+        # the previous word boundary, so it is only safe when the word starts one:
+        # split words (pasted characters, waits) would lose the part before them
+        if self.word_delete and word_start and wrong_word.isascii() and wrong_word.isalnum():
+            yield from self.control_events('chord', (WORD_DELETE_MODIFIER, 'backspace'), max(0.005, base_interval * 0.3))
+        else:
+            for _ in range(len(wrong_word)):
+                yield ('press', 'backspace', max(0.005, base_interval * 0.3))
         
         # Type the correct word
         for char in word:
-            if self.is_paused:
-                self.wait_for_resume()
-            pyautogui.write(char)
-            self.variable_delay(base_interval, settings)
+            yield ('write', char, self.variable_delay(base_interval))
             
     def create_wrong_word(self, correct_word):
         """Create a plausible wrong version of a word"""
-        import random
-        
-        # More obvious wrong variants for better visibility
-        wrong_variants = [
-            # Missing last letter(s)
-            correct_word[:-1] if len(correct_word) > 2 else correct_word + 'x',
-            correct_word[:-2] if len(correct_word) > 3 else correct_word[:-1],
-            # Wrong common endings
-            correct_word[:-3] + 'ing' if len(correct_word) > 4 else correct_word + 'ing',
-            correct_word[:-2] + 'ed' if len(correct_word) > 3 else correct_word + 'ed',
-            correct_word + 's' if not correct_word.endswith('s') else correct_word[:-1],
-            # Doubled letter in middle
-            correct_word[:len(correct_word)//2] + correct_word[len(correct_word)//2] + correct_word[len(correct_word)//2:] if len(correct_word) > 3 else correct_word + 'x',
-            # Common misspellings
-            correct_word.replace('ei', 'ie') if 'ei' in correct_word else correct_word.replace('ie', 'ei'),
-            # Random extra letter
-            correct_word + random.choice('aeiou'),
-            # Wrong first letter
-            random.choice('abcdefghijklmnopqrstuvwxyz') + correct_word[1:] if len(correct_word) > 2 else correct_word + 'x'
-        ]
-        
-        # Filter out variants that are the same as original and ensure minimum difference
-        valid_variants = [v for v in wrong_variants if v != correct_word and len(v) > 0 and abs(len(v) - len(correct_word)) <= 3]
-        
-        return random.choice(valid_variants) if valid_variants else correct_word + 'x'
-        
-    def type_word_with_typo(self, word, base_interval, settings):
-        """Type a word with a realistic typo and correction"""
-        import random
-        import string
+        groups = wrong_word_candidates(correct_word, self.layout_name)
+        if not groups:
+            return correct_word + 'x'
+        # Pick a kind of mistake first so large groups don't dominate
+        return self.rng.choice(self.rng.choice(groups))
         
+    def type_word_with_typo(self, word, base_interval):
+        """Type a word with a realistic typo and correction"""
         # Choose a position for the typo (not first or last character)
-        typo_position = random.randint(1, len(word) - 2)
+        typo_position = self.rng.randint(1, len(word) - 2)
         
         # Type characters up to typo position
         for i in range(typo_position):
-            if self.is_paused:
-                self.wait_for_resume()
-            pyautogui.write(word[i])
-            self.variable_delay(base_interval, settings)
+            yield ('write', word[i], self.variable_delay(base_interval))
         
         # Type a wrong character (adjacent key or random letter)
         wrong_char = self.get_wrong_character(word[typo_position])
-        pyautogui.write(wrong_char)
-        self.variable_delay(base_interval, settings)
+        yield ('write', wrong_char, self.variable_delay(base_interval))
         
         # Type a few more characters before realizing the mistake
         chars_after_typo = min(2, len(word) - typo_position - 1)
         for i in range(chars_after_typo):
-            if self.is_paused:
-                self.wait_for_resume()
-            pyautogui.write(word[typo_position + 1 + i])
-            self.variable_delay(base_interval, settings)
+            yield ('write', word[typo_position + 1 + i], self.variable_delay(base_interval))
         
         # Pause briefly (realization of mistake)
-        self.pausable_sleep(random.uniform(0.3, 0.8))
+        yield ('pause', 'typo', self.rng.uniform(0.3, 0.8))
         
         # Backspace to fix the typo
-        backspace_count = chars_after_typo + 1
-        for _ in range(backspace_count):
-            if self.is_paused:
-                self.wait_for_resume()
-            pyautogui.press('backspace')
-            self.variable_delay(base_interval * 0.7, settings)  # Faster backspacing
+        for _ in range(chars_after_typo + 1):
+            yield ('press', 'backspace', self.variable_delay(base_interval * 0.7))  # Faster backspacing
         
         # Type the correct characters
         for i in range(typo_position, len(word)):
-            if self.is_paused:
-                self.wait_for_resume()
-            pyautogui.write(word[i])
-            self.variable_delay(base_interval, settings)
+            yield ('write', word[i], self.variable_delay(base_interval))
     
-    def type_word_normally(self, word, base_interval, settings):
+    def type_word_normally(self, word, base_interval):
         """Type a word normally with natural speed variation"""
         # For very fast typing (high WPM), type the whole word at once
-        if base_interval < 0.01 and not settings['use_variation']:
-            pyautogui.write(word)
-            time.sleep(base_interval * len(word))
+        if base_interval < 0.01 and not self.settings['use_variation']:
+            yield ('write', word, base_interval)
         else:
             # Type character by character with delays
             for char in word:
-                if self.is_paused:
-                    self.wait_for_resume()
-                pyautogui.write(char)
-                self.variable_delay(base_interval, settings)
+                yield ('write', char, self.variable_delay(base_interval))
     
     def get_wrong_character(self, correct_char):
         """Get a realistic wrong character (adjacent key or similar)"""
-        import random
-        
-        # Keyboard layout for adjacent key errors
-        keyboard_adjacents = {
-            'q': 'wa', 'w': 'qeas', 'e': 'wrds', 'r': 'etdf', 't': 'ryfg',
-            'y': 'tugh', 'u': 'yihj', 'i': 'uojk', 'o': 'ipkl', 'p': 'ol',
-            'a': 'qwsz', 's': 'awedxz', 'd': 'serfcx', 'f': 'drtgvc',
-            'g': 'ftyhbv', 'h': 'gyujnb', 'j': 'hiumk', 'k': 'jiolm',
-            'l': 'kop', 'z': 'asx', 'x': 'zsdc', 'c': 'xdfv', 'v': 'cfgb',
-            'b': 'vghn', 'n': 'bhjm', 'm': 'njk'
-        }
-        
-        correct_lower = correct_char.lower()
+        rng = self.rng
+        adjacent_chars = self.layout['adjacent'].get(correct_char)
         
-        if correct_lower in keyboard_adjacents:
-            # 70% chance for adjacent key error
-            if random.random() < 0.7:
-                adjacent_chars = keyboard_adjacents[correct_lower]
-                wrong_char = random.choice(adjacent_chars)
-            else:
-                # 30% chance for random letter
-                wrong_char = random.choice('abcdefghijklmnopqrstuvwxyz')
-        else:
-            # For non-letters, just pick a random letter
-            wrong_char = random.choice('abcdefghijklmnopqrstuvwxyz')
+        # 70% chance for adjacent key error
+        if adjacent_chars and rng.random() < 0.7:
+            return rng.choice(adjacent_chars)
         
-        # Maintain case
+        # Otherwise a random letter, keeping case
+        wrong_char = rng.choice('abcdefghijklmnopqrstuvwxyz')
         if correct_char.isupper():
             wrong_char = wrong_char.upper()
         
         return wrong_char
     
-    def variable_delay(self, base_interval, settings):
-        """Apply variable delay based on settings"""
-        import random
+    def variable_delay(self, base_interval):
+        """Pick the delay after a keystroke based on settings"""
+        settings = self.settings
         
         if settings['use_variation'] and base_interval > 0.01:  # Only vary if not at minimum speed
             variation = settings['variation_amount'] / 100.0
@@ -1234,34 +2816,2790 @@ class KeystrokeReplayer:
             if base_interval < 0.02:  # For very fast typing
                 variation *= 0.5  # Reduce variation by half
             # Generate variation factor between (1 - variation) and (1 + variation)
-            factor = random.uniform(1 - variation, 1 + variation)
+            factor = self.rng.uniform(1 - variation, 1 + variation)
             actual_interval = base_interval * factor
         else:
             actual_interval = base_interval
         
         # Ensure minimum delay but allow very fast speeds
-        actual_interval = max(0.005, actual_interval)  # 5ms minimum instead of 10ms
-        time.sleep(actual_interval)
+        return max(0.005, actual_interval)  # 5ms minimum instead of 10ms
 
-def main():
-    """Main application entry point with splash screen"""
+
+# Texts shorter than this are planned in-process, a pool costs more than it saves
+PARALLEL_PLANNING_MIN_CHARS = 200_000
+
+
+# Paragraphs longer than this many tokens are cut at the next line break or space,
+# so a text without blank lines is still planned a bounded piece at a time
+PARAGRAPH_MAX_TOKENS = 1024
+
+
+def split_paragraphs(tokens, max_tokens=PARAGRAPH_MAX_TOKENS):
+    """Lazily group tokens into paragraphs, each ending with the blank line after it.
+    
+    Past max_tokens a paragraph also ends after the next newline or space.
+    The cuts depend only on the tokens, so pooled and serial plans match.
+    """
+    paragraph = []
+    previous = None
+    for token in tokens:
+        paragraph.append(token)
+        kind = token[0]
+        if ((kind == 'newline' and previous == 'newline') or
+                (len(paragraph) >= max_tokens and kind in ('newline', 'space'))):
+            yield paragraph
+            paragraph = []
+        previous = kind
+    if paragraph:
+        yield paragraph
+
+
+def paragraph_rng(seed, index):
+    """Random state for one paragraph, derived from the plan seed"""
+    return random.Random(f"{seed}:{index}")
+
+
+def planning_workers(settings, chars):
+    """Number of planner processes for a text of chars characters"""
+    workers = settings.get('planning_workers')
+    if workers is None:
+        if chars < PARALLEL_PLANNING_MIN_CHARS:
+            return 1
+        workers = min(8, os.cpu_count() or 1)
+    return max(1, int(workers))
+
+
+# Paragraphs planned per pool task
+PARALLEL_PLANNING_BATCH = 8
+
+
+def init_planning_worker(confusions):
+    """Planning pool initializer: adopt the parent's confusion table, including a loaded file"""
+    CONFUSIONS.clear()
+    CONFUSIONS.update(confusions)
+    wrong_word_candidates.cache_clear()
+
+
+def plan_paragraphs(job):
+    """Planning pool entry point: the events of a batch of consecutive paragraphs"""
+    settings, seed, start, batch = job
+    events = []
+    for index, tokens in enumerate(batch, start):
+        events.extend(TypingPlanner(settings, paragraph_rng(seed, index)).iter_token_events(tokens))
+    return events
+
+
+def plan_paragraphs_parallel(settings, seed, paragraphs, workers, window=None):
+    """Plan paragraphs on a process pool, yielding their events in order.
+    
+    At most window batches (twice the workers by default) are planned ahead of
+    the consumer, so a plan held back by the replay is never buffered whole.
+    The pool is closed once the last batch is queued, letting its processes
+    exit as they finish, and is torn down as soon as planning ends or stops.
+    """
+    window = window or workers * 2
+    pool = multiprocessing.get_context('spawn').Pool(
+        workers, initializer=init_planning_worker, initargs=(dict(CONFUSIONS),))
+    pending = collections.deque()  # AsyncResults of batches, in order
     try:
-        # Check if pyautogui is available
-        import pyautogui
-    except ImportError:
-        print("Error: pyautogui is not installed.")
-        print("Please install it using: pip install pyautogui")
-        return
+        paragraphs = iter(paragraphs)
+        start = 0
+        for batch in iter(lambda: list(itertools.islice(paragraphs, PARALLEL_PLANNING_BATCH)), []):
+            pending.append(pool.apply_async(plan_paragraphs, ((settings, seed, start, batch),)))
+            start += len(batch)
+            if len(pending) >= window:
+                yield from pending.popleft().get()
+        pool.close()
+        while pending:
+            yield from pending.popleft().get()
+    finally:
+        pool.terminate()
+
+
+def batch_modifiers(events, shifted_keys=SHIFTED_KEYS):
+    """Hold shift once over runs of shifted characters instead of once per character.
     
-    def launch_main_app():
-        """Launch the main application after splash"""
-        root = tk.Tk()
-        app = KeystrokeReplayer(root)
-        
-        # Set initial status
-        app.update_status("Ready to replay keystrokes", UI.SUCCESS, "●")
+    pyautogui presses and releases shift around every uppercase letter, so a
+    run of n of them costs 3n events. Runs of two or more are
+    rewritten to one keydown, n unshifted key presses and one keyup.
+    """
+    run = []  # (char, delay) of pending shifted characters
+    
+    def flush():
+        if len(run) == 1:
+            yield ('write', run[0][0], run[0][1])
+        elif run:
+            yield ('keydown', 'shift', 0)
+            for char, delay in run:
+                yield ('press', shifted_keys[char], delay)
+            yield ('keyup', 'shift', 0)
+        run.clear()
+    
+    for op, arg, delay in events:
+        if op != 'write':
+            yield from flush()
+            yield (op, arg, delay)
+            continue
+        plain = ''
+        for char in arg:
+            if char in shifted_keys:
+                if plain:
+                    yield from flush()
+                    yield ('write', plain, delay)
+                    plain = ''
+                run.append((char, delay))
+            else:
+                plain += char
+        if plain:
+            yield from flush()
+            yield ('write', plain, delay)
+    yield from flush()
+
+
+def coalesce_events(events, max_keys=32):
+    """Merge adjacent writes or presses with the same delay into one backend call.
+    
+    Merged writes carry the joined text, merged presses a tuple of key names; the
+    delay still applies after each key. Runs are capped at max_keys so pause
+    requests are still picked up promptly.
+    """
+    pending = None  # [op, keys, delay] being extended
+    for op, arg, delay in events:
+        if (pending and op == pending[0] and delay == pending[2] and
+                op in ('write', 'press') and len(pending[1]) < max_keys):
+            if op == 'write':
+                pending[1] += arg
+            else:
+                pending[1].append(arg)
+            continue
+        if pending:
+            yield coalesced_event(pending)
+            pending = None
+        if op == 'write':
+            pending = [op, arg, delay]
+        elif op == 'press':
+            pending = [op, [arg], delay]
+        else:
+            yield (op, arg, delay)
+    if pending:
+        yield coalesced_event(pending)
+
+
+def coalesced_event(pending):
+    """Build the event for a merged run"""
+    op, keys, delay = pending
+    if op == 'press':
+        keys = keys[0] if len(keys) == 1 else tuple(keys)
+    return (op, keys, delay)
+
+
+def split_events(events):
+    """Break multi-key writes and presses into one event per key.
+    
+    The planner's delay applies after each key, so every delay can then go
+    through the executor's timer rather than sleeping inside the backend.
+    """
+    for op, arg, delay in events:
+        if op == 'write' and len(arg) > 1:
+            for char in arg:
+                yield ('write', char, delay)
+        elif op == 'press' and isinstance(arg, tuple):
+            for key in arg:
+                yield ('press', key, delay)
+        else:
+            yield (op, arg, delay)
+
+
+# Bump whenever planning changes, so stale cached plans are never replayed
+PLAN_FORMAT_VERSION = 11
+
+# Settings that only affect execution, not the plan
+EXECUTION_ONLY_SETTINGS = {
+    'adaptive_flow', 'burst_method', 'paste_hotkey', 'normalize_text', 'profile',
+    'precise_timing', 'cpu_affinity', 'nice', 'isolated_executor', 'planning_workers',
+}
+
+PLAN_OPS = ('write', 'press', 'keydown', 'keyup', 'burst', 'paste', 'pause')
+PLAN_OP_CODES = {op: code for code, op in enumerate(PLAN_OPS)}
+PLAN_MAGIC = b'KRP'
+
+
+class PlanWriter:
+    """Streams events into the compact binary plan format.
+    
+    Each event is an op code byte, the delay as a double and its argument:
+    0 for none, 1 plus a length-prefixed UTF-8 string, or 2 plus a count and
+    that many strings. The stream is zlib-compressed as it is written, so
+    only the last buffer_size bytes are held in memory.
+    """
+    
+    pack_event = struct.Struct('<Bd').pack
+    pack_count = struct.Struct('<I').pack
+    
+    def __init__(self, output, buffer_size=64 * 1024):
+        self.output = output
+        self.buffer_size = buffer_size
+        self.compressor = zlib.compressobj(6)
+        self.buffer = bytearray(PLAN_MAGIC)
+        self.buffer.append(PLAN_FORMAT_VERSION)
+        
+    def write(self, event):
+        op, arg, delay = event
+        buffer = self.buffer
+        buffer += self.pack_event(PLAN_OP_CODES[op], delay)
+        if arg is None:
+            buffer.append(0)
+        elif isinstance(arg, str):
+            data = arg.encode('utf-8')
+            buffer.append(1)
+            buffer += self.pack_count(len(data))
+            buffer += data
+        else:
+            buffer.append(2)
+            buffer += self.pack_count(len(arg))
+            for item in arg:
+                data = item.encode('utf-8')
+                buffer += self.pack_count(len(data))
+                buffer += data
+        if len(buffer) >= self.buffer_size:
+            self.output.write(self.compressor.compress(bytes(buffer)))
+            buffer.clear()
+            
+    def finish(self):
+        """Flush the rest of the plan to output"""
+        self.output.write(self.compressor.compress(bytes(self.buffer)) + self.compressor.flush())
+        self.buffer.clear()
+
+
+def encode_plan(events):
+    """Pack events into the compressed plan format in memory"""
+    output = io.BytesIO()
+    writer = PlanWriter(output)
+    for event in events:
+        writer.write(event)
+    writer.finish()
+    return output.getvalue()
+
+
+def decode_plan(blob):
+    """Lazily unpack events written by encode_plan"""
+    return read_plan(io.BytesIO(blob))
+
+
+def read_plan(stream, chunk_size=64 * 1024):
+    """Lazily read events from a binary stream in the plan format.
+    
+    The header is checked right away and raises ValueError for other formats;
+    the rest is decompressed a chunk at a time as events are consumed.
+    """
+    decompressor = zlib.decompressobj()
+    data = b''
+    while len(data) < 4:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            data += decompressor.flush()
+            break
+        data += decompressor.decompress(chunk)
+    if data[:3] != PLAN_MAGIC or len(data) < 4 or data[3] != PLAN_FORMAT_VERSION:
+        raise ValueError("Unsupported plan format")
+    return iter_plan_stream(stream, decompressor, data[4:], chunk_size)
+
+
+def iter_plan_stream(stream, decompressor, data, chunk_size):
+    """Yield events from stream, with data the part already decompressed"""
+    offset = 0
+    finished = False
+    while True:
+        parsed = parse_plan_event(data, offset)
+        if parsed is not None:
+            event, offset = parsed
+            yield event
+            continue
+        if finished:
+            if offset < len(data):
+                raise ValueError("Truncated plan")
+            return
+        chunk = stream.read(chunk_size)
+        finished = not chunk
+        data = data[offset:] + (decompressor.decompress(chunk) if chunk else decompressor.flush())
+        offset = 0
+
+
+PLAN_EVENT = struct.Struct('<Bd')
+PLAN_COUNT = struct.Struct('<I')
+
+
+def parse_plan_event(data, offset):
+    """(event, next offset) for the event at offset, or None if data ends before it does"""
+    if len(data) < offset + 10:
+        return None
+    code, delay = PLAN_EVENT.unpack_from(data, offset)
+    kind = data[offset + 9]
+    offset += 10
+    
+    def read_string(offset):
+        if len(data) < offset + 4:
+            return None, offset
+        (size,) = PLAN_COUNT.unpack_from(data, offset)
+        offset += 4
+        if len(data) < offset + size:
+            return None, offset
+        return data[offset:offset + size].decode('utf-8'), offset + size
+    
+    if kind == 0:
+        arg = None
+    elif kind == 1:
+        arg, offset = read_string(offset)
+        if arg is None:
+            return None
+    else:
+        if len(data) < offset + 4:
+            return None
+        (count,) = PLAN_COUNT.unpack_from(data, offset)
+        offset += 4
+        items = []
+        for _ in range(count):
+            item, offset = read_string(offset)
+            if item is None:
+                return None
+            items.append(item)
+        arg = tuple(items)
+    return (PLAN_OPS[code], arg, delay), offset
+
+
+def default_cache_dir(name):
+    """Per-user cache directory for the app"""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Caches')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'keystroke-replayer', name)
+
+
+class PlanCache:
+    """Content-addressed on-disk cache of compiled keystroke plans.
+    
+    Plans are keyed by a hash of the text, the plan-relevant settings (seed and
+    keyboard layout included), the confusion table and the plan format version. When the cache
+    grows past max_bytes the least recently used plans are evicted.
+    """
+    
+    def __init__(self, directory=None, max_bytes=64 * 1024 * 1024):
+        self.directory = directory or default_cache_dir('plans')
+        self.max_bytes = max_bytes
+        
+    def key(self, text, settings, keystrokes=True):
+        """Cache key for planning text with settings"""
+        relevant = {name: value for name, value in settings.items() if name not in EXECUTION_ONLY_SETTINGS}
+        payload = json.dumps({
+            'version': PLAN_FORMAT_VERSION,
+            'settings': relevant,
+            'keystrokes': keystrokes,
+            # Custom confusions change what rewrites type
+            'confusions': CONFUSIONS,
+        }, sort_keys=True)
+        digest = hashlib.sha256(payload.encode('utf-8'))
+        digest.update(text.encode('utf-8'))
+        return digest.hexdigest()
+        
+    def path(self, key):
+        return os.path.join(self.directory, key + '.plan')
+        
+    def load(self, key):
+        """Iterator over the cached events for key, read incrementally, or None"""
+        path = self.path(key)
+        try:
+            plan_file = open(path, 'rb')
+        except OSError:
+            return None
+        try:
+            events = read_plan(plan_file)
+        except (OSError, ValueError, zlib.error):
+            plan_file.close()
+            return None
+        # Mark as recently used for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return close_after(events, plan_file)
+        
+    def writer(self, key):
+        """A PlanCacheWriter storing a plan for key as its events are produced"""
+        return PlanCacheWriter(self, key)
+        
+    def store(self, key, events):
+        """Write events for key, then evict old plans if over budget"""
+        writer = self.writer(key)
+        try:
+            for event in events:
+                writer.write(event)
+        except BaseException:
+            writer.discard()
+            raise
+        writer.commit()
+        
+    def evict(self):
+        """Remove least recently used plans until the cache fits max_bytes"""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.tmp'):
+                # Left behind by a process that died mid-plan
+                try:
+                    if time.time() - entry.stat().st_mtime > 24 * 3600:
+                        os.remove(entry.path)
+                except OSError:
+                    pass
+            elif entry.name.endswith('.plan'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+class PlanCacheWriter:
+    """Encodes a plan into a temporary file while it is planned.
+    
+    commit moves the finished plan into the cache; discard drops it, e.g.
+    when a replay stops before the whole plan was produced.
+    """
+    
+    def __init__(self, cache, key):
+        os.makedirs(cache.directory, exist_ok=True)
+        self.cache = cache
+        self.path = cache.path(key)
+        self.temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self.file = open(self.temp_path, 'wb')
+        self.plan_writer = PlanWriter(self.file)
+        
+    def write(self, event):
+        if self.file is not None:
+            self.plan_writer.write(event)
+            
+    def commit(self):
+        """Finish the plan and move it into the cache, evicting old plans if over budget"""
+        try:
+            self.plan_writer.finish()
+            self.file.close()
+            self.file = None
+            os.replace(self.temp_path, self.path)
+        except BaseException:
+            self.discard()
+            raise
+        self.cache.evict()
+        
+    def discard(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        try:
+            os.remove(self.temp_path)
+        except OSError:
+            pass
+
+
+def close_after(events, resource):
+    """Pass events through, closing resource once they end or the consumer stops"""
+    try:
+        yield from events
+    finally:
+        resource.close()
+
+
+def record_events(events, record):
+    """Pass events through while handing each one to record"""
+    for event in events:
+        record(event)
+        yield event
+
+
+class PlanPipeline:
+    """Runs planning in a background thread, handing events over in chunks.
+    
+    The bounded queue applies back-pressure, so at most max_chunks chunks are
+    planned ahead of the executor. The first chunks are small so typing can
+    start as soon as anything is planned; later ones grow to chunk_size.
+    """
+    
+    DONE = object()
+    
+    def __init__(self, events, chunk_size=256, max_chunks=32, profiler=None):
+        self.events = events
+        self.profiler = profiler
+        self.chunk_size = chunk_size
+        self.queue = queue.Queue(maxsize=max_chunks)
+        self.blocked = 0.0  # Seconds the planner spent waiting for queue room
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.produce, daemon=True)
+        
+    def start(self):
+        self.thread.start()
+        return self
+        
+    def produce(self):
+        """Planner thread: fill the queue until the plan ends or the run stops"""
+        if self.profiler:
+            with self.profiler.thread('planner'):
+                self.fill()
+        else:
+            self.fill()
+            
+    def fill(self):
+        started = time.perf_counter()
+        self.blocked = 0.0
+        try:
+            limit = 8
+            chunk = []
+            for event in self.events:
+                chunk.append(event)
+                if len(chunk) >= limit:
+                    if not self.put(chunk):
+                        return
+                    chunk = []
+                    limit = min(self.chunk_size, limit * 2)
+            if chunk:
+                self.put(chunk)
+        except Exception as error:
+            self.put(error)
+        finally:
+            # Ends planning work still running elsewhere, such as a process pool
+            if hasattr(self.events, 'close'):
+                self.events.close()
+            if self.profiler:
+                # Time blocked on a full queue is the executor's pace, not planning work
+                self.profiler.add('planning', time.perf_counter() - started - self.blocked)
+                self.profiler.add('planning_blocked', self.blocked)
+            self.put(self.DONE)
+            
+    def put(self, item):
+        """Queue item, waiting for room; False once the consumer has gone away"""
+        started = time.perf_counter()
+        try:
+            while not self.stopped.is_set():
+                try:
+                    self.queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            self.blocked += time.perf_counter() - started
+        
+    def __iter__(self):
+        profiler = self.profiler
+        while True:
+            if profiler:
+                # Time the executor spends starved, waiting for the planner
+                with profiler.phase('planning_wait'):
+                    item = self.queue.get()
+            else:
+                item = self.queue.get()
+            if item is self.DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield from item
+            
+    def close(self):
+        """Stop the planner thread, e.g. when a replay is aborted"""
+        self.stopped.set()
+
+
+class ReplayPlan:
+    """The events for one replay.
+    
+    Seeded plans come from the plan cache when possible, otherwise they are
+    planned fresh, encoded into the cache as they are produced and committed
+    once the replay completes. Either way events are produced by a background
+    pipeline that starts immediately, so it overlaps the countdown.
+    """
+    
+    def __init__(self, text, settings, keystrokes=True, cache=None, profiler=None):
+        self.cache = cache if settings.get('seed') is not None else None
+        self.key = self.cache.key(text, settings, keystrokes) if self.cache else None
+        self.recorder = None
+        
+        events = self.cache.load(self.key) if self.cache else None
+        self.cached = events is not None
+        if events is None:
+            planner = TypingPlanner(settings)
+            if settings.get('burst_mode'):
+                events = planner.iter_burst_events(text, keystrokes=keystrokes)
+            else:
+                events = planner.iter_events(text)
+            if self.cache:
+                try:
+                    self.recorder = self.cache.writer(self.key)
+                    events = record_events(events, self.recorder.write)
+                except OSError:
+                    pass
+        # Cached plans are decoded in the background too
+        self.pipeline = PlanPipeline(events, profiler=profiler).start()
+            
+    def __iter__(self):
+        return iter(self.pipeline)
+        
+    def complete(self):
+        """Store a freshly planned seeded plan once it has run to the end"""
+        if self.recorder is not None:
+            try:
+                self.recorder.commit()
+            except OSError:
+                pass
+            self.recorder = None
+            
+    def close(self):
+        self.pipeline.close()
+        if self.recorder is not None:
+            self.recorder.discard()
+            self.recorder = None
+
+
+class ReplayProfiler:
+    """Opt-in profiling of one replay across the replay and planner threads.
+    
+    Each thread runs under its own cProfile profiler, and a sampler thread
+    records the stacks of those threads every interval seconds. Phase wall
+    times accumulate per name; typing and corrections include the backend
+    calls made while typing them. dump writes a .pstats file, a .folded
+    file of collapsed stacks for flamegraph tools and a -phases.json file.
+    """
+    
+    def __init__(self, directory=None, interval=0.005):
+        self.directory = directory or default_cache_dir('profiles')
+        self.interval = interval
+        self.phases = {}
+        self.profiles = []
+        self.threads = {}  # Thread ident -> name, for the sampler
+        self.stacks = {}  # Collapsed stack -> samples
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.sampler = threading.Thread(target=self.sample, daemon=True)
+        
+    def start(self):
+        self.sampler.start()
+        return self
+        
+    def add(self, phase, seconds):
+        with self.lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+            
+    @contextlib.contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+            
+    @contextlib.contextmanager
+    def thread(self, name):
+        """Profile the calling thread for the duration of the block"""
+        ident = threading.get_ident()
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Only one cProfile can be active at a time on newer Pythons; the sampler still covers this thread
+            profile = None
+        self.threads[ident] = name
+        try:
+            yield
+        finally:
+            del self.threads[ident]
+            if profile:
+                profile.disable()
+                with self.lock:
+                    self.profiles.append(profile)
+                    
+    def sample(self):
+        """Sampler thread: count the collapsed stack of each profiled thread"""
+        while not self.stopped.wait(self.interval):
+            frames = sys._current_frames()
+            for ident, name in list(self.threads.items()):
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(name)
+                key = ';'.join(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+                
+    def dump(self, label):
+        """Stop sampling and write the profiles; returns the written paths"""
+        self.stopped.set()
+        if self.sampler.is_alive():
+            self.sampler.join()
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, label)
+        paths = {}
+        
+        if self.profiles:
+            stats = pstats.Stats(*self.profiles)
+            stats.dump_stats(base + '.pstats')
+            paths['pstats'] = base + '.pstats'
+        with open(base + '.folded', 'w', encoding='utf-8') as output:
+            for stack, count in sorted(self.stacks.items()):
+                output.write(f"{stack} {count}\n")
+        paths['folded'] = base + '.folded'
+        with open(base + '-phases.json', 'w', encoding='utf-8') as output:
+            json.dump({name: round(seconds, 6) for name, seconds in sorted(self.phases.items())}, output, indent=2)
+        paths['phases'] = base + '-phases.json'
+        return paths
+
+
+# Hotkeys the app itself uses, not available to snippets
+RESERVED_HOTKEYS = {'f7', 'f8', 'f9', 'f10'}
+
+# Hotkey modifier names and the keys released before an armed snippet types
+HOTKEY_MODIFIERS = {
+    'ctrl': 'ctrl',
+    'alt': 'alt',
+    'shift': 'shift',
+    'super': 'command' if sys.platform == 'darwin' else 'win',
+}
+
+
+def parse_hotkey(hotkey):
+    """Split 'ctrl+alt+1' into (modifiers, key), validating the modifier names"""
+    parts = [part.strip() for part in hotkey.lower().split('+')]
+    if not all(parts):
+        raise ValueError(f"invalid hotkey {hotkey!r}")
+    modifiers, key = parts[:-1], parts[-1]
+    for modifier in modifiers:
+        if modifier not in HOTKEY_MODIFIERS:
+            raise ValueError(f"unknown modifier {modifier!r} in hotkey {hotkey!r}")
+    return modifiers, key
+
+
+def load_snippets(path):
+    """Read armed snippet definitions from a JSON file.
+    
+    The file holds a list of {"hotkey", "text" or "path", "settings", "seed"}
+    objects; paths are relative to the file. Returns (hotkey, text, settings)
+    tuples with the text already through preflight.
+    """
+    with open(path, encoding='utf-8') as source:
+        entries = json.load(source)
+    if not isinstance(entries, list):
+        raise ValueError("snippets file must hold a list")
+    
+    snippets = []
+    seen = set()
+    for entry in entries:
+        modifiers, key = parse_hotkey(str(entry.get('hotkey', '')))
+        hotkey = '+'.join(modifiers + [key])
+        if hotkey in RESERVED_HOTKEYS or hotkey in seen:
+            raise ValueError(f"hotkey {hotkey!r} is reserved or used twice")
+        seen.add(hotkey)
+        if 'text' in entry:
+            text = str(entry['text'])
+        elif 'path' in entry:
+            with open(os.path.join(os.path.dirname(path), entry['path']), encoding='utf-8') as source:
+                text = source.read()
+        else:
+            raise ValueError(f"snippet {hotkey} needs text or path")
+        settings = merge_settings(entry.get('settings'), entry.get('seed'))
+        if settings['markup']:
+            check_markup(text)
+        text = preflight_text(text.replace('\r\n', '\n'), settings['normalize_text']).text
+        snippets.append((hotkey, text, settings))
+    return snippets
+
+
+class PreparedPlan:
+    """Ready-made events and a warm backend, standing in for a ReplayPlan"""
+    
+    cached = True
+    
+    def __init__(self, events, backend, modifiers=()):
+        self.events = events
+        self.backend = backend
+        self.modifiers = modifiers
+        
+    def __iter__(self):
+        return iter(self.events)
+        
+    def release_modifiers(self):
+        """Release the hotkey's modifiers, still held when the snippet fires"""
+        for modifier in self.modifiers:
+            self.backend.key_up(HOTKEY_MODIFIERS[modifier])
+            
+    def complete(self):
+        pass
+        
+    def close(self):
+        # The backend stays open for the next firing, the user's clipboard doesn't wait for it
+        self.backend.restore_clipboard()
+
+
+class ArmedSnippet:
+    """A replay bound to a global hotkey, planned ahead so it starts at once.
+    
+    The backend is set up when the snippet is armed and kept open; the app
+    shares it between snippets with the same backend settings. Planning goes
+    through ReplayPlan, so seeded snippets use the plan cache. A seeded
+    snippet reuses its single plan; an unseeded one plans its next firing in
+    the background right after each take, so every firing still varies. A
+    failed planning run is reported by the next take, which plans again.
+    """
+    
+    def __init__(self, hotkey, text, settings, backend, cache=None):
+        self.hotkey = hotkey
+        self.modifiers, _ = parse_hotkey(hotkey)
+        self.text = text
+        self.settings = settings
+        self.backend = backend
+        self.cache = cache
+        self.events = None
+        self.error = None  # Exception from the last planning run
+        self.lock = threading.Lock()
+        self.plan_next()
+        
+    def plan_next(self):
+        threading.Thread(target=self.plan, daemon=True).start()
+        
+    def plan(self):
+        try:
+            plan = ReplayPlan(self.text, self.settings, self.backend.types_keys, self.cache)
+            try:
+                events = list(plan)
+                plan.complete()
+            finally:
+                plan.close()
+        except Exception as error:
+            # The planner thread has no one to tell, take reports it
+            with self.lock:
+                self.error = error
+            return
+        with self.lock:
+            self.events = events
+            
+    def take(self):
+        """A PreparedPlan for this firing, or None while the plan isn't ready.
+        
+        Raises the exception of a failed planning run, after starting another.
+        """
+        with self.lock:
+            error = self.error
+            if error is not None:
+                self.error = None
+                self.plan_next()
+                raise error
+            events = self.events
+            if events is None:
+                return None
+            if self.settings.get('seed') is None:
+                self.events = None
+                self.plan_next()
+        return PreparedPlan(events, self.backend, self.modifiers)
+
+
+class PyAutoGUIBackend:
+    """Default backend, one pyautogui call per event"""
+    
+    name = 'pyautogui'
+    types_keys = True  # Bursts arrive as keystrokes, so editor profiles still apply
+    blocks_loop = True  # Calls may sleep (pyautogui.PAUSE, clipboard waits)
+    
+    def __init__(self, set_clipboard=None, paste_hotkey=None, get_clipboard=None):
+        self.set_clipboard = set_clipboard
+        self.get_clipboard = get_clipboard
+        self.paste_keys = (paste_hotkey or default_paste_hotkey()).split('+')
+        self.saved_clipboard = None  # The user's clipboard text, restored on close
+        self.clipboard_saved = False
+        
+    def write(self, text, interval=0.0):
+        pyautogui.write(text, interval=interval)
+        
+    def press(self, keys, interval=0.0):
+        pyautogui.press(keys, interval=interval)
+        
+    def key_down(self, key):
+        pyautogui.keyDown(key)
+        
+    def key_up(self, key):
+        pyautogui.keyUp(key)
+        
+    def burst(self, text):
+        """Type a whole chunk as fast as the backend allows"""
+        pyautogui.write(text, _pause=False)
+        
+    def paste(self, text):
+        """Insert text through the clipboard, for characters no key types"""
+        if self.set_clipboard is None:
+            self.set_clipboard, self.get_clipboard = pyperclip_clipboard()
+        self.save_clipboard()
+        self.set_clipboard(text)
+        pyautogui.hotkey(*self.paste_keys, _pause=False)
+        
+    def save_clipboard(self):
+        """Remember the user's clipboard text before the first paste"""
+        if self.clipboard_saved:
+            return
+        self.clipboard_saved = True
+        if self.get_clipboard:
+            try:
+                self.saved_clipboard = self.get_clipboard()
+            except Exception:
+                self.saved_clipboard = None  # Nothing we can put back
+                
+    def restore_clipboard(self):
+        """Put the user's clipboard text back after pasting"""
+        if self.saved_clipboard is None:
+            return
+        # Give the target time to read the last paste before it changes
+        time.sleep(0.1)
+        try:
+            self.set_clipboard(self.saved_clipboard)
+        except Exception:
+            pass
+        self.saved_clipboard = None
+        self.clipboard_saved = False
+        
+    def close(self):
+        self.restore_clipboard()
+
+
+def pyperclip_clipboard():
+    """Clipboard setter and getter for callers without a Tk root"""
+    try:
+        import pyperclip
+    except ImportError:
+        raise RuntimeError("Pasting text needs pyperclip (pip install pyperclip)")
+    return pyperclip.copy, pyperclip.paste
+
+
+class XTestBackend(PyAutoGUIBackend):
+    """Bulk key injection through the X11 XTEST extension.
+    
+    Bursts skip pyautogui's per-call overhead: every key of a chunk is queued
+    with fake_input and flushed to the server with a single sync.
+    """
+    
+    name = 'xtest'
+    
+    # Keysyms for characters whose keysym is not their Latin-1 code point
+    SPECIAL_KEYSYMS = {'\n': 0xff0d, '\t': 0xff09}
+    
+    def __init__(self, set_clipboard=None, paste_hotkey=None, display_name=None, get_clipboard=None):
+        from Xlib import X, XK, display
+        from Xlib.ext import xtest
+        
+        super().__init__(set_clipboard, paste_hotkey, get_clipboard)
+        self.X = X
+        self.XK = XK
+        self.fake_input = xtest.fake_input
+        self.display = display.Display(display_name)
+        self.shift_keycode = self.display.keysym_to_keycode(XK.XK_Shift_L)
+        self.keycodes = {}  # char -> (keycode, needs_shift) or None
+        
+    def keycode_for(self, char):
+        """Look up (and cache) the keycode and shift state that type char.
+        
+        None when char is not on the keymap or only on an AltGr level, which
+        takes more than shift to reach.
+        """
+        if char not in self.keycodes:
+            code_point = ord(char)
+            keysym = self.SPECIAL_KEYSYMS.get(char)
+            if keysym is None:
+                keysym = code_point if code_point < 0x100 else 0x01000000 | code_point
+            keycode = self.display.keysym_to_keycode(keysym)
+            entry = None
+            if keycode:
+                if self.display.keycode_to_keysym(keycode, 0) == keysym:
+                    entry = (keycode, False)
+                elif self.display.keycode_to_keysym(keycode, 1) == keysym:
+                    entry = (keycode, True)
+            self.keycodes[char] = entry
+        return self.keycodes[char]
+        
+    def burst(self, text):
+        X, display, fake_input = self.X, self.display, self.fake_input
+        shift_down = False
+        try:
+            for char in text:
+                entry = self.keycode_for(char)
+                if entry is None:
+                    # Not on the current keymap, let pyautogui try its own mapping, unshifted
+                    if shift_down:
+                        fake_input(display, X.KeyRelease, self.shift_keycode)
+                        shift_down = False
+                    display.sync()
+                    pyautogui.write(char, _pause=False)
+                    continue
+                keycode, needs_shift = entry
+                if needs_shift != shift_down:
+                    fake_input(display, X.KeyPress if needs_shift else X.KeyRelease, self.shift_keycode)
+                    shift_down = needs_shift
+                fake_input(display, X.KeyPress, keycode)
+                fake_input(display, X.KeyRelease, keycode)
+        finally:
+            if shift_down:
+                fake_input(display, X.KeyRelease, self.shift_keycode)
+            display.sync()
+            
+    def close(self):
+        super().close()
+        self.display.close()
+
+
+class XTestDisplayBackend(XTestBackend):
+    """Every event through XTEST on a given X display, pyautogui not involved.
+    
+    Used for replay streams aimed at displays other than the app's own.
+    Named keys use pyautogui's names; pasting is not supported, since the
+    clipboard helpers only reach the default display.
+    """
+    
+    name = 'xtest-display'
+    blocks_loop = False  # Every call is a few XTest requests and a sync
+    
+    KEY_NAMES = {
+        'enter': 'Return', 'return': 'Return', 'tab': 'Tab', 'space': 'space',
+        'backspace': 'BackSpace', 'delete': 'Delete', 'del': 'Delete', 'insert': 'Insert',
+        'esc': 'Escape', 'escape': 'Escape', 'up': 'Up', 'down': 'Down', 'left': 'Left',
+        'right': 'Right', 'home': 'Home', 'end': 'End', 'pageup': 'Prior', 'pagedown': 'Next',
+        'ctrl': 'Control_L', 'alt': 'Alt_L', 'shift': 'Shift_L', 'win': 'Super_L',
+        'command': 'Super_L', 'capslock': 'Caps_Lock',
+    }
+    
+    def __init__(self, display_name, set_clipboard=None, paste_hotkey=None):
+        super().__init__(set_clipboard, paste_hotkey, display_name)
+        
+    def keycode_for_key(self, key):
+        """Keycode of a pyautogui key name"""
+        name = self.KEY_NAMES.get(key) or (key.upper() if key[:1] == 'f' and key[1:].isdigit() else key)
+        keycode = self.display.keysym_to_keycode(self.XK.string_to_keysym(name))
+        if not keycode:
+            raise ValueError(f"No key for {key!r} on this display")
+        return keycode
+        
+    def tap(self, key):
+        if len(key) == 1:
+            # Characters go through the shift-aware burst path
+            self.burst(key)
+            return
+        keycode = self.keycode_for_key(key)
+        self.fake_input(self.display, self.X.KeyPress, keycode)
+        self.fake_input(self.display, self.X.KeyRelease, keycode)
+        self.display.sync()
+        
+    def write(self, text, interval=0.0):
+        for index, char in enumerate(text):
+            if index and interval:
+                time.sleep(interval)
+            self.burst(char)
+            
+    def press(self, keys, interval=0.0):
+        for index, key in enumerate([keys] if isinstance(keys, str) else keys):
+            if index and interval:
+                time.sleep(interval)
+            self.tap(key)
+            
+    def key_down(self, key):
+        self.fake_input(self.display, self.X.KeyPress, self.keycode_for_key(key))
+        self.display.sync()
+        
+    def key_up(self, key):
+        self.fake_input(self.display, self.X.KeyRelease, self.keycode_for_key(key))
+        self.display.sync()
+        
+    def paste(self, text):
+        raise RuntimeError("Untypeable characters can't be pasted on another display")
+
+
+class ClipboardBackend(PyAutoGUIBackend):
+    """Bursts by putting each chunk on the clipboard and pasting it"""
+    
+    name = 'clipboard'
+    types_keys = False
+    
+    def __init__(self, set_clipboard=None, paste_hotkey=None, get_clipboard=None):
+        if set_clipboard is None:
+            set_clipboard, get_clipboard = pyperclip_clipboard()
+        super().__init__(set_clipboard, paste_hotkey, get_clipboard)
+        
+    def burst(self, text):
+        self.paste(text)
+
+
+def default_paste_hotkey():
+    """Paste shortcut for the host platform"""
+    return 'command+v' if sys.platform == 'darwin' else 'ctrl+v'
+
+
+BURST_METHODS = {
+    'auto': "Fastest available",
+    'xtest': "XTest injection",
+    'clipboard': "Clipboard paste",
+    'pyautogui': "pyautogui",
+}
+
+
+def create_backend(settings, set_clipboard=None, get_clipboard=None):
+    """Pick the backend for a replay; only burst replays use the bulk paths"""
+    paste_hotkey = settings.get('paste_hotkey')
+    if not settings.get('burst_mode'):
+        return PyAutoGUIBackend(set_clipboard, paste_hotkey, get_clipboard)
+    
+    method = settings.get('burst_method', 'auto')
+    if method in ('auto', 'xtest') and sys.platform.startswith('linux'):
+        try:
+            return XTestBackend(set_clipboard, paste_hotkey, get_clipboard=get_clipboard)
+        except Exception:
+            if method == 'xtest':
+                raise
+    if method in ('auto', 'clipboard'):
+        try:
+            return ClipboardBackend(set_clipboard, paste_hotkey, get_clipboard)
+        except RuntimeError:
+            if method == 'clipboard':
+                raise
+    return PyAutoGUIBackend(set_clipboard, paste_hotkey, get_clipboard)
+
+
+class FlowController:
+    """AIMD rate control for targets that lag or drop keys.
+    
+    Every planned delay is divided by rate. A backend call that takes clearly
+    longer per key than the fastest one seen, a growing read-back backlog or a
+    read-back mismatch cuts the rate multiplicatively; each window of healthy
+    calls raises it additively up to max_rate.
+    
+    readback, when given, returns the text the target has received so far
+    (e.g. from a local stand-in window) and is polled every readback_every keys.
+    Without it backend latency says little about the target, so the rate only
+    ever slows down from the planned speed: max_rate defaults to 2.0 with
+    read-back and 1.0 without.
+    """
+    
+    # Never shorten a delay below the planner's own minimum
+    MIN_DELAY = 0.005
+    
+    def __init__(self, max_rate=None, min_rate=0.1, increase=0.05, decrease=0.5,
+                 latency_slack=0.015, window=20, readback=None, readback_every=25,
+                 backlog_limit=50):
+        self.rate = 1.0
+        if max_rate is None:
+            max_rate = 2.0 if readback else 1.0
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_slack = latency_slack
+        self.window = window
+        self.readback = readback
+        self.readback_every = readback_every
+        self.backlog_limit = backlog_limit
+        
+        self.baseline = None  # Fastest per-key backend latency seen
+        self.healthy = 0
+        self.keys_since_readback = 0
+        self.dropped = 0  # Read-back mismatches detected
+        self.sync_point = (0, 0)  # (expected, received) lengths after the last mismatch
+        
+    def scale(self, delay):
+        """Delay to use at the current rate"""
+        return max(min(delay, self.MIN_DELAY), delay / self.rate)
+        
+    def observe(self, latency, keys):
+        """Record the latency of a backend call that sent keys"""
+        per_key = max(0.0, latency) / keys
+        if self.baseline is None or per_key < self.baseline:
+            self.baseline = per_key
+        if per_key > self.baseline + self.latency_slack:
+            self.back_off()
+        else:
+            self.healthy += 1
+            if self.healthy >= self.window:
+                self.speed_up()
+                
+    def check_readback(self, expected, keys):
+        """Compare the target's text with what should have arrived by now"""
+        self.keys_since_readback += keys
+        if self.keys_since_readback < self.readback_every:
+            return
+        self.keys_since_readback = 0
+        
+        received = self.readback()
+        expected_start, received_start = self.sync_point
+        expected_tail = ''.join(expected[expected_start:])
+        received_tail = received[received_start:]
+        if not expected_tail.startswith(received_tail):
+            # Keys were lost or mangled; only compare newer text from here on
+            self.dropped += 1
+            self.sync_point = (len(expected), len(received))
+            self.back_off()
+        elif len(expected_tail) - len(received_tail) > self.backlog_limit:
+            self.back_off()
+            
+    def back_off(self):
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        self.healthy = 0
+        
+    def speed_up(self):
+        self.rate = min(self.max_rate, self.rate + self.increase)
+        self.healthy = 0
+
+
+class ReplayReport:
+    """End-of-run statistics for a replay, built by ReplayTally.
+    
+    Effective WPM uses the planner's convention of six keystrokes per word so
+    it is directly comparable with the speed setting. A stall is time an event
+    took beyond its planned delay; the worst ones are kept with their offset
+    from the start of the run.
+    """
+    
+    def __init__(self, chars, keystrokes, events, seconds, typing_seconds, pause_seconds,
+                 paused_seconds, typos, rewrites, stalls):
+        self.chars = chars
+        self.keystrokes = keystrokes
+        self.events = events
+        self.seconds = seconds
+        self.typing_seconds = typing_seconds
+        self.pause_seconds = pause_seconds
+        self.paused_seconds = paused_seconds
+        self.typos = typos
+        self.rewrites = rewrites
+        self.stalls = stalls  # [(offset, stall, op)], worst first
+        
+    @property
+    def effective_wpm(self):
+        return self.chars / 6 / (self.seconds / 60) if self.seconds else 0.0
+        
+    @property
+    def keystroke_overhead(self):
+        """Keystrokes sent per character of text"""
+        return self.keystrokes / self.chars if self.chars else 0.0
+        
+    def as_dict(self):
+        return {
+            'effective_wpm': round(self.effective_wpm, 1),
+            'chars': self.chars,
+            'keystrokes': self.keystrokes,
+            'keystroke_overhead': round(self.keystroke_overhead, 3),
+            'events': self.events,
+            'typos': self.typos,
+            'rewrites': self.rewrites,
+            'seconds': round(self.seconds, 3),
+            'typing_seconds': round(self.typing_seconds, 3),
+            'pause_seconds': round(self.pause_seconds, 3),
+            'user_paused_seconds': round(self.paused_seconds, 3),
+            'worst_stalls': [
+                {'at_seconds': round(offset, 3), 'stall_ms': round(stall * 1000, 1), 'op': op}
+                for offset, stall, op in self.stalls
+            ],
+        }
+        
+    def summary(self):
+        """One line for the status bar"""
+        worst = f", worst stall {self.stalls[0][1] * 1000:.0f} ms" if self.stalls else ""
+        return (f"{self.effective_wpm:.0f} WPM, {self.keystrokes} keys for {self.chars} chars "
+                f"(×{self.keystroke_overhead:.2f}), {self.typos} typos, {self.rewrites} rewrites, "
+                f"{self.pause_seconds:.1f}s pausing vs {self.typing_seconds:.1f}s typing{worst}")
+
+
+# Saved run reports kept in the reports directory, newest first
+MAX_SAVED_REPORTS = 200
+
+
+def save_report(data, name, directory=None, keep=MAX_SAVED_REPORTS):
+    """Write a report as JSON and delete all but the newest keep reports"""
+    directory = directory or default_cache_dir('reports')
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, name), 'w', encoding='utf-8') as output:
+        json.dump(data, output, indent=2)
+    
+    reports = []
+    for entry in os.scandir(directory):
+        if entry.name.startswith('replay-') and entry.name.endswith('.json'):
+            try:
+                reports.append((entry.stat().st_mtime, entry.name, entry.path))
+            except OSError:
+                pass
+    for _, _, path in sorted(reports, reverse=True)[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class ReplayTally:
+    """Running totals for a ReplayReport, fed one event at a time by the executor.
+    
+    Keeps only counters and a small heap of the worst stalls, so the cost per
+    event and the memory used stay constant however long the replay runs.
+    """
+    
+    def __init__(self, worst=5):
+        self.worst = worst
+        self.events = self.keystrokes = self.typos = self.rewrites = 0
+        self.typing_seconds = self.pause_seconds = 0.0
+        self.first = self.last = None
+        self.stalls = []  # Min-heap of (stall, offset, op)
+        
+    def record(self, op, keys, reason, started, ended, planned):
+        """Count one event: reason is the pause argument, started/ended are
+        perf_counter times and planned is the delay the plan asked for"""
+        if self.first is None:
+            self.first = started
+        self.last = ended
+        self.events += 1
+        elapsed = ended - started
+        if op == 'pause':
+            self.pause_seconds += elapsed
+            if reason == 'typo':
+                self.typos += 1
+            elif reason == 'rewrite':
+                self.rewrites += 1
+            return
+        self.keystrokes += keys
+        self.typing_seconds += elapsed
+        stall = elapsed - planned
+        if len(self.stalls) < self.worst:
+            heapq.heappush(self.stalls, (stall, started - self.first, op))
+        elif stall > self.stalls[0][0]:
+            heapq.heapreplace(self.stalls, (stall, started - self.first, op))
+            
+    def report(self, chars, paused_seconds=0.0):
+        stalls = [(offset, stall, op) for stall, offset, op in sorted(self.stalls, reverse=True)
+                  if stall > 0]
+        # User pauses fall between events, so they are excluded from the active time
+        span = self.last - self.first if self.first is not None else 0.0
+        seconds = max(0.0, span - paused_seconds)
+        return ReplayReport(chars, self.keystrokes, self.events, seconds, self.typing_seconds,
+                            self.pause_seconds, paused_seconds, self.typos, self.rewrites, stalls)
+
+
+class X11HotkeyGrab:
+    """Global hotkeys through XGrabKey on the root window.
+    
+    Only the grabbed keys are delivered, so unlike a keyboard listener this
+    costs nothing per key typed, injected keys included. Hotkeys fire when
+    their key is released, once the grab is over. Hotkeys are names
+    like 'f9' or 'ctrl+alt+1'; each is grabbed with every combination of the
+    Num Lock and Caps Lock modifiers.
+    """
+    
+    def __init__(self, names, callback):
+        from Xlib import X, XK, display, error
+        
+        self.X = X
+        self.callback = callback
+        self.display = display.Display()
+        root = self.display.screen().root
+        catch = error.CatchError(error.BadAccess)
+        masks = {'ctrl': X.ControlMask, 'alt': X.Mod1Mask, 'shift': X.ShiftMask, 'super': X.Mod4Mask}
+        self.mask = X.ControlMask | X.Mod1Mask | X.ShiftMask | X.Mod4Mask
+        self.keys = {}  # (keycode, modifier mask) -> name
+        for name in names:
+            modifiers, key = parse_hotkey(name)
+            keysym = XK.string_to_keysym(key) or XK.string_to_keysym(key.upper())
+            keycode = self.display.keysym_to_keycode(keysym)
+            if not keycode:
+                raise RuntimeError(f"No keycode for {name}")
+            mask = 0
+            for modifier in modifiers:
+                mask |= masks[modifier]
+            self.keys[keycode, mask] = name
+            for locks in (0, X.Mod2Mask, X.LockMask, X.Mod2Mask | X.LockMask):
+                root.grab_key(keycode, mask | locks, True, X.GrabModeAsync, X.GrabModeAsync, onerror=catch)
+        self.display.sync()
+        if catch.get_error():
+            self.display.close()
+            raise RuntimeError("Hotkeys are already grabbed by another program")
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        
+    def start(self):
+        self.thread.start()
+        return self
+        
+    def run(self):
+        """Call back when a grabbed hotkey is released.
+        
+        A passive grab keeps the keyboard grabbed by this client from the
+        hotkey's KeyPress until its release, so keys injected before then
+        would reach us rather than the focused window. Auto-repeat sends a
+        release and press with the same timestamp; those are skipped.
+        """
+        X = self.X
+        pressed = {}  # Keycode -> hotkey name, held down
+        lookahead = None
+        while True:
+            event, lookahead = lookahead or self.display.next_event(), None
+            if event.type == X.KeyPress:
+                name = self.keys.get((event.detail, event.state & self.mask))
+                if name:
+                    pressed[event.detail] = name
+                continue
+            if event.type != X.KeyRelease or event.detail not in pressed:
+                continue
+            if self.display.pending_events():
+                lookahead = self.display.next_event()
+                if (lookahead.type == X.KeyPress and lookahead.detail == event.detail and
+                        lookahead.time == event.time):
+                    lookahead = None  # Auto-repeat, the key is still held
+                    continue
+            try:
+                self.callback(pressed.pop(event.detail))
+            except Exception:
+                pass
+
+
+class HybridTimer:
+    """Sleeps to a deadline with a coarse sleep followed by a short spin.
+    
+    time.sleep alone overshoots by a millisecond or more on a loaded host,
+    a large error against 5-20 ms keystroke delays. This sleeps until
+    spin_margin before the deadline and busy-waits for the rest. The margin
+    tracks the measured lateness of the coarse sleeps but never exceeds
+    max_spin, which bounds the CPU burnt per sleep and keeps each spin well
+    under the interpreter's 5 ms thread switch interval.
+    """
+    
+    def __init__(self, max_spin=0.002, min_spin=0.0002):
+        self.max_spin = max_spin
+        self.min_spin = min_spin
+        self.spin_margin = 0.001
+        self.sleeps = 0
+        self.overshoot_total = 0.0
+        self.overshoot_max = 0.0
+        
+    def sleep(self, duration):
+        now = time.perf_counter()
+        coarse = duration - self.spin_margin
+        if coarse > 0:
+            time.sleep(coarse)
+            self.adapt(time.perf_counter() - (now + coarse))
+        self.spin(now + duration)
+        
+    async def sleep_async(self, duration):
+        """sleep for a coroutine; other tasks run during the coarse part"""
+        now = time.perf_counter()
+        coarse = duration - self.spin_margin
+        if coarse > 0:
+            await asyncio.sleep(coarse)
+            self.adapt(time.perf_counter() - (now + coarse))
+        self.spin(now + duration)
+        
+    def adapt(self, late):
+        # Widen the margin at once after a late wake-up, narrow it slowly
+        if late * 1.25 > self.spin_margin:
+            self.spin_margin = min(self.max_spin, late * 1.25)
+        else:
+            self.spin_margin = max(self.min_spin, self.spin_margin * 0.99)
+            
+    def spin(self, deadline):
+        perf_counter = time.perf_counter
+        while perf_counter() < deadline:
+            pass
+            
+        overshoot = time.perf_counter() - deadline
+        self.sleeps += 1
+        self.overshoot_total += overshoot
+        if overshoot > self.overshoot_max:
+            self.overshoot_max = overshoot
+            
+    def stats(self):
+        """Measured overshoot past the deadlines so far"""
+        return {
+            'sleeps': self.sleeps,
+            'mean_overshoot_ms': round(self.overshoot_total / self.sleeps * 1000, 4) if self.sleeps else 0.0,
+            'max_overshoot_ms': round(self.overshoot_max * 1000, 4),
+            'spin_margin_ms': round(self.spin_margin * 1000, 4),
+        }
+
+
+@contextlib.contextmanager
+def tuned_thread(cpus=None, nice=None):
+    """Pin the calling thread to cpus and set its niceness for the block.
+    
+    Linux only, where both apply per thread. Yields a list of the problems
+    hit, e.g. a negative niceness without the privilege for it.
+    """
+    problems = []
+    undo = []
+    if (cpus or nice is not None) and not sys.platform.startswith('linux'):
+        problems.append("CPU affinity and niceness are only supported on Linux")
+        cpus = nice = None
+    if cpus:
+        try:
+            previous_cpus = os.sched_getaffinity(0)
+            os.sched_setaffinity(0, cpus)
+            undo.append(lambda: os.sched_setaffinity(0, previous_cpus))
+        except (OSError, ValueError, TypeError) as e:
+            problems.append(f"Could not set CPU affinity: {e}")
+    if nice is not None:
+        thread_id = threading.get_native_id()
+        try:
+            previous_nice = os.getpriority(os.PRIO_PROCESS, thread_id)
+            os.setpriority(os.PRIO_PROCESS, thread_id, int(nice))
+            undo.append(lambda: os.setpriority(os.PRIO_PROCESS, thread_id, previous_nice))
+        except (OSError, ValueError) as e:
+            problems.append(f"Could not set niceness {nice}: {e}")
+    try:
+        yield problems
+    finally:
+        for restore in reversed(undo):
+            try:
+                restore()
+            except OSError:
+                pass
+
+
+class ExecutorProcess:
+    """Runs a replay's events in a dedicated executor subprocess.
+    
+    The replay thread streams planned events over a pipe, mirrors the local
+    executor's pause and stop flags to the child and copies its progress,
+    metrics and final tally back into the local executor, so the GUI and the
+    control API work unchanged. Dispatch timing then never competes with Tk,
+    animations or listener threads for the GIL. The child has no Tk root, so
+    its pastes set and read the clipboard through the parent.
+    """
+    
+    CHUNK_SIZE = 256
+    
+    def __init__(self, executor, settings, backend_name, on_warning=None,
+                 set_clipboard=None, get_clipboard=None):
+        self.executor = executor
+        self.on_warning = on_warning
+        self.set_clipboard = set_clipboard
+        self.get_clipboard = get_clipboard
+        # The child must use the backend the plan was made for
+        self.settings = dict(settings)
+        if settings.get('burst_mode'):
+            self.settings['burst_method'] = backend_name
+        context = multiprocessing.get_context('spawn')
+        self.conn, self.child_conn = context.Pipe()
+        self.process = context.Process(target=executor_process, args=(self.child_conn,), daemon=True)
+        self.send_lock = threading.Lock()
+        
+    def send(self, message):
+        with self.send_lock:
+            self.conn.send(message)
+            
+    def feed(self, events):
+        """Feeder thread: stream events to the child in chunks"""
+        try:
+            chunk = []
+            for event in events:
+                chunk.append(event)
+                if len(chunk) >= self.CHUNK_SIZE:
+                    self.send(('events', chunk))
+                    chunk = []
+            if chunk:
+                self.send(('events', chunk))
+            self.send(('end',))
+        except (BrokenPipeError, EOFError, OSError):
+            pass  # The child has finished or died, run() reports it
+        except Exception as error:
+            self.executor.stop()
+            self.feed_error = error
+            
+    def run(self, events):
+        """Replay events in the child; raises like KeystrokeExecutor.run"""
+        executor = self.executor
+        self.feed_error = None
+        self.process.start()
+        self.child_conn.close()
+        options = {'tally': executor.tally is not None, 'metrics': executor.metrics is not None}
+        try:
+            self.send(('start', self.settings, options))
+            threading.Thread(target=self.feed, args=(events,), daemon=True).start()
+            paused = stopped = False
+            speed = 1.0
+            while True:
+                if executor.speed != speed:
+                    speed = executor.speed
+                    self.send(('speed', speed))
+                if executor.is_paused != paused:
+                    paused = executor.is_paused
+                    self.send(('pause',) if paused else ('resume',))
+                if executor.stop_requested and not stopped:
+                    stopped = True
+                    self.send(('stop',))
+                if not self.conn.poll(0.05):
+                    if not self.process.is_alive():
+                        raise RuntimeError("Executor process exited unexpectedly")
+                    continue
+                    
+                try:
+                    message = self.conn.recv()
+                except (EOFError, OSError):
+                    raise RuntimeError("Executor process exited unexpectedly")
+                kind = message[0]
+                if kind == 'progress':
+                    _, executor.keys_sent, elapsed, rate, metrics = message
+                    if metrics and executor.metrics:
+                        executor.metrics.merge(metrics)
+                    if executor.flow:
+                        executor.flow.rate = rate
+                    if executor.on_progress:
+                        executor.on_progress(executor.keys_sent, elapsed)
+                elif kind == 'warning':
+                    if self.on_warning:
+                        self.on_warning(message[1])
+                elif kind in ('set_clipboard', 'get_clipboard'):
+                    self.send(('clipboard',) + self.clipboard(*message))
+                elif kind == 'done':
+                    self.finish(*message[1:])
+                    return
+        finally:
+            self.close()
+            
+    def clipboard(self, kind, *args):
+        """Serve a clipboard request from the child; returns (ok, value or error)"""
+        try:
+            if self.set_clipboard is None:
+                self.set_clipboard, self.get_clipboard = pyperclip_clipboard()
+            if kind == 'set_clipboard':
+                self.set_clipboard(*args)
+                return True, None
+            return True, self.get_clipboard() if self.get_clipboard else None
+        except Exception as error:
+            return False, str(error)
+            
+    def finish(self, outcome, error, result):
+        """Copy the child's results into the local executor and re-raise its outcome"""
+        executor = self.executor
+        executor.keys_sent = result['keys_sent']
+        executor.paused_seconds = result['paused_seconds']
+        executor.timer = result['timer']
+        if result['tally']:
+            executor.tally = result['tally']
+        if executor.metrics and result['metrics']:
+            executor.metrics.merge(result['metrics'])
+            
+        if self.feed_error is not None:
+            raise self.feed_error
+        if outcome == 'stopped':
+            raise ReplayStopped()
+        if outcome == 'failsafe':
+            raise pyautogui.FailSafeException(error)
+        if outcome == 'failed':
+            raise RuntimeError(error)
+            
+    def close(self):
+        if self.process.is_alive():
+            try:
+                self.send(('stop',))
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(2)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.conn.close()
+
+
+def executor_process(conn):
+    """Entry point of the subprocess started by ExecutorProcess"""
+    _, settings, options = conn.recv()
+    send_lock = threading.Lock()
+    
+    def send(message):
+        with send_lock:
+            conn.send(message)
+            
+    executor = None
+    chunks = queue.Queue()
+    replies = queue.Queue()  # Answers to clipboard requests
+    
+    def receive():
+        # Events and control messages from the replay thread
+        try:
+            while True:
+                message = conn.recv()
+                kind = message[0]
+                if kind == 'events':
+                    chunks.put(message[1])
+                elif kind == 'end':
+                    chunks.put(None)
+                elif kind == 'pause':
+                    executor.pause()
+                elif kind == 'resume':
+                    executor.resume()
+                elif kind == 'speed':
+                    executor.speed = message[1]
+                elif kind == 'clipboard':
+                    replies.put(message[1:])
+                elif kind == 'stop':
+                    executor.stop()
+                    chunks.put(None)
+        except (EOFError, OSError):
+            executor.stop()
+            chunks.put(None)
+            
+    def events():
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                return
+            yield from chunk
+            
+    def clipboard(*request):
+        # The parent owns the clipboard, through Tk or pyperclip
+        send(request)
+        try:
+            ok, value = replies.get(timeout=5.0)
+        except queue.Empty:
+            raise RuntimeError("Timed out waiting for the clipboard")
+        if not ok:
+            raise RuntimeError(value)
+        return value
+        
+    outcome, error = 'completed', None
+    try:
+        pyautogui.PAUSE = 0.0 if settings.get('precise_timing') else 0.01
+        backend = create_backend(settings, lambda text: clipboard('set_clipboard', text),
+                                 lambda: clipboard('get_clipboard'))
+        executor = KeystrokeExecutor(backend)
+        executor.flow = FlowController() if settings.get('adaptive_flow') else None
+        executor.timer = HybridTimer() if settings.get('precise_timing') else None
+        executor.tally = ReplayTally() if options['tally'] else None
+        executor.metrics = ReplayMetrics() if options['metrics'] else None
+        
+        def report_progress(keys_sent, elapsed):
+            metrics = executor.metrics.drain() if executor.metrics else None
+            rate = executor.flow.rate if executor.flow else 1.0
+            send(('progress', keys_sent, elapsed, rate, metrics))
+        executor.on_progress = report_progress
+        threading.Thread(target=receive, daemon=True).start()
+        
+        with tuned_thread(settings.get('cpu_affinity'), settings.get('nice')) as problems:
+            for problem in problems:
+                send(('warning', problem))
+            executor.run(events())
+        if executor.stop_requested:
+            outcome = 'stopped'
+    except ReplayStopped:
+        outcome = 'stopped'
+    except pyautogui.FailSafeException as e:
+        outcome, error = 'failsafe', str(e)
+    except Exception as e:
+        outcome, error = 'failed', str(e)
+    finally:
+        if executor:
+            executor.backend.close()
+            
+    result = {
+        'keys_sent': executor.keys_sent if executor else 0,
+        'paused_seconds': executor.paused_seconds if executor else 0.0,
+        'timer': executor.timer if executor else None,
+        'tally': executor.tally if executor else None,
+        'metrics': executor.metrics.drain() if executor and executor.metrics else None,
+    }
+    try:
+        send(('done', outcome, error, result))
+    except (BrokenPipeError, OSError):
+        pass
+
+
+def delete_word(output):
+    """Remove the word before the end of output, as a word-delete chord does"""
+    if output and not output[-1].isalnum():
+        output.pop()
+        return
+    while output and output[-1].isalnum():
+        output.pop()
+
+
+def check_stream_displays(displays):
+    """Raise ValueError unless at most one stream types into the app's own display"""
+    if sum(1 for display in displays if not display) > 1:
+        raise ValueError("only one stream may leave out display; give the others their own X display")
+
+
+class ReplayStream:
+    """One timed output stream of a ReplayEngine: planned events and the
+    KeystrokeExecutor that sends them, a plain one around backend by default.
+    
+    events may be a lazy iterator; the engine pulls them as it goes.
+    """
+    
+    def __init__(self, name, events, backend=None, executor=None):
+        self.name = name
+        self.events = events
+        self.executor = executor or KeystrokeExecutor(backend)
+        
+    @property
+    def keys_sent(self):
+        return self.executor.keys_sent
+
+
+class ReplayEngine:
+    """asyncio core replaying timed streams on one event loop.
+    
+    The loop runs on its own thread and every in-app replay runs on it,
+    single ones as one stream. Each stream is a task that steps its
+    executor through the events and awaits the delays between them against
+    absolute deadlines, so streams interleave without a thread each and
+    every await is a cancellation point. Multi-key events are split into
+    single keys, which keeps the calls made on the loop short. Backends
+    that may sleep or wait for the clipboard (pyautogui's pause, pastes) are
+    stepped in the loop's executor instead, so they never hold up the other
+    streams. Pause, resume and stop go through the streams' executors, and
+    progress is reported by a coroutine on the same loop.
+    """
+    
+    # Fall this far behind schedule and the stream stops trying to catch up
+    MAX_LAG = 0.05
+    
+    def __init__(self, progress_interval=0.25):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.streams = []
+        self.tasks = []
+        self.progress_interval = progress_interval
+        self.on_progress = None  # Called on the loop with the list of streams
+        self.on_problem = None  # Called on the loop with each thread tuning problem
+        
+    def start(self):
+        self.thread.start()
+        return self
+        
+    def submit(self, streams, cpus=None, nice=None, profiler=None):
+        """Run streams concurrently; returns a concurrent.futures.Future of their results.
+        
+        cpus and nice tune the loop thread for the run, as tuned_thread does,
+        and profiler profiles it.
+        """
+        self.streams = list(streams)
+        return asyncio.run_coroutine_threadsafe(self.run_all(self.streams, cpus, nice, profiler), self.loop)
+        
+    def pause(self):
+        for stream in self.streams:
+            stream.executor.pause()
+            
+    def resume(self):
+        for stream in self.streams:
+            stream.executor.resume()
+        
+    def stop(self):
+        """Cancel every running stream at its next await"""
+        def cancel():
+            for task in self.tasks:
+                task.cancel()
+        for stream in self.streams:
+            stream.executor.stop()
+        self.loop.call_soon_threadsafe(cancel)
+        
+    async def run_all(self, streams, cpus=None, nice=None, profiler=None):
+        """Results per stream: None when it completed, else the exception that ended it"""
+        with tuned_thread(cpus, nice) as problems, \
+                profiler.thread('engine') if profiler else contextlib.nullcontext():
+            for problem in problems:
+                if self.on_problem:
+                    self.on_problem(problem)
+            self.tasks = [asyncio.create_task(self.run_stream(stream)) for stream in streams]
+            reporter = asyncio.create_task(self.report(streams))
+            try:
+                results = await asyncio.gather(*self.tasks, return_exceptions=True)
+            finally:
+                reporter.cancel()
+                self.tasks = []
+                self.streams = []
+        if self.on_progress:
+            self.on_progress(streams)
+        return results
+        
+    async def report(self, streams):
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            if self.on_progress:
+                self.on_progress(streams)
+                
+    async def run_stream(self, stream):
+        loop = asyncio.get_running_loop()
+        executor = stream.executor
+        steps = executor.steps(split_events(stream.events), coalesce=False)
+        deadline = loop.time()
+        step = None
+        try:
+            while True:
+                if executor.backend.blocks_loop:
+                    step = loop.run_in_executor(None, next, steps, None)
+                    # Shielded, so a cancelled stream still lets the backend call finish
+                    delay = await asyncio.shield(step)
+                    step = None
+                else:
+                    delay = next(steps, None)
+                if delay is None:
+                    return
+                deadline += delay
+                now = loop.time()
+                if now - deadline > self.MAX_LAG:
+                    deadline = now
+                deadline = await self.wait(executor, deadline)
+        finally:
+            if step is not None:
+                await asyncio.wait([step])
+            # Releases any held modifier, cancelled or not
+            steps.close()
+            
+    async def wait(self, executor, deadline):
+        """Wait until deadline on the loop clock, in slices that check for
+        pause and stop; returns the deadline moved on by any pause"""
+        loop = asyncio.get_running_loop()
+        while True:
+            if executor.is_paused:
+                paused_at = loop.time()
+                await self.wait_for_resume(executor)
+                deadline += loop.time() - paused_at
+            if executor.stop_requested:
+                raise ReplayStopped()
+            remaining = deadline - loop.time()
+            if remaining <= executor.PAUSE_CHECK_INTERVAL:
+                break
+            await asyncio.sleep(executor.PAUSE_CHECK_INTERVAL)
+        if executor.timer:
+            await executor.timer.sleep_async(max(0.0, remaining))
+        else:
+            await asyncio.sleep(max(0.0, remaining))
+        return deadline
+        
+    async def wait_for_resume(self, executor):
+        """KeystrokeExecutor.wait_for_resume for a stream on the loop"""
+        held_keys = list(executor.held_keys)
+        executor.release_held_keys()
+        paused_at = time.perf_counter()
+        while executor.is_paused and not executor.resume_requested and not executor.stop_requested:
+            await asyncio.sleep(0.1)
+        executor.paused_seconds += time.perf_counter() - paused_at
+        executor.resume_requested = False
+        if executor.stop_requested:
+            raise ReplayStopped()
+        for key in held_keys:
+            executor.backend.key_down(key)
+            executor.held_keys.append(key)
+
+
+class ReplayStopped(Exception):
+    """Raised inside a replay when a stop is requested"""
+
+
+class KeystrokeExecutor:
+    """Runs planned events through a backend, honouring pause and stop requests"""
+    
+    # Longer waits are slept in slices so pause and stop requests apply during them
+    PAUSE_CHECK_INTERVAL = 0.05
+    
+    def __init__(self, backend=None, flow=None):
+        self.backend = backend or PyAutoGUIBackend()
+        self.flow = flow  # Optional FlowController
+        self.metrics = None  # Optional ReplayMetrics
+        self.tally = None  # Optional ReplayTally counting dispatched events
+        self.profiler = None  # Optional ReplayProfiler collecting phase times
+        self.timer = None  # Optional HybridTimer for keystroke delays
+        self.paused_seconds = 0.0  # Time spent paused by the user
+        self.expected_output = []
+        self.is_paused = False
+        self.resume_requested = False
+        self.stop_requested = False
+        self.speed = 1.0  # Live speed multiplier, e.g. from hotkeys
+        self.held_keys = []
+        
+        # Progress reporting, at most every progress_interval seconds
+        self.on_progress = None  # Called with (keys_sent, elapsed)
+        self.progress_interval = 0.25
+        self.keys_sent = 0
+        
+    def reset(self):
+        """Clear pause and stop state before a new replay"""
+        self.is_paused = False
+        self.resume_requested = False
+        self.stop_requested = False
+        self.keys_sent = 0
+        self.paused_seconds = 0.0
+        self.speed = 1.0
+        
+    def stop(self):
+        """Abort the replay at the next event or pause check"""
+        self.stop_requested = True
+        
+    def pause(self):
+        """Request a pause at the next event"""
+        self.is_paused = True
+        
+    def resume(self):
+        """Resume a paused replay"""
+        self.is_paused = False
+        self.resume_requested = True
+        
+    def run(self, events, coalesce=True):
+        """Dispatch events in order, sleeping the planned delay after each key.
+        
+        When self.tally is set, each event is recorded in it with its planned
+        and actual timing.
+        """
+        sleep = self.timer.sleep if self.timer else time.sleep
+        steps = self.steps(events, coalesce)
+        try:
+            for delay in steps:
+                if self.is_paused:
+                    self.wait_for_resume()
+                if self.stop_requested:
+                    raise ReplayStopped()
+                if delay > self.PAUSE_CHECK_INTERVAL:
+                    self.pausable_sleep(delay)
+                elif delay > 0:
+                    sleep(delay)
+        finally:
+            steps.close()
+            
+    def steps(self, events, coalesce=True):
+        """Dispatch events in order, yielding the time to wait after each one.
+        
+        The caller does the waiting and checks for pause and stop requests
+        before each wait: run sleeps, the ReplayEngine awaits. Timing taken
+        after a yield leaves out any user pause the caller waited through.
+        """
+        # Multi-key calls sleep inside the backend, out of the precise timer's reach
+        if self.timer:
+            events = split_events(events)
+        elif coalesce:
+            events = coalesce_events(events)
+        flow = self.flow
+        metrics = self.metrics
+        tally = self.tally
+        profiler = self.profiler
+        measured = bool(flow or metrics or profiler or tally)
+        self.expected_output = []
+        started_at = last_report = time.perf_counter()
+        try:
+            # Let the caller check for a pause or stop before the first event
+            yield 0.0
+            for op, arg, delay in events:
+                if op == 'pause':
+                    # Typo and rewrite pauses are tagged with their reason
+                    if metrics:
+                        metrics.observe_pause(arg, delay)
+                    if not measured:
+                        yield delay
+                        continue
+                    started = time.perf_counter()
+                    paused_before = self.paused_seconds
+                    yield delay
+                    # Leave out any user pause that interrupted the planned one
+                    ended = time.perf_counter() - (self.paused_seconds - paused_before)
+                    if tally:
+                        tally.record(op, 0, arg, started, ended, delay)
+                    if profiler:
+                        profiler.add('pauses', ended - started)
+                    continue
+                    
+                if self.speed != 1.0:
+                    delay /= self.speed
+                    
+                if self.on_progress:
+                    now = time.perf_counter()
+                    if now - last_report >= self.progress_interval:
+                        last_report = now
+                        self.on_progress(self.keys_sent, now - started_at)
+                    
+                if not measured:
+                    keys, slept = self.dispatch(op, arg, delay)
+                    self.keys_sent += keys
+                    yield 0.0 if slept else delay
+                    continue
+                
+                if flow:
+                    delay = flow.scale(delay)
+                started = time.perf_counter()
+                keys, slept = self.dispatch(op, arg, delay)
+                latency = time.perf_counter() - started
+                self.keys_sent += keys
+                if slept:
+                    latency -= delay * keys
+                if metrics:
+                    metrics.observe_call(latency, keys)
+                if flow:
+                    if keys:
+                        flow.observe(latency, keys)
+                    if flow.readback:
+                        self.track_output(op, arg)
+                        flow.check_readback(self.expected_output, keys)
+                paused_before = self.paused_seconds
+                if slept:
+                    yield 0.0
+                else:
+                    # Scheduling lag: how late we wake up after the planned delay
+                    due = time.perf_counter() + delay
+                    yield delay
+                    if metrics:
+                        metrics.observe_lag(time.perf_counter() - due - (self.paused_seconds - paused_before))
+                ended = time.perf_counter() - (self.paused_seconds - paused_before)
+                if tally:
+                    tally.record(op, keys, None, started, ended, delay * keys if slept else delay)
+                if profiler:
+                    profiler.add('backend_calls', max(0.0, latency))
+                    correction = op == 'press' and 'backspace' in arg
+                    profiler.add('corrections' if correction else 'typing', ended - started)
+            if self.on_progress:
+                self.on_progress(self.keys_sent, time.perf_counter() - started_at)
+        finally:
+            # Never leave a modifier stuck down
+            self.release_held_keys()
+            
+    def dispatch(self, op, arg, delay):
+        """Send one event to the backend.
+        
+        Returns the number of keys sent and whether the per-key delay was
+        already slept inside the backend call.
+        """
+        backend = self.backend
+        if op == 'write':
+            if len(arg) > 1:
+                backend.write(arg, interval=delay)
+                return len(arg), True
+            backend.write(arg)
+            return 1, False
+        if op == 'press':
+            if isinstance(arg, tuple):
+                backend.press(list(arg), interval=delay)
+                return len(arg), True
+            backend.press(arg)
+            return 1, False
+        if op == 'keydown':
+            backend.key_down(arg)
+            self.held_keys.append(arg)
+            return 0, False
+        if op == 'keyup':
+            backend.key_up(arg)
+            self.held_keys.remove(arg)
+            return 0, False
+        if op == 'burst':
+            # XTest and clipboard bursts bypass pyautogui, and with it the failsafe corner
+            pyautogui.failSafeCheck()
+            backend.burst(arg)
+            return len(arg), False
+        if op == 'paste':
+            backend.paste(arg)
+            return 1, False
+        return 0, False
+        
+    def track_output(self, op, arg):
+        """Follow the text the target should contain, for read-back checks"""
+        output = self.expected_output
+        if op in ('write', 'burst', 'paste'):
+            output.extend(arg)
+        elif op == 'press':
+            shifted = 'shift' in self.held_keys
+            for key in ((arg,) if isinstance(arg, str) else arg):
+                if key == 'backspace' and WORD_DELETE_MODIFIER in self.held_keys:
+                    delete_word(output)
+                elif key == 'backspace':
+                    if output:
+                        output.pop()
+                elif key in ('enter', 'return'):
+                    output.append('\n')
+                elif key == 'tab':
+                    output.append('\t')
+                elif len(key) == 1:
+                    output.append(UNSHIFTED_KEYS.get(key, key) if shifted else key)
+            
+    def release_held_keys(self):
+        """Release every key held by a keydown event"""
+        while self.held_keys:
+            self.backend.key_up(self.held_keys.pop())
+            
+    def wait_for_resume(self):
+        """Wait until resume is requested, with held keys released meanwhile"""
+        held_keys = list(self.held_keys)
+        self.release_held_keys()
+        paused_at = time.perf_counter()
+        while self.is_paused and not self.resume_requested and not self.stop_requested:
+            time.sleep(0.1)
+        self.paused_seconds += time.perf_counter() - paused_at
+        self.resume_requested = False
+        if self.stop_requested:
+            raise ReplayStopped()
+        for key in held_keys:
+            self.backend.key_down(key)
+            self.held_keys.append(key)
+        
+    def pausable_sleep(self, duration):
+        """Sleep that can be interrupted by pause requests"""
+        start_time = time.time()
+        while time.time() - start_time < duration:
+            if self.is_paused:
+                self.wait_for_resume()
+                start_time = time.time()  # Reset timer after resume
+            if self.stop_requested:
+                raise ReplayStopped()
+            time.sleep(max(0.0, min(self.PAUSE_CHECK_INTERVAL, duration - (time.time() - start_time))))
+
+
+class Histogram:
+    """Cumulative-bucket histogram in seconds"""
+    
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        
+    def take(self):
+        """Return (counts, count, sum) and start over"""
+        taken = (self.counts, self.count, self.sum)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        return taken
+        
+    def add(self, counts, count, total):
+        for index, value in enumerate(counts):
+            self.counts[index] += value
+        self.count += count
+        self.sum += total
+
+
+class ReplayMetrics:
+    """Counters, histograms and gauges for replays, rendered as OpenMetrics text.
+    
+    The executor feeds keystrokes, pauses, backend call latency and scheduling
+    lag; job and pause state come from the app's published events.
+    """
+    
+    PREFIX = 'keystroke_replayer'
+    LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+    LAG_BUCKETS = (0.0001, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.5)
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.keystrokes = 0
+        self.typos = 0
+        self.rewrites = 0
+        self.pause_seconds = 0.0
+        self.replays = {}  # Finished replays by outcome
+        self.backend_latency = Histogram(self.LATENCY_BUCKETS)
+        self.scheduling_lag = Histogram(self.LAG_BUCKETS)
+        self.active = 0
+        self.paused = 0
+        self.last_progress = 0.0  # Unix time of the last progress event
+        
+    def observe_call(self, latency, keys):
+        with self.lock:
+            self.keystrokes += keys
+            self.backend_latency.observe(max(0.0, latency))
+            
+    def observe_lag(self, lag):
+        with self.lock:
+            self.scheduling_lag.observe(max(0.0, lag))
+            
+    def observe_pause(self, reason, duration):
+        with self.lock:
+            self.pause_seconds += duration
+            if reason == 'typo':
+                self.typos += 1
+            elif reason == 'rewrite':
+                self.rewrites += 1
+                
+    def drain(self):
+        """Take the executor-fed observations so far, e.g. to send them to another process"""
+        with self.lock:
+            data = {
+                'keystrokes': self.keystrokes,
+                'typos': self.typos,
+                'rewrites': self.rewrites,
+                'pause_seconds': self.pause_seconds,
+                'backend_latency': self.backend_latency.take(),
+                'scheduling_lag': self.scheduling_lag.take(),
+            }
+            self.keystrokes = self.typos = self.rewrites = 0
+            self.pause_seconds = 0.0
+        return data
+        
+    def merge(self, data):
+        """Add observations taken with drain"""
+        with self.lock:
+            self.keystrokes += data['keystrokes']
+            self.typos += data['typos']
+            self.rewrites += data['rewrites']
+            self.pause_seconds += data['pause_seconds']
+            self.backend_latency.add(*data['backend_latency'])
+            self.scheduling_lag.add(*data['scheduling_lag'])
+            
+    def on_event(self, event):
+        """App listener tracking replay and pause state"""
+        kind = event['type']
+        with self.lock:
+            if kind == 'job':
+                state = event['state']
+                if state == 'running':
+                    self.active = 1
+                    self.paused = 0
+                    self.last_progress = event['time']
+                elif state != 'queued':
+                    self.active = 0
+                    self.paused = 0
+                    self.replays[state] = self.replays.get(state, 0) + 1
+            elif kind == 'paused':
+                self.paused = 1
+            elif kind == 'resumed':
+                self.paused = 0
+            elif kind == 'progress':
+                self.last_progress = event['time']
+                
+    def render(self):
+        """The metrics in OpenMetrics text exposition format"""
+        prefix = self.PREFIX
+        lines = []
+        
+        def family(name, kind, help_text):
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            
+        def histogram(name, help_text, histogram):
+            family(name, 'histogram', help_text)
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{prefix}_{name}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_{name}_bucket{{le="+Inf"}} {histogram.count}')
+            lines.append(f"{prefix}_{name}_count {histogram.count}")
+            lines.append(f"{prefix}_{name}_sum {histogram.sum:.6f}")
+            
+        with self.lock:
+            family('keystrokes', 'counter', "Keys sent to the backend.")
+            lines.append(f"{prefix}_keystrokes_total {self.keystrokes}")
+            family('typos', 'counter', "Typos typed and corrected.")
+            lines.append(f"{prefix}_typos_total {self.typos}")
+            family('rewrites', 'counter', "Words typed wrong, deleted and retyped.")
+            lines.append(f"{prefix}_rewrites_total {self.rewrites}")
+            family('pause_seconds', 'counter', "Planned pause time.")
+            lines.append(f"{prefix}_pause_seconds_total {self.pause_seconds:.3f}")
+            family('replays', 'counter', "Finished replays by outcome.")
+            for outcome, count in sorted(self.replays.items()):
+                lines.append(f'{prefix}_replays_total{{outcome="{outcome}"}} {count}')
+            histogram('backend_call_seconds', "Backend call latency, excluding delays slept inside the call.",
+                      self.backend_latency)
+            histogram('scheduling_lag_seconds', "Oversleep past each planned keystroke delay.",
+                      self.scheduling_lag)
+            family('active', 'gauge', "1 while a replay is running.")
+            lines.append(f"{prefix}_active {self.active}")
+            family('paused', 'gauge', "1 while the running replay is paused.")
+            lines.append(f"{prefix}_paused {self.paused}")
+            family('last_progress_timestamp_seconds', 'gauge', "Unix time of the last replay progress.")
+            lines.append(f"{prefix}_last_progress_timestamp_seconds {self.last_progress:.3f}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Serves GET /metrics"""
+    
+    def log_message(self, format, *args):
+        pass
+        
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        data = self.server.metrics.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/openmetrics-text; version=1.0.0; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class MetricsExporter:
+    """Publishes ReplayMetrics on a 127.0.0.1 port and/or to a textfile.
+    
+    The textfile is rewritten atomically every interval seconds, for
+    collectors that scrape a directory instead of an endpoint.
+    """
+    
+    def __init__(self, metrics, port=None, textfile=None, interval=5.0):
+        self.metrics = metrics
+        self.textfile = textfile
+        self.interval = interval
+        self.httpd = None
+        self.closing = threading.Event()
+        self.threads = []
+        if port is not None:
+            self.httpd = http.server.ThreadingHTTPServer(('127.0.0.1', port), MetricsRequestHandler)
+            self.httpd.daemon_threads = True
+            self.httpd.metrics = metrics
+            self.threads.append(threading.Thread(target=self.httpd.serve_forever, daemon=True))
+        if textfile:
+            self.threads.append(threading.Thread(target=self.write_loop, daemon=True))
+            
+    @property
+    def address(self):
+        targets = []
+        if self.httpd:
+            targets.append(f"http://127.0.0.1:{self.httpd.server_port}/metrics")
+        if self.textfile:
+            targets.append(self.textfile)
+        return ', '.join(targets)
+        
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+        return self
+        
+    def write_textfile(self):
+        temporary = f"{self.textfile}.{os.getpid()}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as output:
+            output.write(self.metrics.render())
+        os.replace(temporary, self.textfile)
+        
+    def write_loop(self):
+        while True:
+            try:
+                self.write_textfile()
+            except OSError:
+                pass
+            if self.closing.wait(self.interval):
+                return
+                
+    def close(self):
+        self.closing.set()
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+        if self.textfile:
+            try:
+                self.write_textfile()
+            except OSError:
+                pass
+
+
+class ControlRequestHandler(http.server.BaseHTTPRequestHandler):
+    """JSON endpoints of the local control API"""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    def address_string(self):
+        # Unix socket peers have no host/port pair
+        return self.client_address[0] if self.client_address else 'unix'
+        
+    def log_message(self, format, *args):
+        pass
+        
+    def send_json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        
+    def authorized(self):
+        """Check the Host header and bearer token, answering the request when either is wrong"""
+        control = self.server.control
+        # A DNS-rebound page reaches 127.0.0.1 under its own host name
+        if control.hosts is not None and self.headers.get('Host') not in control.hosts:
+            self.send_json(403, {'error': "unexpected Host header"})
+            return False
+        supplied = self.headers.get('Authorization', '').encode('latin-1', 'replace')
+        if not hmac.compare_digest(supplied, f"Bearer {control.token}".encode('latin-1')):
+            self.send_json(401, {'error': "missing or invalid bearer token"})
+            return False
+        return True
+        
+    def read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        body = json.loads(self.rfile.read(length).decode('utf-8'))
+        if not isinstance(body, dict):
+            raise ValueError("request body must be a JSON object")
+        return body
+        
+    def do_GET(self):
+        if not self.authorized():
+            return
+        app = self.server.control.app
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if path == '/jobs':
+            self.send_json(200, {'jobs': list(app.jobs.values()), 'active': app.active_job and app.active_job['id']})
+        elif path.startswith('/jobs/') and path[6:].isdigit():
+            job = app.jobs.get(int(path[6:]))
+            if job:
+                self.send_json(200, job)
+            else:
+                self.send_json(404, {'error': "no such job"})
+        elif path == '/events':
+            self.stream_events()
+        else:
+            self.send_json(404, {'error': "not found"})
+            
+    def do_POST(self):
+        if not self.authorized():
+            return
+        # Browsers send text/plain and form posts cross-origin without a preflight
+        if self.headers.get_content_type() != 'application/json':
+            self.send_json(415, {'error': "Content-Type must be application/json"})
+            return
+        app = self.server.control.app
+        path = self.path.split('?', 1)[0].rstrip('/')
+        try:
+            body = self.read_json()
+        except ValueError as e:
+            self.send_json(400, {'error': f"invalid JSON: {e}"})
+            return
+            
+        if path == '/jobs':
+            self.submit(body)
+        elif path in ('/pause', '/resume', '/stop'):
+            action = {'/pause': app.pause_replay, '/resume': app.resume_replay, '/stop': app.stop_replay}[path]
+            if action():
+                self.send_json(200, {'ok': True})
+            else:
+                self.send_json(409, {'error': "no replay in a state to " + path[1:]})
+        else:
+            self.send_json(404, {'error': "not found"})
+            
+    def submit(self, body):
+        """POST /jobs: {"text" or "path", "settings", "seed", "delay"} or {"streams": [...], "delay"}"""
+        app = self.server.control.app
+        try:
+            delay = int(body.get('delay', 0))
+            if 'streams' in body:
+                streams = body['streams']
+                if not isinstance(streams, list) or not streams:
+                    raise ValueError("streams must be a non-empty list")
+                streams = [self.read_source(stream) for stream in streams]
+                check_stream_displays([display for _, _, display in streams])
+            else:
+                streams = None
+                report, settings, _ = self.read_source(body)
+        except (OSError, ValueError, TypeError) as e:
+            self.send_json(400, {'error': str(e)})
+            return
+            
+        if streams:
+            job = app.submit_job('', delay, None, source='api',
+                                 streams=[(report.text, settings, display) for report, settings, display in streams])
+        else:
+            job = app.submit_job(report.text, delay, settings, source='api', preflight=report.summary() or None)
+        self.send_json(202, job)
+        
+    def read_source(self, body):
+        """Preflight report, settings and target display of a job or stream description"""
+        if not isinstance(body, dict):
+            raise ValueError("each stream must be a JSON object")
+        # Only Unix socket clients can name files, the socket's permissions limit who that is
+        allow_path = self.server.control.socket_path is not None
+        if 'text' in body:
+            text = str(body['text'])
+        elif 'path' in body and allow_path:
+            with open(body['path'], encoding='utf-8') as source:
+                text = source.read()
+        elif 'path' in body:
+            raise ValueError("path is only accepted over the Unix socket, send text instead")
+        else:
+            raise ValueError("provide text or path")
+        text = text.replace('\r\n', '\n').lstrip('\r\n').rstrip()
+        if not text:
+            raise ValueError("nothing to replay")
+            
+        settings = merge_settings(body.get('settings'), body.get('seed', DEFAULT_SETTINGS['seed']))
+        if settings['markup']:
+            check_markup(text)
+        report = preflight_text(text, settings['normalize_text'])
+        display = body.get('display')
+        return report, settings, str(display) if display else None
+        
+    def stream_events(self):
+        """GET /events: newline-delimited JSON until the client disconnects"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        
+        # A slow client only loses its own events, never stalls the replay
+        events = queue.Queue(maxsize=1000)
+        
+        def listener(event):
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                pass
+                
+        app = self.server.control.app
+        app.listeners.append(listener)
+        try:
+            while not self.server.control.closing:
+                try:
+                    event = events.get(timeout=ControlServer.HEARTBEAT)
+                except queue.Empty:
+                    event = {'type': 'heartbeat', 'time': round(time.time(), 3)}
+                self.wfile.write(json.dumps(event).encode('utf-8') + b'\n')
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+        finally:
+            app.listeners.remove(listener)
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP over a Unix domain socket"""
+    
+    daemon_threads = True
+
+
+class ControlServer:
+    """Local HTTP control API for submitting and monitoring replays.
+    
+    Listens on 127.0.0.1 or a Unix socket only. Every request must carry the
+    token as a bearer token: KEYSTROKE_CONTROL_TOKEN, or a random one made at
+    startup (token_generated) that the caller shows the user. Over TCP the
+    Host header must name the loopback address and port.
+    """
+    
+    HEARTBEAT = 15.0
+    
+    def __init__(self, app, port=None, socket_path=None, token=None):
+        self.app = app
+        self.token = token or os.environ.get('KEYSTROKE_CONTROL_TOKEN')
+        self.token_generated = not self.token
+        if self.token_generated:
+            self.token = secrets.token_urlsafe(24)
+        self.closing = False
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            self.httpd = ThreadingUnixHTTPServer(socket_path, ControlRequestHandler)
+            os.chmod(socket_path, 0o600)
+            self.address = socket_path
+            self.hosts = None
+        else:
+            self.httpd = http.server.ThreadingHTTPServer(('127.0.0.1', port), ControlRequestHandler)
+            port = self.httpd.server_port
+            self.address = f"http://127.0.0.1:{port}"
+            self.hosts = {f"127.0.0.1:{port}", f"localhost:{port}"}
+        self.httpd.control = self
+        self.socket_path = socket_path
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        
+    def start(self):
+        self.thread.start()
+        return self
+        
+    def save_token(self, path):
+        """Write the token to a file only the user can read, for scripts"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as token_file:
+            token_file.write(self.token + '\n')
+        
+    def close(self):
+        self.closing = True
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Keystroke Replayer")
+    parser.add_argument('--control-port', type=int, help="serve the control API on this 127.0.0.1 port")
+    parser.add_argument('--control-socket', help="serve the control API on this Unix socket")
+    parser.add_argument('--metrics-port', type=int, help="serve OpenMetrics on this 127.0.0.1 port")
+    parser.add_argument('--metrics-textfile', help="write OpenMetrics to this file every few seconds")
+    parser.add_argument('--snippets', default=os.environ.get('KEYSTROKE_SNIPPETS'),
+                        help="JSON file of snippets to arm on global hotkeys")
+    parser.add_argument('--speed-hotkeys', action='store_true', help="use F7/F8 to slow down or speed up a running replay")
+    parser.add_argument('--profile', nargs='?', const='', metavar='DIR',
+                        help="profile every replay, writing to DIR (default: the cache directory)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Main application entry point with splash screen"""
+    args = parse_args(argv)
+    
+    try:
+        # Check if pyautogui is available
+        import pyautogui
+    except ImportError:
+        print("Error: pyautogui is not installed.")
+        print("Please install it using: pip install pyautogui")
+        return
+    
+    # Extra real-word confusions for word rewriting
+    confusions_path = os.environ.get('KEYSTROKE_CONFUSIONS')
+    if confusions_path:
+        try:
+            load_confusions(confusions_path)
+        except (OSError, ValueError) as e:
+            print(f"Error: could not load confusions from {confusions_path}: {e}")
+            return
+    
+    snippets = []
+    if args.snippets:
+        try:
+            snippets = load_snippets(args.snippets)
+        except (OSError, ValueError) as e:
+            print(f"Error: could not load snippets from {args.snippets}: {e}")
+            return
+    
+    def launch_main_app():
+        """Launch the main application after splash"""
+        root = tk.Tk()
+        app = KeystrokeReplayer(root, speed_hotkeys=args.speed_hotkeys, snippets=snippets)
+        
+        # Set initial status
+        app.update_status("Ready to replay keystrokes", UI.SUCCESS, "●")
+        
+        if args.control_port is not None or args.control_socket:
+            try:
+                app.control_server = ControlServer(app, args.control_port or 0, args.control_socket).start()
+                app.update_status(f"Control API on {app.control_server.address}", UI.SUCCESS, "●")
+                if app.control_server.token_generated:
+                    token_path = default_cache_dir('control-token')
+                    try:
+                        app.control_server.save_token(token_path)
+                        print(f"Control API token: {app.control_server.token} (saved to {token_path})")
+                    except OSError:
+                        print(f"Control API token: {app.control_server.token}")
+            except OSError as e:
+                app.update_status(f"Control API failed to start: {e}", UI.ERROR, "⚠")
+        
+        # A bare --profile or KEYSTROKE_PROFILE=1 uses the default directory; 0 or empty is off
+        profile = args.profile
+        if profile is None and os.environ.get('KEYSTROKE_PROFILE', '') not in ('', '0'):
+            profile = os.environ['KEYSTROKE_PROFILE']
+        if profile is not None:
+            app.profile_dir = profile if profile not in ('', '1') else default_cache_dir('profiles')
+        
+        if args.metrics_port is not None or args.metrics_textfile:
+            try:
+                app.enable_metrics(args.metrics_port, args.metrics_textfile)
+            except OSError as e:
+                app.update_status(f"Metrics exporter failed to start: {e}", UI.ERROR, "⚠")
         
         root.mainloop()
+        if app.control_server:
+            app.control_server.close()
+        if app.metrics_exporter:
+            app.metrics_exporter.close()
     
     # Create root for splash
     splash_root = tk.Tk()
@@ -0,0 +1,56 @@
+import main
+
+
+class Backend:
+    types_keys = True
+
+    def __init__(self):
+        self.calls = []
+
+    def write(self, text, interval=0.0):
+        self.calls.append(('write', text, interval))
+
+    def press(self, keys, interval=0.0):
+        self.calls.append(('press', keys, interval))
+
+
+def coalesce(events, **options):
+    return list(main.coalesce_events(events, **options))
+
+
+def test_backspace_run_becomes_one_press():
+    events = [('press', 'backspace', 0.01)] * 3 + [('write', 'a', 0.02), ('write', 'b', 0.02)]
+    assert coalesce(events) == [('press', ('backspace',) * 3, 0.01), ('write', 'ab', 0.02)]
+
+
+def test_runs_break_on_delay_change_and_other_events():
+    events = [
+        ('press', 'backspace', 0.01), ('press', 'backspace', 0.02),
+        ('write', 'a', 0.02), ('pause', 'typo', 0.5), ('write', 'b', 0.02),
+    ]
+    assert coalesce(events) == [
+        ('press', 'backspace', 0.01), ('press', 'backspace', 0.02),
+        ('write', 'a', 0.02), ('pause', 'typo', 0.5), ('write', 'b', 0.02),
+    ]
+
+
+def test_runs_are_capped():
+    events = [('press', 'backspace', 0.01)] * 5
+    assert coalesce(events, max_keys=2) == [
+        ('press', ('backspace',) * 2, 0.01), ('press', ('backspace',) * 2, 0.01), ('press', 'backspace', 0.01),
+    ]
+
+
+def test_split_undoes_coalescing():
+    events = [('press', 'backspace', 0.01)] * 3 + [('write', 'a', 0.02), ('write', 'b', 0.02)]
+    assert list(main.split_events(coalesce(events))) == events
+
+
+def test_corrections_are_sent_in_one_backend_call():
+    backend = Backend()
+    executor = main.KeystrokeExecutor(backend)
+    executor.run([('write', 'teh', 0.0)] + [('press', 'backspace', 0.0)] * 2 + [('write', 'he', 0.0)])
+    assert backend.calls == [
+        ('write', 'teh', 0.0), ('press', ['backspace', 'backspace'], 0.0), ('write', 'he', 0.0),
+    ]
+    assert executor.keys_sent == 7
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def confusions(monkeypatch):
+    monkeypatch.setattr(main, 'CONFUSIONS', dict(main.CONFUSIONS))
+    yield main.CONFUSIONS
+    main.wrong_word_candidates.cache_clear()
+
+
+def write_json(tmp_path, data):
+    path = tmp_path / 'confusions.json'
+    path.write_text(json.dumps(data), encoding='utf-8')
+    return str(path)
+
+
+def test_load_confusions_merges_entries(tmp_path, confusions):
+    main.load_confusions(write_json(tmp_path, {'Bare': ['bear']}))
+    assert confusions['bare'] == ('bear',)
+    assert ('bear',) in main.wrong_word_candidates('bare')
+
+
+@pytest.mark.parametrize('data', [['bare'], {'bare': 'bear'}, {'bare': [1]}])
+def test_load_confusions_rejects_malformed_files(tmp_path, confusions, data):
+    with pytest.raises(ValueError):
+        main.load_confusions(write_json(tmp_path, data))
+    assert 'bare' not in confusions
+
+
+def test_load_confusions_rejects_invalid_json(tmp_path, confusions):
+    path = tmp_path / 'confusions.json'
+    path.write_text('{', encoding='utf-8')
+    with pytest.raises(ValueError):
+        main.load_confusions(str(path))
+
+
+@pytest.mark.parametrize('word, expected', [
+    ('world', ('qorld', 'eorld', 'aorld', 'sorld')),
+    ('World', ('Qorld', 'Eorld', 'Aorld', 'Sorld')),
+])
+def test_wrong_first_letters_are_letters_of_the_same_case(word, expected):
+    assert expected in main.wrong_word_candidates(word)
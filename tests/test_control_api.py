@@ -0,0 +1,74 @@
+import http.client
+import json
+
+import pytest
+
+import main
+
+
+class App:
+    """Just enough of KeystrokeReplayer for the control API"""
+
+    def __init__(self):
+        self.jobs = {}
+        self.active_job = None
+        self.listeners = []
+        self.submitted = []
+
+    def submit_job(self, text, delay, settings, **options):
+        self.submitted.append(text)
+        return {'id': len(self.submitted), 'chars': len(text)}
+
+
+@pytest.fixture
+def server():
+    control = main.ControlServer(App(), 0, None, token='secret').start()
+    yield control
+    control.close()
+
+
+def request(server, method, path, body=None, **headers):
+    connection = http.client.HTTPConnection('127.0.0.1', server.httpd.server_port, timeout=5)
+    connection.request(method, path, body, headers)
+    response = connection.getresponse()
+    status = response.status
+    response.read()
+    connection.close()
+    return status
+
+
+AUTH = {'Authorization': 'Bearer secret'}
+JSON = dict(AUTH, **{'Content-Type': 'application/json'})
+
+
+def test_generates_a_token_when_none_is_set(monkeypatch):
+    monkeypatch.delenv('KEYSTROKE_CONTROL_TOKEN', raising=False)
+    control = main.ControlServer(App(), 0, None)
+    try:
+        assert control.token_generated and len(control.token) >= 32
+    finally:
+        control.httpd.server_close()
+
+
+def test_requires_the_token(server):
+    assert request(server, 'GET', '/jobs') == 401
+    assert request(server, 'GET', '/jobs', Authorization='Bearer wrong') == 401
+    assert request(server, 'GET', '/jobs', **AUTH) == 200
+
+
+def test_rejects_foreign_host(server):
+    assert request(server, 'GET', '/jobs', Host='attacker.example', **AUTH) == 403
+
+
+def test_requires_json_content_type(server):
+    body = json.dumps({'text': "hello"})
+    assert request(server, 'POST', '/jobs', body, **dict(AUTH, **{'Content-Type': 'text/plain'})) == 415
+    assert request(server, 'POST', '/jobs', body, **JSON) == 202
+    assert server.app.submitted == ["hello"]
+
+
+def test_path_is_refused_over_tcp(server, tmp_path):
+    secret = tmp_path / 'secret.txt'
+    secret.write_text("private", encoding='utf-8')
+    assert request(server, 'POST', '/jobs', json.dumps({'path': str(secret)}), **JSON) == 400
+    assert server.app.submitted == []
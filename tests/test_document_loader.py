@@ -0,0 +1,44 @@
+import pytest
+
+import main
+
+
+def load(tmp_path, data, chunk_size):
+    path = tmp_path / 'document.txt'
+    path.write_bytes(data)
+    loader = main.DocumentLoader(str(path), chunk_size=chunk_size)
+    chunks = []
+    while not loader.done:
+        chunks.append(loader.read_chunk())
+    return loader, chunks
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 5, 64])
+def test_chunks_join_to_the_normalized_text(tmp_path, chunk_size):
+    data = "café\r\nnaïve — ok\rend\n€\r".encode('utf-8')
+    loader, chunks = load(tmp_path, data, chunk_size)
+    text = ''.join(chunks)
+    assert text == "café\nnaïve — ok\nend\n€\n"
+    assert loader.chars == len(text) and loader.lines == text.count('\n') + 1
+    assert loader.progress() == 1.0 and loader.file.closed
+
+
+def test_crlf_split_across_chunks_is_one_line_break(tmp_path):
+    _, chunks = load(tmp_path, b"ab\r\ncd", 3)
+    assert chunks[0] == "ab" and ''.join(chunks) == "ab\ncd"
+
+
+def test_multibyte_character_split_across_chunks(tmp_path):
+    _, chunks = load(tmp_path, "aé".encode('utf-8'), 2)
+    assert chunks[0] == "a" and ''.join(chunks) == "aé"
+
+
+def test_invalid_bytes_are_replaced(tmp_path):
+    loader, chunks = load(tmp_path, b"a\xffb\xe2\x82", 2)
+    assert ''.join(chunks) == "a�b�"
+    assert loader.chars == 4
+
+
+def test_empty_file(tmp_path):
+    loader, chunks = load(tmp_path, b"", 4)
+    assert chunks == [''] and loader.chars == 0 and loader.lines == 1 and loader.progress() == 1.0
@@ -0,0 +1,42 @@
+import main
+
+
+def test_precise_timing_sends_one_key_per_call():
+    calls = []
+
+    class Backend:
+        types_keys = True
+
+        def write(self, text, interval=0.0):
+            calls.append(('write', text, interval))
+
+        def press(self, keys, interval=0.0):
+            calls.append(('press', keys, interval))
+
+        def close(self):
+            pass
+
+    class Timer:
+        def __init__(self):
+            self.slept = []
+
+        def sleep(self, seconds):
+            self.slept.append(seconds)
+
+    executor = main.KeystrokeExecutor(Backend())
+    executor.timer = Timer()
+    executor.run([('write', 'abc', 0.01), ('press', ('backspace', 'backspace'), 0.02), ('write', 'd', 0.03)])
+    assert calls == [('write', c, 0.0) for c in 'abc'] + [('press', 'backspace', 0.0)] * 2 + [('write', 'd', 0.0)]
+    assert executor.timer.slept == [0.01] * 3 + [0.02] * 2 + [0.03]
+
+
+def test_isolated_executor_pastes_through_the_parent_clipboard():
+    clipboard = ['original']
+    executor = main.KeystrokeExecutor(object())
+    executor.tally = main.ReplayTally()
+    process = main.ExecutorProcess(executor, dict(main.DEFAULT_SETTINGS), 'pyautogui', None,
+                                   clipboard.append, lambda: clipboard[-1])
+    process.run([('write', 'a', 0.0), ('paste', 'é', 0.0)])
+    assert 'é' in clipboard
+    assert clipboard[-1] == 'original'  # Restored when the child's backend closes
+    assert executor.tally.events == 2
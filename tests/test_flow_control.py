@@ -0,0 +1,31 @@
+import main
+
+
+def test_without_readback_rate_never_exceeds_planned_speed():
+    flow = main.FlowController()
+    for _ in range(1000):
+        flow.observe(0.001, 1)
+    assert flow.rate == 1.0
+
+
+def test_with_readback_rate_can_speed_up():
+    flow = main.FlowController(readback=lambda: '')
+    for _ in range(1000):
+        flow.observe(0.001, 1)
+    assert flow.rate == flow.max_rate == 2.0
+
+
+def test_slow_calls_back_off():
+    flow = main.FlowController()
+    flow.observe(0.001, 1)
+    flow.observe(0.1, 1)
+    assert flow.rate == 0.5
+
+
+def test_scaled_delays_keep_the_minimum():
+    flow = main.FlowController(readback=lambda: '')
+    flow.rate = 2.0
+    assert flow.scale(0.008) == main.FlowController.MIN_DELAY
+    assert flow.scale(0.004) == 0.004
+    assert flow.scale(0) == 0
+    assert flow.scale(0.1) == 0.05
@@ -0,0 +1,47 @@
+import random
+
+import harness
+import main
+
+
+class Backend:
+    name = 'fake'
+    types_keys = True
+    blocks_loop = True
+
+    def __init__(self):
+        self.typed = []
+        self.restored = False
+
+    def write(self, text, interval=0.0):
+        self.typed.append(text)
+
+    def press(self, keys, interval=0.0):
+        self.typed.extend([keys] if isinstance(keys, str) else keys)
+
+    def key_down(self, key):
+        pass
+
+    def key_up(self, key):
+        pass
+
+    def paste(self, text):
+        self.typed.append(text)
+
+    def restore_clipboard(self):
+        self.restored = True
+
+    def close(self):
+        pass
+
+
+def test_recording_backend_forwards_and_records_pastes():
+    backend = harness.RecordingBackend(Backend())
+    text = main.preflight_text("café “quoted”").text
+    settings = dict(main.DEFAULT_SETTINGS, use_typos=False, use_rewrite=False, use_pauses=False)
+    events = main.TypingPlanner(settings, random.Random(1)).iter_events(text)
+    main.KeystrokeExecutor(backend).run(events)
+    assert ''.join(backend.backend.typed) == 'café "quoted"'
+    assert len(backend.sent) == len(text)
+    backend.restore_clipboard()
+    assert backend.backend.restored and backend.blocks_loop
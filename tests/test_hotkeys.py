@@ -0,0 +1,160 @@
+import sys
+import types
+
+import pytest
+
+import main
+
+X = types.SimpleNamespace(
+    KeyPress=2, KeyRelease=3, GrabModeAsync=1,
+    ShiftMask=1, LockMask=2, ControlMask=4, Mod1Mask=8, Mod2Mask=16, Mod4Mask=64,
+)
+KEYSYMS = {'1': 0x31, 'F5': 0xffc2, 'a': 0x61}
+KEYCODES = {0x31: 10, 0xffc2: 71, 0x61: 38}
+
+
+class Event:
+    def __init__(self, type, detail, state=0, time=0):
+        self.type = type
+        self.detail = detail
+        self.state = state
+        self.time = time
+
+
+class Display:
+    """Hands out scripted events; raises IndexError once they run out"""
+
+    def __init__(self, events):
+        self.events = list(events)
+
+    def next_event(self):
+        return self.events.pop(0)
+
+    def pending_events(self):
+        return len(self.events)
+
+
+def grab_events(events, keys):
+    grab = main.X11HotkeyGrab.__new__(main.X11HotkeyGrab)
+    grab.X = X
+    grab.mask = 0xff
+    grab.keys = keys
+    grab.display = Display(events)
+    fired = []
+    grab.callback = fired.append
+    with pytest.raises(IndexError):
+        grab.run()
+    return fired
+
+
+def test_hotkey_fires_on_release():
+    fired = grab_events([Event(X.KeyPress, 10, 4), Event(X.KeyRelease, 10, 4)], {(10, 4): 'ctrl+1'})
+    assert fired == ['ctrl+1']
+
+
+def test_hotkey_does_not_fire_on_press():
+    assert grab_events([Event(X.KeyPress, 10, 4)], {(10, 4): 'ctrl+1'}) == []
+
+
+def test_modifier_released_first_still_fires():
+    events = [Event(X.KeyPress, 10, 4), Event(X.KeyRelease, 10, 0)]
+    assert grab_events(events, {(10, 4): 'ctrl+1'}) == ['ctrl+1']
+
+
+def test_auto_repeat_fires_once():
+    events = [
+        Event(X.KeyPress, 67, time=1),
+        Event(X.KeyRelease, 67, time=5), Event(X.KeyPress, 67, time=5),
+        Event(X.KeyRelease, 67, time=9), Event(X.KeyPress, 67, time=9),
+        Event(X.KeyRelease, 67, time=12),
+    ]
+    assert grab_events(events, {(67, 0): 'f9'}) == ['f9']
+
+
+def test_other_keys_are_ignored():
+    events = [Event(X.KeyPress, 11), Event(X.KeyRelease, 11), Event(X.KeyRelease, 10)]
+    assert grab_events(events, {(10, 0): 'f1'}) == []
+
+
+@pytest.mark.parametrize('hotkey, expected', [
+    ('f5', ([], 'f5')),
+    ('Ctrl + Alt + 1', (['ctrl', 'alt'], '1')),
+    ('super+shift+a', (['super', 'shift'], 'a')),
+])
+def test_parse_hotkey(hotkey, expected):
+    assert main.parse_hotkey(hotkey) == expected
+
+
+@pytest.mark.parametrize('hotkey', ['', 'ctrl+', '+a', 'hyper+a', 'ctrl+meta+1'])
+def test_parse_hotkey_rejects_bad_names(hotkey):
+    with pytest.raises(ValueError):
+        main.parse_hotkey(hotkey)
+
+
+class Root:
+    def __init__(self):
+        self.grabs = []
+
+    def grab_key(self, keycode, modifiers, owner_events, pointer_mode, keyboard_mode, onerror=None):
+        self.grabs.append((keycode, modifiers))
+
+
+class GrabDisplay:
+    def __init__(self):
+        self.root = Root()
+        self.closed = False
+
+    def screen(self):
+        return types.SimpleNamespace(root=self.root)
+
+    def keysym_to_keycode(self, keysym):
+        return KEYCODES.get(keysym, 0)
+
+    def sync(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def xlib(monkeypatch):
+    """Just enough of python-xlib for X11HotkeyGrab.__init__"""
+    state = types.SimpleNamespace(display=GrabDisplay(), error=None)
+
+    class CatchError:
+        def __init__(self, *errors):
+            pass
+
+        def get_error(self):
+            return state.error
+
+    module = types.ModuleType('Xlib')
+    module.X = X
+    module.XK = types.SimpleNamespace(string_to_keysym=lambda name: KEYSYMS.get(name, 0))
+    module.display = types.SimpleNamespace(Display=lambda: state.display)
+    module.error = types.SimpleNamespace(CatchError=CatchError, BadAccess=object())
+    monkeypatch.setitem(sys.modules, 'Xlib', module)
+    return state
+
+
+def test_grab_masks_cover_num_lock_and_caps_lock(xlib):
+    grab = main.X11HotkeyGrab(['ctrl+alt+1', 'f5'], None)
+    control_alt = X.ControlMask | X.Mod1Mask
+    assert grab.keys == {(10, control_alt): 'ctrl+alt+1', (71, 0): 'f5'}
+    locks = (0, X.Mod2Mask, X.LockMask, X.Mod2Mask | X.LockMask)
+    assert xlib.display.root.grabs == [(10, control_alt | lock) for lock in locks] + [(71, lock) for lock in locks]
+    # Lock modifiers are masked out when matching events
+    assert not grab.mask & (X.Mod2Mask | X.LockMask)
+
+
+def test_grab_fails_for_keys_without_a_keycode(xlib):
+    with pytest.raises(RuntimeError):
+        main.X11HotkeyGrab(['ctrl+pause'], None)
+
+
+def test_grab_fails_when_another_program_holds_the_hotkey(xlib):
+    xlib.error = 'BadAccess'
+    with pytest.raises(RuntimeError):
+        main.X11HotkeyGrab(['f5'], None)
+    assert xlib.display.closed
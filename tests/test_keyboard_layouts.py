@@ -0,0 +1,41 @@
+import pytest
+
+import main
+
+
+def adjacent(layout, char):
+    return set(main.LAYOUT_INDEX[layout]['adjacent'].get(char, ()))
+
+
+@pytest.mark.parametrize('layout, char, expected', [
+    ('qwerty', 'a', {'q', 'w', 's', 'z'}),
+    ('azerty', 'a', {'&', 'z', 'q'}),
+    ('azerty', 'q', {'a', 'z', 's', '<', 'w'}),
+    ('azerty', 'm', {'p', '^', 'l', ':', '!'}),
+    ('qwertz', 'z', {'6', '7', 't', 'u', 'g', 'h'}),
+    ('qwertz', 'y', {'a', 's', '<', 'x'}),
+])
+def test_neighbours_follow_the_physical_layout(layout, char, expected):
+    assert adjacent(layout, char) == expected
+
+
+def test_shifted_layer_has_its_own_neighbours():
+    assert adjacent('azerty', 'A') == {'1', '2', 'Z', 'Q'}
+    assert adjacent('qwertz', 'Z') == {'&', '/', 'T', 'U', 'G', 'H'}
+
+
+def test_iso_key_left_of_the_bottom_row():
+    assert '<' in adjacent('qwertz', 'y') and '<' in adjacent('azerty', 'w')
+    assert '<' not in adjacent('qwerty', 'z')
+
+
+def test_neighbours_are_typeable_ascii():
+    for layout in ('azerty', 'qwertz'):
+        for neighbours in main.LAYOUT_INDEX[layout]['adjacent'].values():
+            assert all(0x20 < ord(char) < 0x7f for char in neighbours)
+    assert not {'é', 'è', 'ç'} & adjacent('azerty', 'z')
+
+
+def test_typo_candidates_use_the_chosen_layout():
+    assert ('zzur', 'qzur') in main.wrong_word_candidates('azur', 'azerty')
+    assert ('tebra', 'uebra', 'gebra', 'hebra') in main.wrong_word_candidates('zebra', 'qwertz')
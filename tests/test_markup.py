@@ -0,0 +1,57 @@
+import pytest
+
+import main
+
+
+def tokens(text):
+    return list(main.tokenize_markup(text))
+
+
+def test_plain_text_tokenizes_like_tokenize_text():
+    assert tokens("a b\n  c") == list(main.tokenize_text("a b\n  c"))
+
+
+def test_keys_chords_and_waits():
+    assert tokens("a{tab}{ctrl+s}{wait 500ms}{wait 2s}") == [
+        ('word', 'a'), ('key', 'tab'), ('chord', ('ctrl', 's')), ('wait', 0.5), ('wait', 2.0),
+    ]
+
+
+def test_double_brace_is_a_literal_brace():
+    assert tokens("f(){{ x }") == [('word', 'f(){'), ('space', ' '), ('word', 'x'), ('space', ' '), ('word', '}')]
+
+
+def test_repeat_counts():
+    assert main.parse_markup_tag('backspace 3') == [('key', 'backspace')] * 3
+    assert main.parse_markup_tag('TAB') == [('key', 'tab')]
+
+
+def test_aliases():
+    assert main.parse_markup_tag('cmd+pgdn') == [('chord', ('command', 'pagedown'))]
+
+
+@pytest.mark.parametrize('body', [
+    '', 'tab 0', 'tab 1001', 'tab x', 'tab 2 3', 'nosuchkey', 'ctrl+nosuchkey', 'wait', 'wait soon', 'wait 5m',
+])
+def test_invalid_tags(body):
+    with pytest.raises(ValueError):
+        main.parse_markup_tag(body)
+
+
+def test_unclosed_brace_reports_its_position():
+    with pytest.raises(ValueError, match=r"2:3"):
+        tokens("ok\nab{tab")
+
+
+def test_text_after_enter_starts_a_line():
+    assert tokens("a{enter}    b") == [('word', 'a'), ('key', 'enter'), ('indent', '    '), ('word', 'b')]
+
+
+def test_enter_key_resets_auto_indent():
+    rewritten = list(main.apply_target_profile(main.tokenize_markup("    a{enter}    b"), 'auto_indent'))
+    assert rewritten == [('indent', '    '), ('word', 'a'), ('key', 'enter'), ('word', 'b')]
+
+
+def test_enter_key_ends_a_line_for_auto_pairs():
+    rewritten = list(main.apply_target_profile(main.tokenize_markup("f(a{enter})"), 'auto_pair'))
+    assert rewritten == [('word', 'f('), ('key', 'delete'), ('word', 'a'), ('key', 'enter'), ('word', ')')]
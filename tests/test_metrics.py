@@ -0,0 +1,73 @@
+import urllib.request
+
+import main
+
+
+def samples(text):
+    """Sample lines of an exposition as {name{labels}: value}"""
+    return dict(line.rsplit(' ', 1) for line in text.splitlines() if line and not line.startswith('#'))
+
+
+def test_render_is_openmetrics_with_cumulative_buckets():
+    metrics = main.ReplayMetrics()
+    metrics.observe_call(0.0007, 3)
+    metrics.observe_call(0.02, 1)
+    metrics.observe_pause('typo', 0.5)
+    text = metrics.render()
+    assert text.endswith("# EOF\n")
+    values = samples(text)
+    assert values['keystroke_replayer_keystrokes_total'] == '4'
+    assert values['keystroke_replayer_typos_total'] == '1'
+    assert values['keystroke_replayer_backend_call_seconds_bucket{le="0.0005"}'] == '0'
+    assert values['keystroke_replayer_backend_call_seconds_bucket{le="0.001"}'] == '1'
+    assert values['keystroke_replayer_backend_call_seconds_bucket{le="0.025"}'] == '2'
+    assert values['keystroke_replayer_backend_call_seconds_bucket{le="+Inf"}'] == '2'
+    assert values['keystroke_replayer_backend_call_seconds_count'] == '2'
+
+
+def test_job_events_drive_the_gauges():
+    metrics = main.ReplayMetrics()
+    metrics.on_event({'type': 'job', 'state': 'running', 'time': 10.0})
+    metrics.on_event({'type': 'paused', 'time': 11.0})
+    values = samples(metrics.render())
+    assert values['keystroke_replayer_active'] == '1' and values['keystroke_replayer_paused'] == '1'
+    metrics.on_event({'type': 'job', 'state': 'completed', 'time': 12.0})
+    values = samples(metrics.render())
+    assert values['keystroke_replayer_active'] == '0' and values['keystroke_replayer_paused'] == '0'
+    assert values['keystroke_replayer_replays_total{outcome="completed"}'] == '1'
+
+
+def test_drained_observations_merge_into_another_instance():
+    child, parent = main.ReplayMetrics(), main.ReplayMetrics()
+    child.observe_call(0.003, 2)
+    child.observe_lag(0.0002)
+    parent.merge(child.drain())
+    parent.merge(child.drain())
+    assert parent.keystrokes == 2 and parent.scheduling_lag.count == 1
+    assert child.keystrokes == 0 and child.backend_latency.count == 0
+
+
+def test_executor_feeds_metrics():
+    class Backend:
+        def write(self, text, interval=0.0):
+            pass
+
+    executor = main.KeystrokeExecutor(Backend())
+    executor.metrics = main.ReplayMetrics()
+    executor.run([('write', 'ab', 0.0), ('pause', 'rewrite', 0.0), ('write', 'c', 0.0)], coalesce=False)
+    assert executor.metrics.keystrokes == 3 and executor.metrics.rewrites == 1
+    assert executor.metrics.scheduling_lag.count == 1
+
+
+def test_exporter_serves_http_and_writes_a_textfile(tmp_path):
+    metrics = main.ReplayMetrics()
+    metrics.observe_call(0.001, 5)
+    textfile = tmp_path / 'replayer.prom'
+    exporter = main.MetricsExporter(metrics, port=0, textfile=str(textfile)).start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{exporter.httpd.server_port}/metrics") as response:
+            assert response.headers['Content-Type'].startswith('application/openmetrics-text')
+            assert samples(response.read().decode())['keystroke_replayer_keystrokes_total'] == '5'
+    finally:
+        exporter.close()
+    assert samples(textfile.read_text())['keystroke_replayer_keystrokes_total'] == '5'
@@ -0,0 +1,38 @@
+import main
+
+
+def batch(events):
+    return list(main.batch_modifiers(events))
+
+
+def test_run_of_capitals_holds_shift_once():
+    assert batch([('write', 'aBCd', 0.1)]) == [
+        ('write', 'a', 0.1),
+        ('keydown', 'shift', 0), ('press', 'b', 0.1), ('press', 'c', 0.1), ('keyup', 'shift', 0),
+        ('write', 'd', 0.1),
+    ]
+
+
+def test_single_capital_is_written():
+    assert batch([('write', 'Hi', 0.1)]) == [('write', 'H', 0.1), ('write', 'i', 0.1)]
+
+
+def test_run_continues_across_writes_and_ends_at_other_events():
+    assert batch([('write', 'A', 0.1), ('write', 'B', 0.2), ('press', 'enter', 0.3)]) == [
+        ('keydown', 'shift', 0), ('press', 'a', 0.1), ('press', 'b', 0.2), ('keyup', 'shift', 0),
+        ('press', 'enter', 0.3),
+    ]
+
+
+def test_shifted_symbols_and_other_letters_are_not_batched():
+    assert batch([('write', '!@', 0.1), ('write', 'ÄÖ', 0.1)]) == [('write', '!@', 0.1), ('write', 'ÄÖ', 0.1)]
+
+
+def test_planner_batches_shouted_words():
+    settings = dict(main.DEFAULT_SETTINGS, use_typos=False, use_pauses=False, use_rewrite=False, seed=1)
+    events = list(main.TypingPlanner(settings).iter_events("HELLO WORLD"))
+    assert [event[:2] for event in events if event[0] in ('keydown', 'keyup')] == [
+        ('keydown', 'shift'), ('keyup', 'shift'), ('keydown', 'shift'), ('keyup', 'shift'),
+    ]
+    typed = ''.join(arg.upper() if op == 'press' else arg for op, arg, _ in events if op in ('write', 'press'))
+    assert typed == "HELLO WORLD"
@@ -0,0 +1,55 @@
+import json
+import time
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def confusions(monkeypatch):
+    monkeypatch.setattr(main, 'CONFUSIONS', dict(main.CONFUSIONS))
+    yield main.CONFUSIONS
+    main.wrong_word_candidates.cache_clear()
+
+
+def plan(text, **settings):
+    settings = dict(main.DEFAULT_SETTINGS, seed=11, use_rewrite=True, rewrite_chance=60, **settings)
+    return list(main.TypingPlanner(settings).iter_events(text))
+
+
+def test_pool_plans_match_serial_plans_with_loaded_confusions(tmp_path, confusions):
+    path = tmp_path / 'confusions.json'
+    path.write_text(json.dumps({'bare': ['bear']}), encoding='utf-8')
+    main.load_confusions(str(path))
+    text = "\n\n".join(f"the bare facts, paragraph {index}" for index in range(40))
+    serial = plan(text, planning_workers=1)
+    assert serial == plan(text, planning_workers=2)
+
+
+def test_pool_window_keeps_order(confusions):
+    paragraphs = [[('word', f"w{index}"), ('newline', '\n'), ('newline', '\n')] for index in range(30)]
+    settings = dict(main.DEFAULT_SETTINGS, use_typos=False, use_rewrite=False, use_pauses=False)
+    events = list(main.plan_paragraphs_parallel(settings, 1, iter(paragraphs), 2, window=1))
+    typed = ''.join(arg for op, arg, _ in events if op == 'write')
+    assert typed == ''.join(f"w{index}\n\n" for index in range(30))
+
+
+def test_long_paragraphs_are_cut_at_spaces_and_line_breaks():
+    tokens = list(main.tokenize_text("word " * 3000))
+    paragraphs = list(main.split_paragraphs(tokens, max_tokens=100))
+    assert max(len(paragraph) for paragraph in paragraphs) == 100
+    assert all(paragraph[-1][0] == 'space' for paragraph in paragraphs)
+    assert [token for paragraph in paragraphs for token in paragraph] == tokens
+
+
+def test_pool_plans_match_serial_plans_without_blank_lines():
+    text = "some words on one long line " * 600
+    assert plan(text, planning_workers=1) == plan(text, planning_workers=2)
+
+
+def test_first_event_of_a_text_without_blank_lines_arrives_quickly():
+    text = "word " * 1_000_000
+    started = time.perf_counter()
+    next(iter(main.TypingPlanner(dict(main.DEFAULT_SETTINGS, seed=1, planning_workers=1)).iter_events(text)))
+    assert time.perf_counter() - started < 0.5
@@ -0,0 +1,128 @@
+import io
+import os
+import zlib
+
+import pytest
+
+import main
+
+
+EVENTS = [
+    ('write', 'a', 0.05),
+    ('press', 'backspace', 0.012),
+    ('press', ('left', 'left'), 0.02),
+    ('keydown', 'shift', 0.0),
+    ('write', 'ÄÖ', 0.0),
+    ('keyup', 'shift', 0.1),
+    ('burst', 'hello world', 0.02),
+    ('paste', '☃', 0.0),
+    ('pause', None, 1.5),
+    ('pause', 'typo', 0.4),
+]
+
+
+def settings(**overrides):
+    values = dict(main.DEFAULT_SETTINGS)
+    values.update(overrides)
+    return values
+
+
+def test_plan_round_trip():
+    assert list(main.decode_plan(main.encode_plan(EVENTS))) == EVENTS
+
+
+def test_empty_plan_round_trip():
+    assert list(main.decode_plan(main.encode_plan([]))) == []
+
+
+def test_decode_rejects_other_versions():
+    data = bytearray(zlib.decompress(main.encode_plan(EVENTS)))
+    data[3] = main.PLAN_FORMAT_VERSION + 1
+    with pytest.raises(ValueError):
+        list(main.decode_plan(zlib.compress(bytes(data))))
+
+
+def test_key_depends_on_text_seed_and_plan_settings():
+    cache = main.PlanCache('unused')
+    key = cache.key("hello", settings(seed=1))
+    assert cache.key("hello", settings(seed=1)) == key
+    assert cache.key("hellO", settings(seed=1)) != key
+    assert cache.key("hello", settings(seed=2)) != key
+    assert cache.key("hello", settings(seed=1, use_typos=True)) != key
+    assert cache.key("hello", settings(seed=1, keyboard_layout='azerty')) != key
+    assert cache.key("hello", settings(seed=1), keystrokes=False) != key
+
+
+def test_key_ignores_execution_only_settings():
+    cache = main.PlanCache('unused')
+    key = cache.key("hello", settings(seed=1))
+    assert cache.key("hello", settings(seed=1, adaptive_flow=True, precise_timing=True)) == key
+
+
+def test_key_depends_on_format_version(monkeypatch):
+    cache = main.PlanCache('unused')
+    key = cache.key("hello", settings(seed=1))
+    monkeypatch.setattr(main, 'PLAN_FORMAT_VERSION', main.PLAN_FORMAT_VERSION + 1)
+    assert cache.key("hello", settings(seed=1)) != key
+
+
+def test_store_and_load(tmp_path):
+    cache = main.PlanCache(str(tmp_path))
+    key = cache.key("hello", settings(seed=1))
+    assert cache.load(key) is None
+    cache.store(key, EVENTS)
+    assert list(cache.load(key)) == EVENTS
+
+
+def test_corrupt_plan_is_a_miss(tmp_path):
+    cache = main.PlanCache(str(tmp_path))
+    with open(cache.path('bad'), 'wb') as plan_file:
+        plan_file.write(b'not a plan')
+    assert cache.load('bad') is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = main.PlanCache(str(tmp_path))
+    cache.store('old', EVENTS)
+    os.utime(cache.path('old'), (0, 0))
+    cache.max_bytes = os.path.getsize(cache.path('old'))
+    cache.store('new', EVENTS)
+    assert not os.path.exists(cache.path('old'))
+    assert os.path.exists(cache.path('new'))
+
+
+def test_key_depends_on_confusions(monkeypatch):
+    cache = main.PlanCache('unused')
+    key = cache.key("hello", settings(seed=1))
+    monkeypatch.setitem(main.CONFUSIONS, 'hello', ('hallo',))
+    assert cache.key("hello", settings(seed=1)) != key
+
+
+def test_plan_reads_in_small_chunks():
+    blob = main.encode_plan(EVENTS * 50)
+    events = main.read_plan(io.BytesIO(blob), chunk_size=7)
+    assert list(events) == EVENTS * 50
+
+
+def test_truncated_plan_raises():
+    data = zlib.decompress(main.encode_plan(EVENTS))
+    with pytest.raises(ValueError):
+        list(main.decode_plan(zlib.compress(data[:-3])))
+
+
+def test_writer_streams_and_commits(tmp_path):
+    cache = main.PlanCache(str(tmp_path))
+    writer = cache.writer('streamed')
+    for event in EVENTS:
+        writer.write(event)
+    assert cache.load('streamed') is None
+    writer.commit()
+    assert list(cache.load('streamed')) == EVENTS
+
+
+def test_discarded_writer_leaves_nothing(tmp_path):
+    cache = main.PlanCache(str(tmp_path))
+    writer = cache.writer('stopped')
+    writer.write(EVENTS[0])
+    writer.discard()
+    assert os.listdir(str(tmp_path)) == []
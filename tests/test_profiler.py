@@ -0,0 +1,14 @@
+import time
+
+import main
+
+
+def test_planning_excludes_time_blocked_on_the_executor(tmp_path):
+    profiler = main.ReplayProfiler(str(tmp_path))
+    events = (('write', 'a', 0.0) for _ in range(64))
+    pipeline = main.PlanPipeline(events, chunk_size=8, max_chunks=1, profiler=profiler).start()
+    for _ in pipeline:
+        time.sleep(0.005)
+    pipeline.thread.join(5)
+    assert profiler.phases['planning_blocked'] > 0.1
+    assert profiler.phases['planning'] < 0.05
@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+import main
+
+
+class Backend:
+    types_keys = True
+
+    def __init__(self, blocks_loop, seconds=0.0):
+        self.blocks_loop = blocks_loop
+        self.seconds = seconds
+        self.typed = []
+        self.finished = None
+
+    def write(self, text):
+        time.sleep(self.seconds)
+        self.typed.append(text)
+        self.finished = time.perf_counter()
+
+
+def lazy(text):
+    for char in text:
+        yield ('write', char, 0.01)
+
+
+@pytest.fixture
+def engine():
+    engine = main.ReplayEngine().start()
+    yield engine
+    engine.loop.call_soon_threadsafe(engine.loop.stop)
+
+
+def test_blocking_backend_does_not_stall_other_streams(engine):
+    slow = Backend(blocks_loop=True, seconds=0.1)
+    fast = Backend(blocks_loop=False)
+    started = time.perf_counter()
+    results = engine.submit([
+        main.ReplayStream('slow', lazy("abcde"), slow),
+        main.ReplayStream('fast', lazy("abcde"), fast),
+    ]).result(5)
+    assert results == [None, None]
+    assert ''.join(slow.typed) == ''.join(fast.typed) == "abcde"
+    assert fast.finished - started < 0.3 < slow.finished - started
+
+
+def test_only_one_stream_without_a_display():
+    main.check_stream_displays([None, ':1', ':2'])
+    with pytest.raises(ValueError):
+        main.check_stream_displays([None, ':1', ''])
+
+
+class KeyBackend(Backend):
+    def __init__(self):
+        super().__init__(blocks_loop=False)
+        self.held = []
+
+    def key_down(self, key):
+        self.held.append(key)
+
+    def key_up(self, key):
+        self.held.remove(key)
+
+
+def test_executor_stop_ends_a_stream_during_a_pause(engine):
+    backend = KeyBackend()
+    executor = main.KeystrokeExecutor(backend)
+    executor.tally = main.ReplayTally()
+    events = [('keydown', 'shift', 0.0), ('write', 'A', 0.0), ('pause', None, 5.0), ('write', 'b', 0.0)]
+    future = engine.submit([main.ReplayStream('replay', events, executor=executor)])
+    time.sleep(0.2)
+    started = time.perf_counter()
+    executor.stop()
+    result, = future.result(5)
+    assert isinstance(result, main.ReplayStopped)
+    assert time.perf_counter() - started < 0.5
+    assert backend.typed == ["A"] and backend.held == []
+    assert executor.keys_sent == 1 and executor.tally.events == 2
+
+
+def test_paused_stream_resumes_where_it_left_off(engine):
+    backend = KeyBackend()
+    executor = main.KeystrokeExecutor(backend)
+    executor.pause()
+    future = engine.submit([main.ReplayStream('replay', lazy("ab"), executor=executor)])
+    time.sleep(0.3)
+    assert backend.typed == []
+    executor.resume()
+    assert future.result(5) == [None]
+    assert backend.typed == ["a", "b"] and executor.paused_seconds > 0.2
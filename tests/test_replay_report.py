@@ -0,0 +1,72 @@
+import os
+
+import main
+
+
+def tally_of(log, worst=5):
+    tally = main.ReplayTally(worst)
+    for entry in log:
+        tally.record(*entry)
+    return tally
+
+
+def test_counts_keys_pauses_and_reasons():
+    log = [
+        ('write', 1, None, 0.0, 0.1, 0.1),
+        ('pause', 0, 'typo', 0.1, 0.4, 0.3),
+        ('press', 2, None, 0.4, 0.5, 0.1),
+        ('pause', 0, 'rewrite', 0.5, 0.7, 0.2),
+        ('pause', 0, None, 0.7, 0.8, 0.1),
+    ]
+    report = tally_of(log).report(chars=3)
+    assert report.events == 5
+    assert report.keystrokes == 3
+    assert (report.typos, report.rewrites) == (1, 1)
+    assert abs(report.pause_seconds - 0.6) < 1e-9
+    assert abs(report.typing_seconds - 0.2) < 1e-9
+    assert abs(report.seconds - 0.8) < 1e-9
+
+
+def test_keeps_only_the_worst_stalls():
+    log = [('write', 1, None, i, i + 0.1 + i / 100, 0.1) for i in range(20)]
+    report = tally_of(log, worst=3).report(chars=20)
+    assert [round(stall, 3) for _, stall, _ in report.stalls] == [0.19, 0.18, 0.17]
+    assert report.stalls[0][0] == 19
+
+
+def test_user_pauses_leave_active_time():
+    log = [('write', 1, None, 0.0, 0.1, 0.1), ('write', 1, None, 5.0, 5.1, 0.1)]
+    assert abs(tally_of(log).report(chars=2, paused_seconds=4.9).seconds - 0.2) < 1e-9
+
+
+def test_empty_replay():
+    report = main.ReplayTally().report(chars=0)
+    assert report.seconds == 0.0 and report.stalls == [] and report.effective_wpm == 0.0
+
+
+def test_executor_feeds_the_tally():
+    class Backend:
+        types_keys = True
+
+        def write(self, text):
+            pass
+
+        def press(self, key, presses=1):
+            pass
+
+        def close(self):
+            pass
+
+    executor = main.KeystrokeExecutor(Backend())
+    executor.tally = main.ReplayTally()
+    executor.run([('write', 'a', 0.0), ('pause', 'typo', 0.0), ('press', 'backspace', 0.0)], coalesce=False)
+    assert executor.tally.events == 3
+    assert executor.tally.typos == 1
+
+
+def test_saved_reports_are_capped(tmp_path):
+    for index in range(5):
+        main.save_report({'index': index}, f"replay-{index}.json", str(tmp_path), keep=3)
+        os.utime(tmp_path / f"replay-{index}.json", (index, index))
+    main.save_report({'index': 5}, "replay-5.json", str(tmp_path), keep=3)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["replay-3.json", "replay-4.json", "replay-5.json"]
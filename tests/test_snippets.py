@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+import main
+
+
+class Backend:
+    types_keys = True
+
+    def __init__(self):
+        self.restored = 0
+
+    def restore_clipboard(self):
+        self.restored += 1
+
+
+def take(snippet):
+    for _ in range(500):
+        plan = snippet.take()
+        if plan is not None:
+            return plan
+        time.sleep(0.01)
+    raise AssertionError("snippet was never planned")
+
+
+def test_seeded_snippet_matches_a_replay_plan(tmp_path):
+    settings = dict(main.DEFAULT_SETTINGS, seed=3)
+    cache = main.PlanCache(str(tmp_path))
+    backend = Backend()
+    snippet = main.ArmedSnippet('ctrl+alt+1', "hello, world", settings, backend, cache)
+    plan = take(snippet)
+    assert plan.backend is backend
+    assert list(plan) == list(main.ReplayPlan("hello, world", settings, True))
+    # Seeded snippets go through the plan cache
+    assert main.ReplayPlan("hello, world", settings, True, cache).cached
+
+
+def test_firing_restores_the_clipboard():
+    backend = Backend()
+    snippet = main.ArmedSnippet('ctrl+alt+2', "hi", dict(main.DEFAULT_SETTINGS, seed=1), backend)
+    plan = take(snippet)
+    plan.close()
+    assert backend.restored == 1
+
+
+class FailingCache:
+    """Fails the first load, then misses without storing anything"""
+
+    def __init__(self):
+        self.failures = 1
+
+    def key(self, text, settings, keystrokes):
+        return 'key'
+
+    def load(self, key):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk on fire")
+        return None
+
+    def writer(self, key):
+        raise OSError("read-only")
+
+
+def test_planning_failure_is_reported_and_planned_again():
+    snippet = main.ArmedSnippet('ctrl+alt+3', "hi", dict(main.DEFAULT_SETTINGS, seed=1), Backend(), FailingCache())
+    for _ in range(500):
+        if snippet.error is not None:
+            break
+        time.sleep(0.01)
+    with pytest.raises(OSError, match="disk on fire"):
+        snippet.take()
+    # The retry started by take succeeds
+    assert take(snippet) is not None
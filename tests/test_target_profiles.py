@@ -0,0 +1,77 @@
+import main
+
+
+def rewrite(text, profile):
+    return list(main.apply_target_profile(main.tokenize_text(text), profile))
+
+
+def test_plain_profile_types_everything():
+    text = "if x:\n    y = (1\n"
+    assert rewrite(text, 'plain') == list(main.tokenize_text(text))
+
+
+def test_auto_indent_types_only_the_difference():
+    assert rewrite("a\n    b\n    c\nd", 'auto_indent') == [
+        ('word', 'a'), ('newline', '\n'),
+        ('indent', '    '), ('word', 'b'), ('newline', '\n'),
+        ('word', 'c'), ('newline', '\n'),
+        ('dedent', 4), ('word', 'd'),
+    ]
+
+
+def test_blank_lines_keep_the_carried_indentation():
+    assert rewrite("    a\n\n    b", 'auto_indent') == [
+        ('indent', '    '), ('word', 'a'), ('newline', '\n'), ('newline', '\n'), ('word', 'b'),
+    ]
+
+
+def test_code_editor_adds_a_level_after_colon_and_brace():
+    assert rewrite("if x:\n    y\nz", 'code_editor') == [
+        ('word', 'if'), ('space', ' '), ('word', 'x:'), ('newline', '\n'),
+        ('word', 'y'), ('newline', '\n'),
+        ('dedent', 1), ('word', 'z'),
+    ]
+
+
+def test_code_editor_retypes_spaces_past_a_tab_stop():
+    assert rewrite("      a\n  b", 'code_editor') == [
+        ('indent', '      '), ('word', 'a'), ('newline', '\n'),
+        ('dedent', 2), ('indent', '  '), ('word', 'b'),
+    ]
+
+
+def test_unclosed_bracket_deletes_the_inserted_closer():
+    assert rewrite("f(a, b)\ng(", 'auto_pair') == [
+        ('word', 'f(a,'), ('space', ' '), ('word', 'b)'), ('newline', '\n'),
+        ('word', 'g('), ('key', 'delete'),
+    ]
+
+
+def test_quotes_pair_but_not_after_word_characters():
+    assert rewrite("don't \"x", 'auto_pair') == [
+        ('word', "don't"), ('space', ' '), ('word', '"'), ('key', 'delete'), ('word', 'x'),
+    ]
+
+
+def test_brackets_inside_strings_are_not_paired():
+    assert rewrite('"a(b"', 'auto_pair') == [('word', '"a(b"')]
+
+
+def rewrite_events(text, **settings):
+    settings = dict(main.DEFAULT_SETTINGS, seed=5, target_profile='code_editor', word_delete_chords=True,
+                    use_rewrite=True, rewrite_chance=100, use_typos=False, **settings)
+    return list(main.TypingPlanner(settings).iter_events(text))
+
+
+def chords(events):
+    return sum(1 for op, arg, _ in events if op == 'keydown' and arg == main.WORD_DELETE_MODIFIER)
+
+
+def test_word_delete_chord_after_whitespace():
+    assert chords(rewrite_events("abc defg hijk")) == 2  # Not the first word: what precedes it is unknown
+
+
+def test_word_delete_chord_not_used_inside_split_words():
+    # Only the part before the pasted character or the wait starts a word
+    assert chords(rewrite_events("xyz abcdïefgh")) == 1
+    assert chords(rewrite_events("xyz abc{wait 1s}def", markup=True)) == 1
@@ -0,0 +1,29 @@
+import main
+
+# Prose the factors were not calibrated on
+OTHER_TEXT = """
+The museum opened its new wing on Saturday morning, and by noon the line of visitors reached
+the end of the street. Inside, the paintings were arranged by decade rather than by artist, so
+a small landscape from a forgotten painter might hang beside a famous portrait. Several of the
+guides said that children often notice details their parents miss, such as a dog asleep under
+a table or a letter left open on a chair. The director hopes that the exhibition will travel
+to other cities next year, although the cost of moving such fragile work is very high.
+"""
+
+
+def test_average_factor_over_typical_text_is_one():
+    assert abs(main.word_speed_normalization(main.SPEED_REFERENCE_TEXT) / main.WORD_SPEED_NORMALIZATION - 1) < 1e-9
+    assert abs(main.word_speed_normalization(OTHER_TEXT) / main.WORD_SPEED_NORMALIZATION - 1) < 0.05
+
+
+def test_common_words_are_faster_than_rare_ones():
+    planner = main.TypingPlanner(dict(main.DEFAULT_SETTINGS))
+    assert planner.calculate_word_speed_factor('the') < planner.calculate_word_speed_factor('fox')
+    assert planner.calculate_word_speed_factor('would') < planner.calculate_word_speed_factor('wound')
+
+
+def test_common_words_are_ranked_by_frequency():
+    words = main.COMMON_WORDS
+    assert words[:5] == ['the', 'of', 'and', 'to', 'a']
+    assert len(set(words)) == len(words)
+    assert main.WORD_SPEED_FACTORS['the'] < main.WORD_SPEED_FACTORS['would'] < main.WORD_SPEED_FACTORS['knew']
@@ -0,0 +1,68 @@
+import types
+
+import main
+
+X = types.SimpleNamespace(KeyPress=2, KeyRelease=3)
+SHIFT = 50
+
+# keycode -> keysyms by shift level; 0x20ac (€) only on an AltGr level
+KEYMAP = {38: (ord('a'), ord('A')), 56: (ord('b'), ord('B')), 10: (ord('1'), ord('!')), 26: (ord('e'), ord('E'), 0x20ac)}
+
+
+class Display:
+    def __init__(self):
+        self.synced = 0
+
+    def keysym_to_keycode(self, keysym):
+        for keycode, keysyms in KEYMAP.items():
+            if keysym in keysyms:
+                return keycode
+        return 0
+
+    def keycode_to_keysym(self, keycode, index):
+        keysyms = KEYMAP.get(keycode, ())
+        return keysyms[index] if index < len(keysyms) else 0
+
+    def sync(self):
+        self.synced += 1
+
+
+def xtest_backend(monkeypatch):
+    backend = main.XTestBackend.__new__(main.XTestBackend)
+    backend.X = X
+    backend.display = Display()
+    backend.shift_keycode = SHIFT
+    backend.keycodes = {}
+    backend.sent = []
+    backend.fake_input = lambda display, kind, keycode: backend.sent.append((kind, keycode))
+    monkeypatch.setattr(main.pyautogui, 'write', lambda char, **options: backend.sent.append(('write', char)),
+                        raising=False)
+    return backend
+
+
+def test_keycode_for_finds_the_shift_level(monkeypatch):
+    backend = xtest_backend(monkeypatch)
+    assert backend.keycode_for('a') == (38, False)
+    assert backend.keycode_for('B') == (56, True)
+    assert backend.keycode_for('!') == (10, True)
+    assert backend.keycode_for('€') is None  # AltGr level
+    assert backend.keycode_for('é') is None  # Not on the keymap
+
+
+def test_burst_holds_shift_across_shifted_keys(monkeypatch):
+    backend = xtest_backend(monkeypatch)
+    backend.burst("aB!a")
+    assert backend.sent == [
+        (X.KeyPress, 38), (X.KeyRelease, 38),
+        (X.KeyPress, SHIFT), (X.KeyPress, 56), (X.KeyRelease, 56), (X.KeyPress, 10), (X.KeyRelease, 10),
+        (X.KeyRelease, SHIFT), (X.KeyPress, 38), (X.KeyRelease, 38),
+    ]
+    assert backend.display.synced == 1
+
+
+def test_burst_releases_shift_before_falling_back_for_unmapped_chars(monkeypatch):
+    backend = xtest_backend(monkeypatch)
+    backend.burst("Bé")
+    assert backend.sent == [
+        (X.KeyPress, SHIFT), (X.KeyPress, 56), (X.KeyRelease, 56), (X.KeyRelease, SHIFT), ('write', 'é'),
+    ]